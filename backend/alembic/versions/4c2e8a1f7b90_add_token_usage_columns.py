@@ -0,0 +1,38 @@
+"""add_token_usage_columns
+
+Revision ID: 4c2e8a1f7b90
+Revises: 30e3eaab3415
+Create Date: 2026-10-19 10:12:41.503218
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '4c2e8a1f7b90'
+down_revision: Union[str, Sequence[str], None] = '30e3eaab3415'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('ai_usage_logs', sa.Column('input_tokens', sa.Integer(), server_default='0', nullable=False))
+    op.add_column('ai_usage_logs', sa.Column('output_tokens', sa.Integer(), server_default='0', nullable=False))
+    op.add_column('ai_usage_logs', sa.Column('cached_tokens', sa.Integer(), server_default='0', nullable=False))
+    op.add_column('ai_usage_logs', sa.Column('llm_calls', sa.Integer(), server_default='0', nullable=False))
+    op.add_column('ai_usage_logs', sa.Column('latency_ms', sa.Integer(), server_default='0', nullable=False))
+    op.add_column('ai_usage_logs', sa.Column('usage_breakdown', sa.JSON(), nullable=True))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('ai_usage_logs', 'usage_breakdown')
+    op.drop_column('ai_usage_logs', 'latency_ms')
+    op.drop_column('ai_usage_logs', 'llm_calls')
+    op.drop_column('ai_usage_logs', 'cached_tokens')
+    op.drop_column('ai_usage_logs', 'output_tokens')
+    op.drop_column('ai_usage_logs', 'input_tokens')
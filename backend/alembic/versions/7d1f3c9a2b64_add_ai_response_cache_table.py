@@ -0,0 +1,41 @@
+"""add_ai_response_cache_table
+
+Revision ID: 7d1f3c9a2b64
+Revises: 4c2e8a1f7b90
+Create Date: 2026-10-19 14:03:27.118402
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '7d1f3c9a2b64'
+down_revision: Union[str, Sequence[str], None] = '4c2e8a1f7b90'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('ai_response_cache',
+    sa.Column('namespace', sa.String(length=50), nullable=False),
+    sa.Column('key', sa.String(length=64), nullable=False),
+    sa.Column('value', sa.JSON(), nullable=True),
+    sa.Column('hits', sa.Integer(), server_default='0', nullable=False),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+    sa.Column('last_used_at', sa.DateTime(timezone=True), nullable=False),
+    sa.Column('expires_at', sa.DateTime(timezone=True), nullable=False),
+    sa.PrimaryKeyConstraint('namespace', 'key')
+    )
+    op.create_index(op.f('ix_ai_response_cache_last_used_at'), 'ai_response_cache', ['last_used_at'], unique=False)
+    op.create_index(op.f('ix_ai_response_cache_expires_at'), 'ai_response_cache', ['expires_at'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_ai_response_cache_expires_at'), table_name='ai_response_cache')
+    op.drop_index(op.f('ix_ai_response_cache_last_used_at'), table_name='ai_response_cache')
+    op.drop_table('ai_response_cache')
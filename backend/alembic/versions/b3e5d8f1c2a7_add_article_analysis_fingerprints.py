@@ -0,0 +1,42 @@
+"""add_article_analysis_fingerprints
+
+Revision ID: b3e5d8f1c2a7
+Revises: 7d1f3c9a2b64
+Create Date: 2026-10-19 16:41:09.532871
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b3e5d8f1c2a7'
+down_revision: Union[str, Sequence[str], None] = '7d1f3c9a2b64'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('news_articles', sa.Column('quality_score', sa.Float(), nullable=True))
+    op.add_column('news_articles', sa.Column('content_fingerprint', sa.String(length=64), nullable=True))
+    op.add_column('news_articles', sa.Column('analysis_fingerprint', sa.String(length=64), nullable=True))
+    op.add_column('news_articles', sa.Column('analysis_version', sa.String(length=64), nullable=True))
+    op.add_column('news_articles', sa.Column('analysis_inputs', sa.JSON(), nullable=True))
+    op.add_column('news_articles', sa.Column('analyzed_at', sa.DateTime(timezone=True), nullable=True))
+    op.create_index(op.f('ix_news_articles_content_fingerprint'), 'news_articles', ['content_fingerprint'], unique=False)
+    op.create_index(op.f('ix_news_articles_analysis_version'), 'news_articles', ['analysis_version'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_news_articles_analysis_version'), table_name='news_articles')
+    op.drop_index(op.f('ix_news_articles_content_fingerprint'), table_name='news_articles')
+    op.drop_column('news_articles', 'analyzed_at')
+    op.drop_column('news_articles', 'analysis_inputs')
+    op.drop_column('news_articles', 'analysis_version')
+    op.drop_column('news_articles', 'analysis_fingerprint')
+    op.drop_column('news_articles', 'content_fingerprint')
+    op.drop_column('news_articles', 'quality_score')
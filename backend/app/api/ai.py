@@ -1,5 +1,5 @@
 from typing import Any, Dict, List, Optional
-from fastapi import APIRouter, Depends, HTTPException, Response, Body
+from fastapi import APIRouter, Depends, HTTPException, Response, Body, Header
 from fastapi.responses import StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
@@ -11,16 +11,59 @@ from app.models.user import User
 from app.models.news import UserPreference, NewsCategory # Kept for prefs
 from app.models.daily_cache import UserDailyCache
 from app.models.payment import AIUsageLog
-from app.services.ai_agents.graph import news_graph
-from app.services.ai_agents.nodes import call_llm_with_rotation
+from app.services.ai_agents.runner import (
+    analyse_article,
+    batch_semaphore,
+    build_initial_state,
+    get_cached_article,
+    state_cache_key
+)
+from app.services.ai_agents.broadcast import article_runs
+from app.services.ai_agents.deadline import DeadlineExceeded, deadline_scope, resolve_budget
+from app.services.ai_agents.admission import llm_priority, priority_scope
+from app.services.ai_agents.usage import build_usage_log, track_usage
+from app.services.ai_agents.retrieval import build_context, retrieve
+from app.services.ai_agents.compare import compare_contents
+from app.services.ai_agents.cache import content_hash
+from app.services.ai_agents.response_cache import ResponseCache
+from app.services.briefings import MAX_BRIEFING_CATEGORIES, get_briefing, stream_multi_briefing
+from app.services.daily_cache import store_daily_cache
+from app.services.jobs import job_service, JobQueueFull, TooManyJobs
+from app.services.ai_agents.errors import ai_error_headers, handle_ai_error
+from app.core.metrics import metrics
+from app.services.ai_agents.nodes import call_llm_with_rotation, STR_PARSER
 from langchain_core.prompts import ChatPromptTemplate
-from langchain_core.output_parsers import StrOutputParser
 from sqlalchemy import func
 import json
 import asyncio
 
 router = APIRouter()
 
+# Prompts are built once so call_llm_with_rotation can reuse their chains
+EXPLAIN_PROMPTS = {
+    "eli5": ChatPromptTemplate.from_template(
+        "Explain the following article like I am 5 years old (ELI5). Content: {content}"
+    ),
+    "interview": ChatPromptTemplate.from_template(
+        "Explain the following article as if you are being interviewed about it. Content: {content}"
+    ),
+}
+# Bump when EXPLAIN_PROMPTS change so cached explanations are not reused
+EXPLAIN_PROMPT_VERSION = "1"
+
+explain_cache = ResponseCache(
+    "explain",
+    memory_size=settings.EXPLAIN_CACHE_MEMORY_SIZE,
+    ttl_seconds=settings.EXPLAIN_CACHE_TTL_SECONDS,
+    max_rows=settings.EXPLAIN_CACHE_MAX_ROWS,
+)
+
+ASK_PROMPT = ChatPromptTemplate.from_template(
+    "Answer the user's question based on the provided news context. "
+    "Cite passages by their [number] and say so if the context does not contain the answer."
+    "\n\nContext:\n{context}\n\nQuestion: {question}"
+)
+
 from pydantic import BaseModel
 class ArticleContext(BaseModel):
     id: str
@@ -30,10 +73,12 @@ class ArticleContext(BaseModel):
     author: Optional[str] = None
     published_at: Optional[str] = None
     url: Optional[str] = None
+    category: Optional[List[str]] = None # As provided by Currents
 
 @router.post("/process")
 async def process_article(
     article: ArticleContext,
+    deadline_ms: Optional[int] = Header(default=None, alias="X-Deadline-Ms"),
     db: AsyncSession = Depends(deps.get_db),
     current_user: User = Depends(deps.get_current_active_user)
 ) -> Any:
@@ -42,66 +87,199 @@ async def process_article(
     Checks rates and premium status.
     Returns a stream of progress events.
     Body must contain article details.
+    X-Deadline-Ms sets the latency budget; stages skipped or shortened to
+    meet it are listed in the final event's 'degraded' field.
     """
     import asyncio
     
     if not current_user.is_premium:
         await check_ai_limit(db, current_user.id)
 
+    budget = resolve_budget(settings.AI_PROCESS_DEADLINE_SECONDS, deadline_ms)
+
     async def event_generator():
         # Prepare State using provided body payload
-        initial_state = {
-            "article_id": article.id,
-            "title": article.title,
-            "content": article.content or article.description or "",
-            "is_premium": current_user.is_premium,
-            "quality_score": 1.0 
-        }
-        
-        yield f"data: {json.dumps({'status': 'starting', 'message': 'Initializing AI Agents...'})}\n\n"
+        initial_state = build_initial_state(
+            article.id,
+            article.title,
+            article.content or article.description or "",
+            current_user.is_premium,
+            article.category
+        )
         
+        # Identical concurrent requests share one graph run (and the first request's deadline);
+        # errors arrive as events
+        with deadline_scope(budget), priority_scope(llm_priority(current_user.is_premium)):
+            async for event in article_runs.stream(initial_state):
+                if event["status"] == "complete" and not event.get("cached") and not event.get("shared"):
+                    # Log real token usage of the graph run
+                    db.add(build_usage_log(current_user.id, "process_article", event.get("usage")))
+                    await db.commit()
+                yield f"data: {json.dumps(event)}\n\n"
+
+    return StreamingResponse(event_generator(), media_type="text/event-stream")
+
+@router.post("/process/batch")
+async def process_articles_batch(
+    articles: List[ArticleContext] = Body(...),
+    stream_format: str = "ndjson", # ndjson or sse
+    db: AsyncSession = Depends(deps.get_db),
+    current_user: User = Depends(deps.get_current_active_user)
+) -> Any:
+    """
+    Analyse a batch of articles (e.g. a whole feed page).
+    Duplicates and cached articles are answered immediately, the rest run with
+    bounded concurrency. Results stream back in completion order, one per article.
+    """
+    if not articles:
+        raise HTTPException(status_code=400, detail="No articles provided")
+    if len(articles) > settings.AI_BATCH_MAX_ITEMS:
+        raise HTTPException(status_code=400, detail=f"Batch limit is {settings.AI_BATCH_MAX_ITEMS} articles")
+
+    # Group by cache key so identical content is only analysed once
+    cached_results = []
+    pending: Dict[str, tuple[dict, List[str]]] = {}
+    for article in articles:
+        state = build_initial_state(
+            article.id,
+            article.title,
+            article.content or article.description or "",
+            current_user.is_premium,
+            article.category
+        )
+        cached = get_cached_article(state)
+        if cached is not None:
+            cached_results.append({"id": article.id, "status": "complete", "article": cached, "cached": True})
+            continue
+        key = state_cache_key(state)
+        if key in pending:
+            pending[key][1].append(article.id)
+        else:
+            pending[key] = (state, [article.id])
+
+    if not current_user.is_premium and pending:
+        await check_ai_limit(db, current_user.id, cost=len(pending))
+
+    async def run_one(state: dict, ids: List[str]) -> tuple[List[dict], Optional[dict]]:
+        """
+        Returns the per-article items and the run's token usage.
+        """
         try:
-            accumulated_state = initial_state.copy()
-            async for chunk in news_graph.astream(initial_state):
-                for key, val in chunk.items():
-                    if isinstance(val, dict):
-                        accumulated_state.update(val)
-                    
-                    # Yield event
-                    agent_name = key
-                    messages = {
-                        "collector": "Gathering and cleaning content...",
-                        "classifier": "Classifying topic and sentiment...",
-                        "summarizer": "Generating concise summaries...",
-                        "bias": "Analyzing political bias...",
-                    }
-                    msg = messages.get(agent_name, f"Processing {agent_name}...")
-                    yield f"data: {json.dumps({'status': 'progress', 'agent': agent_name, 'message': msg})}\n\n"
-            
-            # Log Usage
-            log = AIUsageLog(
-                user_id=current_user.id,
-                action="process_article",
-                tokens_used=1000 
-            )
-            db.add(log)
-            await db.commit()
-            
-            final_data = {
-                "id": article.id,
-                "summary_short": accumulated_state.get("summary_short"),
-                "summary_detail": accumulated_state.get("summary_detail"),
-                "sentiment": accumulated_state.get("sentiment"),
-                "tags": accumulated_state.get("tags"),
-                "bias_score": accumulated_state.get("bias_score"),
-                "bias_explanation": accumulated_state.get("bias_explanation")
-            }
-            yield f"data: {json.dumps({'status': 'complete', 'article': final_data})}\n\n"
-            
+            async with batch_semaphore:
+                event = await analyse_article(state)
+            return [
+                {"id": article_id, "status": "complete", "article": {**event["article"], "id": article_id}, "cached": event.get("cached", False)}
+                for article_id in ids
+            ], event.get("usage")
         except Exception as e:
             status_code, detail = handle_ai_error(e)
-            # For streaming, we yield the error structure
-            yield f"data: {json.dumps({'status': 'error', 'error_code': detail.get('error_code'), 'message': detail.get('message')})}\n\n"
+            return [
+                {"id": article_id, "status": "error", **detail}
+                for article_id in ids
+            ], None
+
+    def encode(item: dict) -> str:
+        if stream_format == "sse":
+            return f"data: {json.dumps(item)}\n\n"
+        return json.dumps(item) + "\n"
+
+    async def result_generator():
+        for item in cached_results:
+            yield encode(item)
+
+        # Bulk analysis queues behind interactive requests for LLM slots
+        with priority_scope(llm_priority(current_user.is_premium, interactive=False)):
+            tasks = [asyncio.create_task(run_one(state, ids)) for state, ids in pending.values()]
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                items, usage = await next_done
+                if items[0]["status"] == "complete" and not items[0]["cached"]:
+                    db.add(build_usage_log(current_user.id, "process_article", usage))
+                    await db.commit()
+                for item in items:
+                    yield encode(item)
+        finally:
+            # Client went away: don't keep analysing for nobody
+            for task in tasks:
+                task.cancel()
+
+    media_type = "text/event-stream" if stream_format == "sse" else "application/x-ndjson"
+    return StreamingResponse(result_generator(), media_type=media_type)
+
+@router.post("/jobs", status_code=202)
+async def submit_article_job(
+    article: ArticleContext,
+    db: AsyncSession = Depends(deps.get_db),
+    current_user: User = Depends(deps.get_current_active_user)
+) -> Any:
+    """
+    Queue AI processing for an article and return a job id.
+    Progress can be followed (and resumed) via /jobs/{job_id}/events.
+    The usage row is written at submit time, so queued jobs count towards
+    the free daily limit straight away; it is released if the job fails.
+    """
+    if not current_user.is_premium:
+        await check_ai_limit(db, current_user.id)
+
+    reservation = build_usage_log(current_user.id, "process_article", None)
+    db.add(reservation)
+    await db.commit()
+
+    initial_state = build_initial_state(
+        article.id,
+        article.title,
+        article.content or article.description or "",
+        current_user.is_premium,
+        article.category
+    )
+    try:
+        job = await job_service.submit(current_user.id, initial_state, usage_log_id=reservation.id)
+    except (JobQueueFull, TooManyJobs) as e:
+        await db.delete(reservation)
+        await db.commit()
+        if isinstance(e, TooManyJobs):
+            raise HTTPException(status_code=429, detail={"error_code": "AI_TOO_MANY_JOBS", "message": str(e)})
+        raise HTTPException(status_code=503, detail={"error_code": "AI_QUEUE_FULL", "message": str(e)})
+
+    return {"job_id": job.id, "status": job.status}
+
+def get_user_job(job_id: str, current_user: User):
+    job = job_service.get(job_id)
+    if not job or job.user_id != current_user.id:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
+
+@router.get("/jobs/{job_id}")
+async def get_article_job(
+    job_id: str,
+    current_user: User = Depends(deps.get_current_active_user)
+) -> Any:
+    """
+    Get status and result of a queued AI job.
+    """
+    return get_user_job(job_id, current_user).to_dict()
+
+@router.get("/jobs/{job_id}/events")
+async def stream_article_job(
+    job_id: str,
+    last_event_id: Optional[int] = None,
+    last_event_id_header: Optional[str] = Header(default=None, alias="Last-Event-ID"),
+    current_user: User = Depends(deps.get_current_active_user)
+) -> Any:
+    """
+    Attach to a job's progress stream (SSE).
+    Reconnecting clients resume after the `Last-Event-ID` header (or `last_event_id` query param).
+    Disconnecting does not cancel the job.
+    """
+    job = get_user_job(job_id, current_user)
+
+    cursor = last_event_id or 0
+    if last_event_id_header and last_event_id_header.isdigit():
+        cursor = int(last_event_id_header)
+
+    async def event_generator():
+        async for event_id, event in job.events.subscribe(cursor):
+            yield f"id: {event_id}\ndata: {json.dumps(event)}\n\n"
 
     return StreamingResponse(event_generator(), media_type="text/event-stream")
 
@@ -113,79 +291,91 @@ async def explain_article(
     current_user: User = Depends(deps.get_current_active_user)
 ) -> Any:
     """
-    Explain an article in specific style (Stateless).
+    Explain an article in specific style.
+    Explanations are cached per (content, style, model, prompt version);
+    cache hits do not count against the free daily AI limit.
     """
+    if style not in EXPLAIN_PROMPTS:
+        style = "eli5"
+    content = article.content or article.description or ""
+    cache_key = content_hash(content, style, f"{settings.LLM_BACKEND}:{settings.GEMINI_MODEL}", EXPLAIN_PROMPT_VERSION)
+
+    cached = await explain_cache.get(db, cache_key, label=style)
+    if cached is not None:
+        return {"explanation": cached["explanation"], "cached": True}
+
     if not current_user.is_premium:
          await check_ai_limit(db, current_user.id)
 
-    content = article.content or article.description or ""
-    
-    if style == "interview":
-        template = "Explain the following article as if you are being interviewed about it. Content: {content}"
-    else:
-        template = "Explain the following article like I am 5 years old (ELI5). Content: {content}"
-        
-    prompt = ChatPromptTemplate.from_template(template)
+    prompt = EXPLAIN_PROMPTS[style]
     
     try:
-        explanation = await call_llm_with_rotation(
-            prompt, 
-            StrOutputParser(), 
-            {"content": content}
-        )
+        with priority_scope(llm_priority(current_user.is_premium)), track_usage(f"explain_{style}") as usage:
+            explanation = await call_llm_with_rotation(
+                prompt, 
+                STR_PARSER, 
+                {"content": content}
+            )
     except Exception as e:
         status_code, detail = handle_ai_error(e)
-        raise HTTPException(status_code=status_code, detail=detail)
+        raise HTTPException(status_code=status_code, detail=detail, headers=ai_error_headers(detail))
     
-    log = AIUsageLog(
-        user_id=current_user.id,
-        action=f"explain_{style}",
-        tokens_used=500
-    )
+    await explain_cache.set(db, cache_key, {"explanation": explanation})
+    log = build_usage_log(current_user.id, f"explain_{style}", usage.to_dict())
     db.add(log)
     await db.commit()
     
-    return {"explanation": explanation}
+    return {"explanation": explanation, "cached": False}
 
 @router.post("/ask")
 async def ask_ai(
     question: str = Body(...),
     context: str = Body(default=""),
+    article_id: Optional[str] = Body(default=None),
     db: AsyncSession = Depends(deps.get_db),
     current_user: User = Depends(deps.get_current_premium_user) # Premium only
 ) -> Any:
     """
     Ask AI questions about news (Premium Only).
-    Stateless: Request must provide context.
+    Relevant passages are retrieved from the local article index, so only a
+    question is required. Optional client context is appended within the
+    remaining token budget.
     """
-    combined_context = context or ""
-    
-    prompt = ChatPromptTemplate.from_template(
-        "Answer the user's question based on the provided context.\n\nContext:\n{context}\n\nQuestion: {question}"
-    )
+    passages = retrieve(question, settings.RAG_TOP_K, article_id)
+    combined_context = build_context(passages, context or "", settings.RAG_CONTEXT_TOKEN_BUDGET)
     
     try:
-        answer = await call_llm_with_rotation(
-            prompt,
-            StrOutputParser(),
-            {"context": combined_context, "question": question}
-        )
+        with priority_scope(llm_priority(current_user.is_premium)), track_usage("ask_ai") as usage:
+            answer = await call_llm_with_rotation(
+                ASK_PROMPT,
+                STR_PARSER,
+                {"context": combined_context, "question": question}
+            )
     except Exception as e:
         status_code, detail = handle_ai_error(e)
-        raise HTTPException(status_code=status_code, detail=detail)
+        raise HTTPException(status_code=status_code, detail=detail, headers=ai_error_headers(detail))
     
-    log = AIUsageLog(
-        user_id=current_user.id,
-        action="ask_ai",
-        tokens_used=500
-    )
+    log = build_usage_log(current_user.id, "ask_ai", usage.to_dict())
     db.add(log)
     await db.commit()
     
-    return {"answer": answer}
+    sources = [
+        {"article_id": p["article_id"], "title": p["title"], "url": p["url"], "score": round(p["score"], 3)}
+        for p in passages
+    ]
+    return {"answer": answer, "sources": sources}
+
+@router.get("/metrics")
+async def get_ai_metrics(
+    current_user: User = Depends(deps.get_current_active_superuser)
+) -> Any:
+    """
+    In-process AI pipeline metrics (Superuser only).
+    """
+    return metrics.snapshot()
 
 # Helper
-async def check_ai_limit(db: AsyncSession, user_id: Any):
+async def check_ai_limit(db: AsyncSession, user_id: Any, cost: int = 1):
     from datetime import datetime, timedelta, timezone
     
     today = datetime.now(timezone.utc).replace(hour=0, minute=0, second=0, microsecond=0)
@@ -198,7 +388,7 @@ async def check_ai_limit(db: AsyncSession, user_id: Any):
     count = result.scalar()
     
     LIMIT = 5 
-    if count >= LIMIT:
+    if count + cost > LIMIT:
         raise HTTPException(status_code=429, detail={"error_code": "AI_RATE_LIMIT", "message": f"Daily AI limit reached ({LIMIT}/{LIMIT}). Upgrade to Premium for unlimited access."})
 
 @router.post("/compare")
@@ -210,43 +400,37 @@ async def compare_articles(
     """
     Compare multiple articles (Premium).
     Receives list of text contents to compare.
+    Each article is condensed into a cached digest (claims, entities, stance)
+    and the comparison runs over the digests, so it scales to dozens of articles.
     """
     if len(articles) < 2:
         raise HTTPException(status_code=400, detail="Need at least 2 articles to compare")
-            
-    combined_text = "\n\n--- Next Article ---\n\n".join(articles)
-    
-    prompt = ChatPromptTemplate.from_template(
-        "Compare and contrast the following articles. Highlight key differences and similarities.\n\n{text}"
-    )
+    if len(articles) > settings.COMPARE_MAX_ARTICLES:
+        raise HTTPException(status_code=400, detail=f"Compare limit is {settings.COMPARE_MAX_ARTICLES} articles")
     
     try:
-        comparison = await call_llm_with_rotation(
-            prompt,
-            StrOutputParser(),
-            {"text": combined_text}
-        )
+        with priority_scope(llm_priority(current_user.is_premium)), track_usage("compare") as usage:
+            result = await compare_contents(articles)
     except Exception as e:
          status_code, detail = handle_ai_error(e)
-         raise HTTPException(status_code=status_code, detail=detail)
+         raise HTTPException(status_code=status_code, detail=detail, headers=ai_error_headers(detail))
     
-    log = AIUsageLog(
-        user_id=current_user.id,
-        action="compare",
-        tokens_used=1000
-    )
+    log = build_usage_log(current_user.id, "compare", usage.to_dict())
     db.add(log)
     await db.commit()
     
-    return {"comparison": comparison}
+    return result
 
 @router.post("/feed/summary")
 async def summarize_feed(
+    deadline_ms: Optional[int] = Header(default=None, alias="X-Deadline-Ms"),
     db: AsyncSession = Depends(deps.get_db),
     current_user: User = Depends(deps.get_current_active_user)
 ) -> Any:
     """
     Generate a summary of the user's current feed (Stateless Fetching).
+    If the LLM cannot answer within the latency budget (X-Deadline-Ms), the
+    headlines are returned instead and the response is marked degraded.
     """
     from datetime import datetime, timezone
     today = datetime.now(timezone.utc).date()
@@ -266,28 +450,15 @@ async def summarize_feed(
         if cache_entry and cache_entry.summary:
             return cache_entry.summary
 
-    if settings.NEWS_MODE == "TEST":
+    # The offline fake LLM backend exercises the real pipeline instead of the canned briefing
+    if settings.NEWS_MODE == "TEST" and settings.LLM_BACKEND != "fake":
         await asyncio.sleep(2) 
         response_data = {
             "summary": "This is a mock daily briefing summary generated in TEST mode. The AI agents have analyzed the latest test headlines and identified key trends in technology and finance. The market is showing positive momentum, and new AI tools are being released rapidly. (Mock Data)"
         }
         
         if not current_user.is_premium:
-             from datetime import timedelta
-             cache_check = await db.execute(select(UserDailyCache).where(UserDailyCache.user_id == current_user.id))
-             user_cache = cache_check.scalars().first()
-             
-             if user_cache:
-                 user_cache.summary = response_data
-                 user_cache.expires_at = datetime.now(timezone.utc) + timedelta(hours=24)
-             else:
-                  user_cache = UserDailyCache(
-                      user_id=current_user.id,
-                      news_feed=None,
-                      summary=response_data,
-                      expires_at=datetime.now(timezone.utc) + timedelta(hours=24)
-                  )
-                  db.add(user_cache)
+             await store_daily_cache(db, current_user.id, summary=response_data)
              
              # Update User last refresh date
              current_user.last_summary_refresh_date = datetime.now(timezone.utc)
@@ -297,8 +468,6 @@ async def summarize_feed(
              
         return response_data
 
-    from app.services.currents import currents_service
-    
     # Prefs
     prefs = await db.execute(select(UserPreference).where(UserPreference.user_id == current_user.id))
     prefs = prefs.scalars().first()
@@ -308,45 +477,22 @@ async def summarize_feed(
         category = prefs.favorite_categories[0]
         
     try:
-        articles = await currents_service.fetch_latest_news(category=category)
-        
-        articles = articles[:5]
-        
-        if not articles:
-            return {"summary": "No news in your feed."}
-            
-        combined_content = "\n\n".join([f"Title: {a.get('title')}\nSummary: {a.get('description')}" for a in articles])
-        
-        prompt = ChatPromptTemplate.from_template(
-            "Summarize the following latest news highlights into a single cohesive daily briefing paragraph.\n\nNews:\n{news}"
-        )
-        
-        summary_text = await call_llm_with_rotation(
-            prompt,
-            StrOutputParser(),
-            {"news": combined_content}
-        )
-        
-        response_data = {"summary": summary_text}
+        # Briefings are shared by everyone with the same first category.
+        budget = resolve_budget(settings.AI_FEED_SUMMARY_DEADLINE_SECONDS, deadline_ms)
+        with deadline_scope(budget), priority_scope(llm_priority(current_user.is_premium)):
+            # Premium refreshes update the latest briefing incrementally
+            briefing = await get_briefing(db, category, refresh=current_user.is_premium)
+
+        response_data = {"summary": briefing["summary"]}
+        if briefing.get("degraded"):
+            # Don't cache the fallback as today's briefing
+            if "summary" in briefing["degraded"]:
+                response_data["degraded"] = ["summary"]
+            return response_data
         
         # Cache for Free Users
         if not current_user.is_premium:
-            from datetime import timedelta
-            
-            cache_check = await db.execute(select(UserDailyCache).where(UserDailyCache.user_id == current_user.id))
-            user_cache = cache_check.scalars().first()
-            
-            if user_cache:
-                user_cache.summary = response_data
-                user_cache.expires_at = datetime.now(timezone.utc) + timedelta(hours=24)
-            else:
-                 user_cache = UserDailyCache(
-                     user_id=current_user.id,
-                     news_feed=None,
-                     summary=response_data,
-                     expires_at=datetime.now(timezone.utc) + timedelta(hours=24)
-                 )
-                 db.add(user_cache)
+            await store_daily_cache(db, current_user.id, summary=response_data)
             
             # Update User last refresh date
             current_user.last_summary_refresh_date = datetime.now(timezone.utc)
@@ -358,21 +504,32 @@ async def summarize_feed(
         
     except Exception as e:
         status_code, detail = handle_ai_error(e)
-        raise HTTPException(status_code=status_code, detail=detail)
-            
-def handle_ai_error(e: Exception) -> tuple[int, dict]:
-    msg = str(e)
-    if "quota" in msg.lower() or "429" in msg or "resourceexhausted" in msg.lower():
-        return 429, {
-            "error_code": "AI_RATE_LIMIT",
-            "message": "AI limit reached. Please try again later."
-        }
-    if "recitation" in msg.lower() or "safety" in msg.lower():
-         return 400, {
-            "error_code": "AI_SAFETY_FILTER",
-            "message": "Content flagged by safety filters."
-         }
-    return 503, {
-        "error_code": "AI_SERVICE_ERROR",
-        "message": f"AI Error: {msg}"
-    }
+        raise HTTPException(status_code=status_code, detail=detail, headers=ai_error_headers(detail))
+
+@router.post("/feed/briefing/stream")
+async def stream_feed_briefing(
+    refresh: bool = False,
+    deadline_ms: Optional[int] = Header(default=None, alias="X-Deadline-Ms"),
+    db: AsyncSession = Depends(deps.get_db),
+    current_user: User = Depends(deps.get_current_premium_user) # Premium only
+) -> Any:
+    """
+    Briefing over all followed categories (Premium).
+    Streams one 'section' event per category as soon as it is ready, then a
+    'complete' event with the merged briefing. Sections are the shared
+    per-category briefings of the current time bucket; ?refresh=true brings
+    them up to date with the latest articles instead.
+    """
+    prefs = await db.execute(select(UserPreference).where(UserPreference.user_id == current_user.id))
+    prefs = prefs.scalars().first()
+    categories = list(dict.fromkeys(prefs.favorite_categories if prefs and prefs.favorite_categories else []))
+    categories = categories[:MAX_BRIEFING_CATEGORIES] or [None]
+
+    budget = resolve_budget(settings.AI_FEED_SUMMARY_DEADLINE_SECONDS, deadline_ms)
+
+    async def event_generator():
+        with deadline_scope(budget), priority_scope(llm_priority(current_user.is_premium)):
+            async for event in stream_multi_briefing(categories, refresh=refresh):
+                yield f"data: {json.dumps(event)}\n\n"
+
+    return StreamingResponse(event_generator(), media_type="text/event-stream")
@@ -5,12 +5,47 @@ from sqlalchemy.future import select
 from sqlalchemy import desc
 
 from app.api import deps
+from app.core.config import settings
 from app.models.news import NewsArticle
 from app.schemas.news import News as NewsSchema
 from app.services.currents import currents_service
+from app.services.daily_cache import FREE_FEED_ARTICLES, build_feed_items, store_daily_cache
 
 router = APIRouter()
 
+@router.get("/trending")
+async def get_trending(
+    window: str = "6h",
+    limit: int = 10,
+    kind: Optional[str] = None,
+    current_user: Any = Depends(deps.get_current_active_user)
+) -> Any:
+    """
+    Trending tags and categories over the last 1h, 6h or 24h (decayed counts
+    from ingested and classified articles). kind filters to "tag" or "category".
+    """
+    from app.services.ai_agents.trending import WINDOWS, trending
+
+    if window not in WINDOWS:
+        raise HTTPException(status_code=400, detail=f"window must be one of {', '.join(WINDOWS)}")
+    return {"window": window, "topics": trending.top(window, max(1, min(limit, 50)), kind)}
+
+@router.get("/{article_id}/similar")
+async def get_similar_articles(
+    article_id: str,
+    k: int = 5,
+    current_user: Any = Depends(deps.get_current_active_user)
+) -> Any:
+    """
+    Most similar recently fetched articles (precomputed neighbours, no LLM call).
+    """
+    from app.services.ai_agents.neighbours import similar_articles
+
+    results = similar_articles.similar(article_id, max(1, min(k, settings.SIMILAR_NEIGHBOURS)))
+    if results is None:
+        raise HTTPException(status_code=404, detail="Article not found in the recent news index")
+    return results
+
 @router.get("/feed", response_model=List[NewsSchema])
 @router.get("/feed", response_model=List[NewsSchema])
 async def get_news_feed(
@@ -20,17 +55,18 @@ async def get_news_feed(
     category: Optional[str] = None,
     sentiment: Optional[str] = None,
     search: Optional[str] = None,
+    collapse: bool = False,
     current_user: Any = Depends(deps.get_current_active_user)
 ) -> Any:
     """
     Get latest news articles directly from Currents API (Stateless).
     Authed only. Free users limited to 2 articles.
+    With collapse, articles covering the same story become one card listing the others in 'related'.
     """
     from app.models.news import UserPreference
     from app.models.user import User
     from app.models.daily_cache import UserDailyCache
     from datetime import datetime, timezone
-    import uuid
 
     today = datetime.now(timezone.utc).date()
 
@@ -91,85 +127,22 @@ async def get_news_feed(
         print(f"Feed fetch error: {e}")
         raw_news = []
 
-    unique_news = []
-    seen = set()
-    for item in raw_news:
-        uid = item.get("id") or item.get("url")
-        if uid and uid not in seen:
-            seen.add(uid)
-            unique_news.append(item)
-    
-    # Sort by published date descending (Mock data might not have dates, so handle safely)
-    def parse_date(x):
-        try:
-             return datetime.strptime(x.get("published"), "%Y-%m-%d %H:%M:%S %z")
-        except:
-             return datetime.min.replace(tzinfo=None) # Fallback
-
-    unique_news.sort(key=parse_date, reverse=True)
-    raw_news = unique_news
-
-    # 5. Transform to Schema
-    articles = []
-    for item in raw_news:
-        # Map fields
-        # Published at handling
-        pub_date = datetime.now()
-        if item.get("published"):
-             try:
-                # 2024-01-27 10:00:00 +0000
-                pub_date = datetime.strptime(item.get("published"), "%Y-%m-%d %H:%M:%S %z")
-             except:
-                pass
-                
-        article = NewsSchema(
-            id=item.get("id") or str(uuid.uuid4()),
-            title=item.get("title", "No Title"),
-            description=item.get("description", ""),
-            url=item.get("url", "#"),
-            image=item.get("image", None),
-            published_at=pub_date,
-            author=item.get("author", "Unknown"),
-            category=item.get("category", []),
-            # Defaults
-            sentiment=None,
-            tags=[],
-            summary_short=None,
-            summary_detail=None,
-            bias_score=None
-        )
-        articles.append(article)
+    if collapse:
+        from app.services.ai_agents.clustering import story_clusters
+        from app.services.ingestion import article_ingestion
+        # Cluster the articles just fetched before grouping them
+        await article_ingestion.drain(settings.INGEST_DRAIN_SECONDS)
+        raw_news = story_clusters.collapse(raw_news)
+
+    articles = build_feed_items(raw_news)
 
     # 6. Apply Limits (Free vs Premium)
     if isinstance(current_user, User) and not current_user.is_premium:
-         articles = articles[:2]
+         articles = articles[:FREE_FEED_ARTICLES]
          
-         # SAVE TO CACHE
-         from datetime import timedelta
-         
-         # Convert to dict for JSON storage
+         # SAVE TO CACHE (convert to dict for JSON storage)
          feed_data = [a.model_dump(mode='json') for a in articles]
-         
-         # Check if update or insert needed (we upsert logic essentially)
-         # We already queried cache_entry at top. If it exists but news_feed was empty/expired (unlikely given query), or need new.
-         # Actually we queried for *valid* cache. If we are here, valid cache didn't exist.
-         # So we check if ANY row exists to update, or create new.
-         
-         cache_check = await db.execute(select(UserDailyCache).where(UserDailyCache.user_id == current_user.id))
-         user_cache = cache_check.scalars().first()
-         
-         if user_cache:
-             user_cache.news_feed = feed_data
-             user_cache.expires_at = datetime.now(timezone.utc) + timedelta(hours=24)
-             user_cache.created_at = datetime.now(timezone.utc) # Refresh created_at
-         else:
-             user_cache = UserDailyCache(
-                 user_id=current_user.id,
-                 news_feed=feed_data,
-                 summary=None, # Keep existing or None? If new, None. 
-                 expires_at=datetime.now(timezone.utc) + timedelta(hours=24)
-             )
-             db.add(user_cache)
+         await store_daily_cache(db, current_user.id, news_feed=feed_data)
              
          # Update User's last refresh date so Frontend knows to disable button
          current_user.last_news_refresh_date = datetime.now(timezone.utc)
@@ -1,5 +1,5 @@
 from pydantic_settings import BaseSettings, SettingsConfigDict
-from typing import Optional, List
+from typing import Optional, List, Dict
 
 class Settings(BaseSettings):
     """
@@ -32,9 +32,162 @@ class Settings(BaseSettings):
     # --- AI Services ---
     GOOGLE_API_KEY: str
     GEMINI_MODEL: str = "gemini-2.5-flash"
+    LLM_BACKEND: str = "gemini"  # gemini, or fake (offline, deterministic; for benchmarks)
+    LLM_FAKE_KEYS: int = 2
+    LLM_FAKE_LATENCY_MS: float = 50.0
+    LLM_FAKE_LATENCY_JITTER_MS: float = 20.0
+    LLM_FAKE_ERROR_RATE: float = 0.0
+    LLM_FAKE_RATE_LIMIT_RATE: float = 0.0  # Share of calls failing with a 429
+    LLM_FAKE_SEED: int = 42
     CURRENTS_API_KEY: str
     NEWS_MODE: str = "TEST"
 
+    # --- Background AI Jobs ---
+    JOB_BACKEND: str = "local"  # Only "local" (in-process) is built in
+    JOB_WORKERS: int = 4
+    JOB_QUEUE_MAX_SIZE: int = 100
+    JOB_MAX_PER_USER: int = 5  # Queued or running jobs per user
+    JOB_EVENT_BUFFER_SIZE: int = 50  # Events kept per job for SSE resume
+    JOB_RETENTION_SECONDS: int = 60 * 60
+
+    # --- AI Analysis Cache / Batching ---
+    ANALYSIS_CACHE_SIZE: int = 2000
+    ANALYSIS_CACHE_TTL_SECONDS: int = 6 * 60 * 60
+    AI_BATCH_MAX_ITEMS: int = 50
+    AI_BATCH_CONCURRENCY: int = 8  # Shared by all batch requests in this process
+
+    # --- LLM Micro-batching (collector/classifier) ---
+    LLM_MICROBATCH_ENABLED: bool = False
+    LLM_MICROBATCH_WINDOW_MS: int = 20
+    LLM_MICROBATCH_MAX_ITEMS: int = 8
+    LLM_MICROBATCH_MAX_CHARS: int = 2000  # Longer articles are sent on their own
+
+    # --- Local Quality Pre-filter (collector) ---
+    QUALITY_PREFILTER_ENABLED: bool = True
+    QUALITY_REJECT_THRESHOLD: float = 0.2  # At or below: dropped without an LLM call
+    QUALITY_ACCEPT_THRESHOLD: float = 0.7  # At or above: accepted without an LLM call
+
+    # --- Local Classifier (category/sentiment) ---
+    LOCAL_CLASSIFIER_PATH: Optional[str] = None  # .npz model; LLM is always used when unset
+    LOCAL_CLASSIFIER_MIN_CONFIDENCE: float = 0.85
+    LOCAL_CLASSIFIER_SOURCE_BOOST: float = 2.0  # Log-odds added for the Currents category
+    LOCAL_CLASSIFIER_TRAINING_LOG: Optional[str] = None  # JSONL of LLM labels for offline training
+
+    # --- Content Token Budgets (per node, estimated tokens) ---
+    NODE_TOKEN_BUDGETS: Dict[str, int] = {
+        "collector": 1000,
+        "classifier": 1000,
+        "summarizer": 4000,
+        "bias": 2000,
+        "digest": 1500,  # Per article, /ai/compare map step
+        "compare": 6000,  # All digests, /ai/compare reduce step
+    }
+    DEFAULT_NODE_TOKEN_BUDGET: int = 2000
+    SUMMARY_CHUNK_CONCURRENCY: int = 4
+
+    # --- /ai/compare (map-reduce over cached per-article digests) ---
+    COMPARE_MAX_ARTICLES: int = 50
+    COMPARE_DIGEST_CONCURRENCY: int = 8
+    DIGEST_CACHE_SIZE: int = 5000
+    DIGEST_CACHE_TTL_SECONDS: int = 24 * 60 * 60
+
+    # --- /ai/explain response cache (in-memory LRU + ai_response_cache table) ---
+    EXPLAIN_CACHE_MEMORY_SIZE: int = 1000
+    EXPLAIN_CACHE_TTL_SECONDS: int = 7 * 24 * 60 * 60
+    EXPLAIN_CACHE_MAX_ROWS: int = 20000
+
+    # --- Shared feed briefings (one per category, language and time bucket) ---
+    BRIEFING_BUCKET_SECONDS: int = 60 * 60
+    BRIEFING_CACHE_MEMORY_SIZE: int = 200
+    BRIEFING_CACHE_MAX_ROWS: int = 5000
+    # Premium refreshes fold new articles into the previous briefing instead of starting over
+    BRIEFING_DELTA_TTL_SECONDS: int = 24 * 60 * 60
+    BRIEFING_DELTA_MAX_TURNOVER: float = 0.6  # Share of new articles above which it is regenerated
+    BRIEFING_MAX_DELTAS: int = 5
+
+    # --- Off-peak pre-generation of free users' daily feeds and briefings ---
+    PREWARM_ENABLED: bool = False
+    PREWARM_WINDOW_START_HOUR: int = 4  # UTC
+    PREWARM_WINDOW_MINUTES: int = 120
+    PREWARM_ACTIVE_DAYS: int = 7
+    PREWARM_LEAD_HOURS: int = 12  # Caches expiring later than this are not regenerated
+    PREWARM_MAX_USERS: int = 5000
+    PREWARM_LLM_CALLS_PER_KEY: int = 50
+
+    # --- LLM Admission Control (global, per process) ---
+    LLM_MAX_CONCURRENCY: int = 8
+    LLM_ADMISSION_QUEUE_SIZE: int = 200
+    LLM_ADMISSION_MAX_WAIT_SECONDS: float = 10.0  # Reject with 503 + Retry-After beyond this projected wait
+    LLM_PRIORITY_WEIGHTS: Dict[str, float] = {
+        "premium_interactive": 8,
+        "free_interactive": 4,
+        "premium_background": 2,
+        "free_background": 1,
+    }
+
+    # --- Graph Checkpointing (resume failed runs from the last completed node) ---
+    GRAPH_CHECKPOINT_BACKEND: str = "sqlite"  # sqlite, memory or none
+    GRAPH_CHECKPOINT_PATH: str = "graph_checkpoints.sqlite"
+    GRAPH_CHECKPOINT_TTL_SECONDS: int = 3600
+
+    # --- Ingestion of fetched articles (background, one consumer per process) ---
+    INGEST_QUEUE_SIZE: int = 100  # Fetched batches waiting; more are dropped
+    INGEST_DRAIN_SECONDS: float = 2.0  # How long /news/feed?collapse=true waits for queued batches
+
+    # --- Retrieval (/ai/ask) ---
+    RAG_INDEX_DIR: str = "article_index"  # Memory-mapped vectors + passage metadata; one writer process
+    RAG_EMBEDDING_DIM: int = 384
+    RAG_INDEX_CAPACITY: int = 50000  # Passages; oldest are overwritten beyond this
+    RAG_PASSAGE_TOKENS: int = 120
+    RAG_TOP_K: int = 5
+    RAG_CONTEXT_TOKEN_BUDGET: int = 1500
+    RAG_EXACT_SEARCH_MAX: int = 5000  # Below this many passages, search exactly instead of via LSH
+
+    # --- Story clustering (same event from several outlets) ---
+    STORY_SIMILARITY_THRESHOLD: float = 0.45  # Cosine similarity to join a story
+    STORY_MERGE_THRESHOLD: float = 0.6  # Cosine similarity between stories to merge them
+    STORY_WINDOW_HOURS: int = 48
+    STORY_MAX_STORIES: int = 20000  # Preallocated: one RAG_EMBEDDING_DIM float32 row per story
+    STORY_SHARE_ANALYSIS: bool = True  # Reuse one member's summaries and tags for the whole story
+
+    # --- Similar articles (precomputed k-nearest-neighbour lists) ---
+    SIMILAR_INDEX_CAPACITY: int = 20000  # Articles; oldest are overwritten beyond this
+    SIMILAR_NEIGHBOURS: int = 20
+    SIMILAR_REFRESH_BATCH: int = 64  # Queued articles folded in at ingestion; fewer wait for the next lookup
+
+    # --- Speculative pre-analysis of fresh articles in popular categories ---
+    SPECULATIVE_ENABLED: bool = False
+    SPECULATIVE_INTERVAL_SECONDS: int = 60
+    SPECULATIVE_PER_CATEGORY: int = 3
+    SPECULATIVE_MAX_CATEGORIES: int = 8
+    SPECULATIVE_MAX_LOAD: float = 0.5  # Share of LLM_MAX_CONCURRENCY busy above which no run starts
+    SPECULATIVE_LLM_CALLS_PER_KEY: int = 20  # Per cycle
+    SPECULATIVE_MAX_AGE_HOURS: int = 12
+    SPECULATIVE_POOL_SIZE: int = 500  # Recently fetched articles kept as candidates
+
+    # --- Persisted analysis (news_articles) ---
+    PERSIST_ARTICLES: bool = False  # Upsert fetched articles into news_articles for the analysis backfill
+    BACKFILL_BATCH_SIZE: int = 50
+
+    # --- Trending topics (count-min sketch + top-k per 1h/6h/24h window) ---
+    TRENDING_TOP_K: int = 100
+    TRENDING_SKETCH_WIDTH: int = 4096
+    TRENDING_SKETCH_DEPTH: int = 4
+    TRENDING_SNAPSHOT_PATH: str = "trending_snapshot.npz"  # Empty to disable snapshots
+    TRENDING_SNAPSHOT_SECONDS: int = 5 * 60
+
+    # --- Request Deadlines (seconds) ---
+    AI_PROCESS_DEADLINE_SECONDS: float = 20.0
+    AI_FEED_SUMMARY_DEADLINE_SECONDS: float = 15.0
+    AI_MAX_DEADLINE_SECONDS: float = 60.0  # Cap for client-supplied X-Deadline-Ms
+    # Minimum time left for a node to run its full LLM path; below it the node degrades
+    NODE_MIN_SECONDS: Dict[str, float] = {
+        "collector": 2.0,
+        "classifier": 2.0,
+        "summarizer": 5.0,
+        "bias": 4.0,
+    }
+
     # --- Blockchain / Payments (Solana) ---
     SOLANA_MODE: str = "TEST"  # TEST or REAL
     SOLANA_NETWORK: str = "devnet"  # devnet or mainnet-beta
@@ -0,0 +1,69 @@
+from collections import defaultdict, deque
+from typing import Any, Deque, Dict, Tuple
+
+
+class Metrics:
+    """
+    Minimal in-process metrics registry (per worker process).
+    Counters, gauges, rolling samples for percentiles and derived ratios.
+    """
+
+    def __init__(self, sample_size: int = 2000):
+        self.sample_size = sample_size
+        self._counters: Dict[str, float] = defaultdict(float)
+        self._gauges: Dict[str, float] = {}
+        self._samples: Dict[str, Deque[float]] = defaultdict(lambda: deque(maxlen=self.sample_size))
+        self._ratios: Dict[str, Tuple[str, str]] = {}
+
+    def incr(self, name: str, value: float = 1) -> None:
+        self._counters[name] += value
+
+    def set_gauge(self, name: str, value: float) -> None:
+        self._gauges[name] = value
+
+    def observe(self, name: str, value: float) -> None:
+        self._samples[name].append(value)
+
+    def register_ratio(self, name: str, numerator: str, denominator: str) -> None:
+        self._ratios[name] = (numerator, denominator)
+
+    def counter(self, name: str) -> float:
+        return self._counters.get(name, 0)
+
+    def percentile(self, name: str, q: float) -> float:
+        values = sorted(self._samples.get(name, ()))
+        if not values:
+            return 0.0
+        index = min(len(values) - 1, max(0, round(q / 100 * (len(values) - 1))))
+        return values[index]
+
+    def reset(self) -> None:
+        self._counters.clear()
+        self._gauges.clear()
+        self._samples.clear()
+
+    def snapshot(self) -> Dict[str, Any]:
+        ratios = {}
+        for name, (numerator, denominator) in self._ratios.items():
+            total = self._counters.get(denominator, 0)
+            ratios[name] = round(self._counters.get(numerator, 0) / total, 4) if total else None
+
+        histograms = {}
+        for name, values in self._samples.items():
+            if values:
+                histograms[name] = {
+                    "count": len(values),
+                    "p50": self.percentile(name, 50),
+                    "p95": self.percentile(name, 95),
+                    "p99": self.percentile(name, 99),
+                }
+
+        return {
+            "counters": dict(self._counters),
+            "gauges": dict(self._gauges),
+            "ratios": ratios,
+            "histograms": histograms,
+        }
+
+
+metrics = Metrics()
@@ -1,12 +1,41 @@
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
 from app.core.config import settings
 from app.api import auth, news, payments, ai
+from app.services.jobs import job_service
+from app.services.ai_agents.checkpoints import graph_checkpoints
+from app.services.daily_cache import daily_prewarmer
+from app.services.ai_agents.trending import trending
+from app.services.ai_agents.speculative import speculative_analyser
+from app.services.ingestion import article_ingestion
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    try:
+        await graph_checkpoints.prune()
+    except Exception as e:
+        print(f"Checkpoint prune failed: {e}")
+    if settings.PREWARM_ENABLED:
+        daily_prewarmer.start()
+    trending.start(settings.TRENDING_SNAPSHOT_SECONDS)
+    article_ingestion.start()
+    if settings.SPECULATIVE_ENABLED:
+        speculative_analyser.start(settings.SPECULATIVE_INTERVAL_SECONDS)
+    yield
+    await speculative_analyser.shutdown()
+    await article_ingestion.shutdown()
+    await daily_prewarmer.shutdown()
+    await trending.shutdown()
+    # Stop background AI workers
+    await job_service.shutdown()
+    await graph_checkpoints.close()
 
 app = FastAPI(
     title=settings.PROJECT_NAME,
-    openapi_url=f"{settings.API_V1_STR}/openapi.json"
+    openapi_url=f"{settings.API_V1_STR}/openapi.json",
+    lifespan=lifespan
 )
 
 # Set all CORS enabled origins
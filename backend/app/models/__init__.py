@@ -3,3 +3,4 @@ from app.models.user import User
 from app.models.news import NewsArticle, NewsCategory, UserPreference
 from app.models.payment import PaymentTransaction, Subscription, AIUsageLog
 from app.models.daily_cache import UserDailyCache
+from app.models.response_cache import AIResponseCache
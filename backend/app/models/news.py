@@ -1,6 +1,6 @@
 from typing import Optional, List
 from datetime import datetime
-from sqlalchemy import String, Boolean, DateTime, Text, ForeignKey, Table, Column, Integer, Float
+from sqlalchemy import String, Boolean, DateTime, Text, ForeignKey, Table, Column, Integer, Float, JSON
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 from sqlalchemy.sql import func
 from sqlalchemy.dialects.postgresql import ARRAY
@@ -39,6 +39,15 @@ class NewsArticle(Base):
     summary_detail: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
     bias_score: Mapped[Optional[float]] = mapped_column(Float, nullable=True)
     bias_explanation: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
+
+    quality_score: Mapped[Optional[float]] = mapped_column(Float, nullable=True)
+
+    # Incremental re-analysis: hash of the current text, and of the text/version the stored analysis is for
+    content_fingerprint: Mapped[Optional[str]] = mapped_column(String(64), index=True, nullable=True)
+    analysis_fingerprint: Mapped[Optional[str]] = mapped_column(String(64), nullable=True)
+    analysis_version: Mapped[Optional[str]] = mapped_column(String(64), index=True, nullable=True)
+    analysis_inputs: Mapped[Optional[dict]] = mapped_column(JSON, nullable=True) # node -> input fingerprint
+    analyzed_at: Mapped[Optional[datetime]] = mapped_column(DateTime(timezone=True), nullable=True)
     
     created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now())
 
@@ -25,6 +25,8 @@ class News(NewsBase):
     bias_explanation: Optional[str] = None # Premium only
     created_at: Optional[datetime] = None
     category: List[str] = [] # Changed from simple category_id
+    story_id: Optional[str] = None # Set when the feed collapses stories
+    related: List[str] = [] # Ids of other articles covering the same story
 
     model_config = ConfigDict(from_attributes=True)
 
@@ -0,0 +1,186 @@
+import asyncio
+import math
+import time
+from collections import deque
+from contextlib import asynccontextmanager, contextmanager
+from contextvars import ContextVar
+from typing import AsyncIterator, Deque, Dict, Iterator
+
+from fastapi import HTTPException
+
+from app.core.config import settings
+from app.core.metrics import metrics
+from app.services.ai_agents.deadline import DeadlineExceeded, call_timeout
+
+DEFAULT_PRIORITY = "free_interactive"
+
+# Priority class of the current request, read by call_llm_with_rotation.
+# Like the deadline it is copied into graph and batch tasks.
+_priority: ContextVar[str] = ContextVar("llm_priority", default=DEFAULT_PRIORITY)
+
+
+class AdmissionRejected(HTTPException):
+    """
+    Raised instead of queueing when the LLM queue is full or the projected
+    wait is too long. Served as 503 with a Retry-After header.
+    """
+
+    def __init__(self, retry_after: int):
+        self.retry_after = retry_after
+        super().__init__(
+            status_code=503,
+            detail={"error_code": "AI_OVERLOADED", "message": "AI service is busy. Please retry shortly.", "retry_after": retry_after},
+            headers={"Retry-After": str(retry_after)},
+        )
+
+
+def llm_priority(is_premium: bool, interactive: bool = True) -> str:
+    return f"{'premium' if is_premium else 'free'}_{'interactive' if interactive else 'background'}"
+
+
+@contextmanager
+def priority_scope(priority: str) -> Iterator[None]:
+    token = _priority.set(priority)
+    try:
+        yield
+    finally:
+        try:
+            _priority.reset(token)
+        except ValueError:
+            # Async generator finalised from another context
+            pass
+
+
+def current_priority() -> str:
+    return _priority.get()
+
+
+def is_background() -> bool:
+    # Speculative analysis, prewarm and backfill: work no user asked for yet
+    return current_priority().endswith("_background")
+
+
+class AdmissionController:
+    """
+    Global gate in front of LLM calls.
+    At most max_concurrency calls run at once; the rest wait in per-class
+    queues served by stride scheduling, so each class gets slots in
+    proportion to its weight and none is starved. Requests are rejected
+    up front when the queue is full or their projected wait exceeds
+    max_wait_seconds.
+    """
+
+    def __init__(self, max_concurrency: int, max_queue_size: int, max_wait_seconds: float, weights: Dict[str, float]):
+        self.max_concurrency = max_concurrency
+        self.max_queue_size = max_queue_size
+        self.max_wait_seconds = max_wait_seconds
+        self.weights = weights
+        self._in_flight = 0
+        self._queues: Dict[str, Deque[asyncio.Future]] = {name: deque() for name in weights}
+        self._pass: Dict[str, float] = {name: 0.0 for name in weights}
+        self._virtual_time = 0.0
+        # Moving average of how long a call holds its slot (seconds)
+        self._service_time = 1.0
+
+    @property
+    def in_flight(self) -> int:
+        return self._in_flight
+
+    def queued(self) -> int:
+        return sum(len(q) for q in self._queues.values())
+
+    def projected_wait(self, priority: str) -> float:
+        """
+        Expected wait for a new request of this class: waiters of other classes
+        count in proportion to how many slots they get per slot of this class.
+        """
+        weight = self.weights[priority]
+        ahead = sum(
+            len(queue) * min(1.0, self.weights[name] / weight)
+            for name, queue in self._queues.items()
+        )
+        return (ahead + 1) * self._service_time / self.max_concurrency
+
+    def _update_gauges(self):
+        metrics.set_gauge("admission.in_flight", self._in_flight)
+        metrics.set_gauge("admission.queue_depth", self.queued())
+        for name, queue in self._queues.items():
+            metrics.set_gauge(f"admission.queue_depth.{name}", len(queue))
+
+    async def _acquire(self, priority: str) -> None:
+        if self._in_flight < self.max_concurrency and not self.queued():
+            self._in_flight += 1
+            metrics.observe("admission.wait_ms", 0.0)
+            self._update_gauges()
+            return
+
+        wait = self.projected_wait(priority)
+        if self.queued() >= self.max_queue_size or wait > self.max_wait_seconds:
+            metrics.incr("admission.rejected")
+            metrics.incr(f"admission.rejected.{priority}")
+            raise AdmissionRejected(retry_after=max(1, math.ceil(wait)))
+
+        # Don't queue past the request deadline
+        timeout = call_timeout(None)
+        future = asyncio.get_running_loop().create_future()
+        queue = self._queues[priority]
+        if not queue:
+            # A class returning from idle starts at the current virtual time, not with banked credit
+            self._pass[priority] = max(self._pass[priority], self._virtual_time)
+        queue.append(future)
+        self._update_gauges()
+
+        start = time.monotonic()
+        try:
+            await asyncio.wait_for(future, timeout)
+        except BaseException as e:
+            if future.done() and not future.cancelled():
+                # The slot was handed over just as we gave up
+                self._release()
+            elif future in queue:
+                queue.remove(future)
+            self._update_gauges()
+            if isinstance(e, asyncio.TimeoutError):
+                raise DeadlineExceeded("Request deadline exceeded while waiting for an LLM slot")
+            raise
+        waited_ms = (time.monotonic() - start) * 1000
+        metrics.observe("admission.wait_ms", waited_ms)
+        metrics.observe(f"admission.wait_ms.{priority}", waited_ms)
+
+    def _release(self) -> None:
+        while True:
+            waiting = [name for name, queue in self._queues.items() if queue]
+            if not waiting:
+                self._in_flight -= 1
+                break
+            name = min(waiting, key=lambda n: self._pass[n])
+            future = self._queues[name].popleft()
+            if future.done():
+                continue
+            self._virtual_time = self._pass[name]
+            self._pass[name] += 1.0 / self.weights[name]
+            # Hand the slot straight to the next waiter; in_flight is unchanged
+            future.set_result(None)
+            break
+        self._update_gauges()
+
+    @asynccontextmanager
+    async def slot(self, priority: str | None = None) -> AsyncIterator[None]:
+        priority = priority or current_priority()
+        if priority not in self.weights:
+            priority = DEFAULT_PRIORITY
+        await self._acquire(priority)
+        start = time.monotonic()
+        try:
+            yield
+        finally:
+            self._service_time = 0.9 * self._service_time + 0.1 * (time.monotonic() - start)
+            self._release()
+
+
+llm_admission = AdmissionController(
+    max_concurrency=settings.LLM_MAX_CONCURRENCY,
+    max_queue_size=settings.LLM_ADMISSION_QUEUE_SIZE,
+    max_wait_seconds=settings.LLM_ADMISSION_MAX_WAIT_SECONDS,
+    weights=settings.LLM_PRIORITY_WEIGHTS,
+)
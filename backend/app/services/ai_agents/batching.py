@@ -0,0 +1,141 @@
+import asyncio
+import contextvars
+import json
+from contextlib import ExitStack
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Set, Tuple
+
+from langchain_core.output_parsers import JsonOutputParser
+from langchain_core.prompts import ChatPromptTemplate
+
+from app.core.metrics import metrics
+from app.services.ai_agents.admission import current_priority, llm_admission, priority_scope
+from app.services.ai_agents.deadline import deadline_scope, remaining
+from app.services.ai_agents.usage import add_usage_share, track_usage, usage_stage
+
+BATCH_PROMPT = ChatPromptTemplate.from_template(
+    """
+    You will receive several news articles, each marked with an id.
+    For every article, {instructions}
+    Return a JSON array with exactly one object per article.
+    Each object must include the article's "id" exactly as given.
+
+    {articles}
+    """
+)
+
+BATCH_PARSER = JsonOutputParser()
+
+
+class BatchItemMissing(Exception):
+    pass
+
+
+class MicroBatcher:
+    """
+    Collects small, compatible LLM requests for a few milliseconds (or until
+    max_items is reached) and sends them as one multi-article prompt.
+    Parsed results are scattered back to the waiting callers.
+
+    The batch call runs in its own context rather than the first caller's:
+    it takes the highest admission priority and the latest deadline of its
+    members (none if any member has none), and its token usage is split
+    evenly across the members' usage trackers.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        instructions: str,
+        invoke: Callable[..., Awaitable[Any]],
+        window_ms: int,
+        max_items: int,
+        timeout: int = 15,
+    ):
+        self.name = name
+        self.instructions = instructions
+        self.invoke = invoke
+        self.window = window_ms / 1000
+        self.max_items = max_items
+        self.timeout = timeout
+        self._pending: List[Tuple[Dict[str, str], asyncio.Future, contextvars.Context]] = []
+        self._timer: Optional[asyncio.TimerHandle] = None
+        # The event loop only keeps weak references to tasks
+        self._tasks: Set[asyncio.Task] = set()
+
+    async def submit(self, item: Dict[str, str]) -> Dict[str, Any]:
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((item, future, contextvars.copy_context()))
+
+        if len(self._pending) >= self.max_items:
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.window, self._flush)
+
+        return await future
+
+    def _flush(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        batch, self._pending = self._pending, []
+        if batch:
+            task = asyncio.create_task(self._run(batch), context=contextvars.Context())
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    @staticmethod
+    def _format_articles(batch) -> str:
+        return "\n\n".join(
+            f"--- Article id: {i} ---\nTitle: {item['title']}\nContent: {item['content']}"
+            for i, (item, _, _) in enumerate(batch)
+        )
+
+    @staticmethod
+    def _batch_scopes(batch, stack: ExitStack) -> None:
+        priorities = [ctx.run(current_priority) for _, _, ctx in batch]
+        stack.enter_context(priority_scope(max(priorities, key=lambda p: llm_admission.weights.get(p, 0))))
+        deadlines = [ctx.run(remaining) for _, _, ctx in batch]
+        if None not in deadlines:
+            stack.enter_context(deadline_scope(max(deadlines)))
+
+    async def _run(self, batch):
+        with ExitStack() as stack:
+            self._batch_scopes(batch, stack)
+            usage = stack.enter_context(track_usage())
+            stack.enter_context(usage_stage(self.name))
+            try:
+                results = await self.invoke(
+                    BATCH_PROMPT,
+                    BATCH_PARSER,
+                    {"instructions": self.instructions, "articles": self._format_articles(batch)},
+                    config={"timeout": self.timeout}
+                )
+            except Exception as e:
+                results = e
+        for i, (_, _, ctx) in enumerate(batch):
+            ctx.run(add_usage_share, usage, len(batch), i)
+
+        if isinstance(results, Exception):
+            for _, future, _ in batch:
+                if not future.done():
+                    future.set_exception(results)
+            return
+
+        by_id = {}
+        if isinstance(results, dict):
+            results = results.get("articles") or results.get("results") or [results]
+        for result in results if isinstance(results, list) else []:
+            if isinstance(result, dict) and "id" in result:
+                by_id[str(result["id"])] = result
+
+        metrics.incr(f"batching.{self.name}.batches")
+        metrics.incr(f"batching.{self.name}.items", len(batch))
+        metrics.incr(f"batching.{self.name}.parsed", len(by_id))
+        for i, (_, future, _) in enumerate(batch):
+            if future.done():
+                continue
+            if str(i) in by_id:
+                future.set_result(by_id[str(i)])
+            else:
+                future.set_exception(BatchItemMissing(f"No result for item {i} in {self.name} batch: {json.dumps(results)[:200]}"))
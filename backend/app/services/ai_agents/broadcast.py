@@ -0,0 +1,91 @@
+import asyncio
+from typing import Any, AsyncIterator, Dict, Tuple
+
+from app.core.config import settings
+from app.core.metrics import metrics
+from app.services.ai_agents.admission import is_background
+from app.services.ai_agents.errors import handle_ai_error
+from app.services.ai_agents.runner import state_cache_key, stream_article_analysis
+from app.services.jobs import EventLog
+
+metrics.register_ratio("broadcast.join_rate", "broadcast.joined", "broadcast.requests")
+
+
+class SharedRun:
+    def __init__(self, key: str):
+        self.key = key
+        self.events = EventLog(settings.JOB_EVENT_BUFFER_SIZE)
+        self.task: asyncio.Task | None = None
+
+
+class RunBroadcaster:
+    """
+    De-duplicates concurrent analyses of the same article.
+    The first request for a (content hash, premium flag) key starts the graph
+    in a background task; later requests subscribe to the same event stream
+    and get the events emitted so far replayed. The run completes even if
+    every subscriber disconnects.
+
+    The run keeps the priority and deadline of the request that started it,
+    so background callers (queued jobs) and interactive ones never share a
+    run: a click must not wait at background priority.
+    """
+
+    def __init__(self):
+        self._runs: Dict[str, SharedRun] = {}
+
+    def _get_or_start(self, initial_state: Dict[str, Any]) -> Tuple[SharedRun, bool]:
+        metrics.incr("broadcast.requests")
+        key = f"{state_cache_key(initial_state)}:{'background' if is_background() else 'interactive'}"
+        run = self._runs.get(key)
+        if run is not None:
+            metrics.incr("broadcast.joined")
+            return run, True
+
+        run = SharedRun(key)
+        self._runs[key] = run
+        run.task = asyncio.create_task(self._drive(run, initial_state))
+        return run, False
+
+    def in_flight(self) -> int:
+        return len(self._runs)
+
+    async def _drive(self, run: SharedRun, initial_state: Dict[str, Any]):
+        try:
+            async for event in stream_article_analysis(initial_state):
+                await run.events.publish(event)
+        except Exception as e:
+            status_code, detail = handle_ai_error(e)
+            await run.events.publish({"status": "error", **detail})
+        finally:
+            self._runs.pop(run.key, None)
+            await run.events.close()
+
+    async def stream(self, initial_state: Dict[str, Any]) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Progress events for this article, shared with identical in-flight requests.
+        Errors arrive as a {'status': 'error'} event rather than an exception.
+        The 'complete' event of a joined run carries shared=True so callers
+        only record usage once per graph run.
+        """
+        run, joined = self._get_or_start(initial_state)
+        async for _, event in run.events.subscribe(0):
+            if event["status"] == "complete":
+                # The run may have been started for another article id with the same content
+                event = {**event, "shared": joined, "article": {**event["article"], "id": initial_state["article_id"]}}
+            yield event
+
+    async def result(self, initial_state: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Waits for the shared run and returns its final 'complete' or 'error' event.
+        """
+        final = None
+        async for event in self.stream(initial_state):
+            if event["status"] in ("complete", "error"):
+                final = event
+        if final is None:
+            raise RuntimeError("Analysis finished without a result")
+        return final
+
+
+article_runs = RunBroadcaster()
@@ -0,0 +1,88 @@
+import re
+from typing import List
+
+from app.core.config import settings
+
+WORD_RE = re.compile(r"\S+")
+SENTENCE_RE = re.compile(r"(?<=[.!?])\s+|\n{2,}")
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    Cheap local token estimate (no tokenizer download).
+    Roughly 4 characters or 0.75 words per token for English text.
+    """
+    if not text:
+        return 0
+    return max(len(text) // 4, round(len(WORD_RE.findall(text)) * 1.3))
+
+
+def node_budget(node: str) -> int:
+    return settings.NODE_TOKEN_BUDGETS.get(node, settings.DEFAULT_NODE_TOKEN_BUDGET)
+
+
+def split_sentences(text: str) -> List[str]:
+    return [s.strip() for s in SENTENCE_RE.split(text or "") if s.strip()]
+
+
+def chunk_text(text: str, budget: int) -> List[str]:
+    """
+    Greedily packs whole sentences into chunks of at most `budget` tokens.
+    A single sentence longer than the budget is split on word boundaries,
+    and a single word longer than the budget (a URL, base64) is cut apart.
+    """
+    chunks: List[str] = []
+    current: List[str] = []
+    current_tokens = 0
+
+    def flush():
+        nonlocal current, current_tokens
+        if current:
+            chunks.append(" ".join(current))
+        current, current_tokens = [], 0
+
+    for sentence in split_sentences(text):
+        tokens = estimate_tokens(sentence)
+        if tokens > budget:
+            flush()
+            size = 0.0
+            for piece in _split_words(sentence, budget):
+                # Per-piece cost including the joining space, kept as a float so
+                # the packed chunk's estimate cannot round above the budget
+                cost = max((len(piece) + 1) / 4, 1.3)
+                if size + cost > budget:
+                    flush()
+                    size = 0.0
+                current.append(piece)
+                size += cost
+            flush()
+            continue
+        if current_tokens + tokens > budget:
+            flush()
+        current.append(sentence)
+        current_tokens += tokens
+
+    flush()
+    return chunks
+
+
+def _split_words(sentence: str, budget: int) -> List[str]:
+    size = max(1, budget * 4 - 1)
+    pieces: List[str] = []
+    for word in sentence.split():
+        if len(word) > size:
+            pieces.extend(word[i:i + size] for i in range(0, len(word), size))
+        else:
+            pieces.append(word)
+    return pieces
+
+
+def fit_to_budget(text: str, budget: int) -> str:
+    """
+    Returns the text unchanged when it fits, otherwise its leading
+    sentences up to the budget.
+    """
+    if estimate_tokens(text) <= budget:
+        return text
+    chunks = chunk_text(text, budget)
+    return chunks[0] if chunks else ""
@@ -0,0 +1,194 @@
+import asyncio
+import uuid
+from datetime import datetime, timezone
+from typing import Any, Dict, Optional, Tuple
+
+from app.core.config import settings
+from app.core.metrics import metrics
+from app.services.ai_agents.graph import create_news_processing_graph
+
+
+class GraphCheckpoints:
+    """
+    Owns the LangGraph checkpointer and the checkpointed news graph.
+    Every run checkpoints into its own thread ("<content key>:<uuid>"), so
+    runs of the same article in flight together (a click, a batch, the
+    speculative worker, another worker process) never share state. A run
+    that fails or is interrupted leaves a resume pointer under its content
+    key; the next run of that content claims the pointer, so exactly one
+    retry resumes after the last completed node instead of repeating LLM
+    calls that already succeeded. Checkpoints older than
+    GRAPH_CHECKPOINT_TTL_SECONDS are discarded rather than resumed, and
+    completed runs are removed straight away (their result lives in the
+    analysis cache). With the sqlite backend the pointers live in the same
+    database, so they are shared between worker processes.
+    """
+
+    def __init__(self, backend: str, path: str, ttl_seconds: int):
+        self.backend = backend.lower()
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        self._conn = None
+        self._saver = None
+        self._graph = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._lock: Optional[asyncio.Lock] = None
+        # In-memory resume pointers (memory backend): content key -> (thread id, created at)
+        self._pointers: Dict[str, Tuple[str, str]] = {}
+
+    @property
+    def enabled(self) -> bool:
+        return self.backend != "none"
+
+    async def _build_saver(self):
+        if self.backend == "memory":
+            from langgraph.checkpoint.memory import InMemorySaver
+            return InMemorySaver()
+        if self.backend == "sqlite":
+            # Optional dependency: langgraph-checkpoint-sqlite (pulls in aiosqlite)
+            import aiosqlite
+            from langgraph.checkpoint.sqlite.aio import AsyncSqliteSaver
+            self._conn = await aiosqlite.connect(self.path)
+            saver = AsyncSqliteSaver(self._conn)
+            await saver.setup()
+            await self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS resume_pointers (content_key TEXT PRIMARY KEY, thread_id TEXT NOT NULL, created_at TEXT NOT NULL)"
+            )
+            await self._conn.commit()
+            return saver
+        raise ValueError(f"Unsupported GRAPH_CHECKPOINT_BACKEND: {self.backend}")
+
+    async def get_graph(self):
+        """
+        The checkpointed graph, built on first use in the running event loop.
+        """
+        loop = asyncio.get_running_loop()
+        if self._graph is not None and self._loop is loop:
+            return self._graph
+        if self._lock is None or self._loop is not loop:
+            # A new event loop (tests, scripts): the old connection's worker thread must not outlive it
+            await self.close()
+            self._lock = asyncio.Lock()
+            self._loop = loop
+        async with self._lock:
+            if self._graph is None:
+                self._saver = await self._build_saver()
+                self._graph = create_news_processing_graph(checkpointer=self._saver)
+        return self._graph
+
+    @staticmethod
+    def run_config(run_id: str) -> Dict[str, Any]:
+        return {"configurable": {"thread_id": run_id}}
+
+    def _expired(self, created_at: Optional[str]) -> bool:
+        if not created_at:
+            return True
+        age = datetime.now(timezone.utc) - datetime.fromisoformat(created_at)
+        return age.total_seconds() > self.ttl_seconds
+
+    async def _claim_pointer(self, content_key: str) -> Optional[str]:
+        # Atomic take, so two retries of the same content never resume one thread
+        if self._conn is not None:
+            async with self._conn.execute(
+                "DELETE FROM resume_pointers WHERE content_key = ? RETURNING thread_id", (content_key,)
+            ) as cursor:
+                row = await cursor.fetchone()
+            await self._conn.commit()
+            return row[0] if row else None
+        pointer = self._pointers.pop(content_key, None)
+        return pointer[0] if pointer else None
+
+    async def _set_pointer(self, content_key: str, thread_id: str) -> None:
+        created_at = datetime.now(timezone.utc).isoformat()
+        if self._conn is not None:
+            await self._conn.execute(
+                "INSERT OR REPLACE INTO resume_pointers (content_key, thread_id, created_at) VALUES (?, ?, ?)",
+                (content_key, thread_id, created_at),
+            )
+            await self._conn.commit()
+        else:
+            self._pointers[content_key] = (thread_id, created_at)
+
+    async def prepare(self, content_key: str) -> Tuple[Any, Dict[str, Any], str, Optional[Dict[str, Any]]]:
+        """
+        Returns (graph, config, run_id, resumed_values).
+        When an interrupted run of this content is waiting within the TTL,
+        its thread is claimed: run_id is that thread and resumed_values its
+        saved state, and the caller streams with None as input to resume.
+        Otherwise run_id is a new thread of its own and resumed_values None.
+        Pass run_id to finish() when the run ends.
+        """
+        graph = await self.get_graph()
+        claimed = await self._claim_pointer(content_key)
+        if claimed is not None:
+            config = self.run_config(claimed)
+            snapshot = await graph.aget_state(config)
+            if snapshot.values and snapshot.next and not self._expired(snapshot.created_at):
+                metrics.incr("checkpoint.resumed")
+                return graph, config, claimed, dict(snapshot.values)
+            # Finished or stale: nothing to resume
+            await self._saver.adelete_thread(claimed)
+        run_id = f"{content_key}:{uuid.uuid4().hex}"
+        return graph, self.run_config(run_id), run_id, None
+
+    async def finish(self, content_key: str, run_id: str, completed: bool) -> None:
+        """
+        Ends a run: a completed run's checkpoints are deleted, an unfinished
+        one is left for the next run of the same content to resume (replacing
+        any older unclaimed run).
+        """
+        if self._saver is None:
+            return
+        if completed:
+            await self._saver.adelete_thread(run_id)
+            return
+        previous = await self._claim_pointer(content_key)
+        if previous is not None and previous != run_id:
+            await self._saver.adelete_thread(previous)
+        await self._set_pointer(content_key, run_id)
+
+    async def prune(self) -> int:
+        """
+        Deletes checkpoints of runs that were never retried within the TTL.
+        """
+        if not self.enabled:
+            return 0
+        await self.get_graph()
+        latest: Dict[str, str] = {}
+        async for item in self._saver.alist(None):
+            thread_id = item.config["configurable"]["thread_id"]
+            ts = item.checkpoint["ts"]
+            if ts > latest.get(thread_id, ""):
+                latest[thread_id] = ts
+        stale = [thread_id for thread_id, ts in latest.items() if self._expired(ts)]
+        for thread_id in stale:
+            await self._saver.adelete_thread(thread_id)
+        # Pointers to pruned threads would only be claimed and dropped later
+        cutoff = datetime.fromtimestamp(datetime.now(timezone.utc).timestamp() - self.ttl_seconds, timezone.utc).isoformat()
+        if self._conn is not None:
+            await self._conn.execute("DELETE FROM resume_pointers WHERE created_at < ?", (cutoff,))
+            await self._conn.commit()
+        else:
+            self._pointers = {key: pointer for key, pointer in self._pointers.items() if pointer[1] >= cutoff}
+        if stale:
+            print(f"Pruned {len(stale)} expired graph checkpoints")
+        return len(stale)
+
+    async def close(self) -> None:
+        """
+        Closes the sqlite connection. Called from the app lifespan; scripts
+        and test sessions that skip the lifespan must call it themselves,
+        or the connection's worker thread keeps the process alive.
+        """
+        if self._conn is not None:
+            await self._conn.close()
+        self._conn = None
+        self._saver = None
+        self._graph = None
+
+
+graph_checkpoints = GraphCheckpoints(
+    settings.GRAPH_CHECKPOINT_BACKEND,
+    settings.GRAPH_CHECKPOINT_PATH,
+    settings.GRAPH_CHECKPOINT_TTL_SECONDS,
+)
@@ -0,0 +1,311 @@
+import heapq
+import itertools
+import threading
+import time
+from collections import defaultdict
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+import numpy as np
+
+from app.core.config import settings
+from app.core.metrics import metrics
+from app.services.ai_agents.cache import TTLCache
+from app.services.ai_agents.retrieval import embedder
+
+
+def published_ts(article: Dict[str, Any]) -> float:
+    try:
+        # 2024-01-27 10:00:00 +0000
+        return datetime.strptime(article.get("published"), "%Y-%m-%d %H:%M:%S %z").timestamp()
+    except Exception:
+        return time.time()
+
+
+class Story:
+    __slots__ = ("id", "slot", "members", "title")
+
+    def __init__(self, story_id: str, slot: int, article_id: str, title: str):
+        self.id = story_id
+        self.slot = slot
+        self.members: List[str] = [article_id]
+        self.title = title
+
+
+class StoryClusterer:
+    """
+    Online clustering of ingested articles into stories (one news event
+    covered by several outlets).
+
+    Each article joins the most similar story (cosine similarity of its
+    title + description embedding to the story centroid) whose time span is
+    within window_seconds of the article, or starts a new one. After a
+    story grows, it is merged into any other story whose centroid is now
+    closer than merge_threshold. Merged story ids keep resolving to the
+    surviving story. Per process and in memory; the oldest stories are
+    dropped beyond max_stories. Thread-safe, as ingestion runs in a worker
+    thread.
+
+    Story vector sums, norms and time spans live in preallocated arrays
+    indexed by slot, and stories are listed in time buckets one window
+    wide, so a fetched batch is scored against the stories near its
+    timestamps with one matrix product. Eviction pops a heap ordered by
+    last article time.
+    """
+
+    def __init__(self, threshold: float, merge_threshold: float, window_seconds: float, max_stories: int):
+        self.embedder = embedder
+        self.threshold = threshold
+        self.merge_threshold = merge_threshold
+        self.window_seconds = window_seconds
+        self.max_stories = max_stories
+        self.stories: Dict[str, Story] = {}
+        self.article_story: Dict[str, str] = {}
+        self._merged_into: Dict[str, str] = {}
+        # Surviving story id -> ids merged into it, so dropping it drops their links
+        self._absorbed: Dict[str, List[str]] = {}
+        self._ids = itertools.count(1)
+        self._lock = threading.RLock()
+
+        # One spare slot: a new story is added before the oldest is dropped
+        slots = max_stories + 1
+        self._sums = np.zeros((slots, self.embedder.dim), dtype=np.float32)
+        self._norms = np.ones(slots, dtype=np.float32)
+        self._first_ts = np.zeros(slots, dtype=np.float64)
+        self._last_ts = np.zeros(slots, dtype=np.float64)
+        self._slot_story: List[Optional[Story]] = [None] * slots
+        self._free_slots = list(range(slots - 1, -1, -1))
+        self._bucket_seconds = max(window_seconds, 1.0)
+        self._buckets: Dict[int, Set[int]] = defaultdict(set)
+        # (last article time, story id); entries of merged or grown stories are skipped when popped
+        self._by_age: List[Tuple[float, str]] = []
+        # Slots created, grown or freed since the current batch was scored
+        self._touched = np.zeros(slots, dtype=bool)
+
+    def __len__(self) -> int:
+        return len(self.stories)
+
+    def _resolve(self, story_id: str) -> str:
+        while story_id in self._merged_into:
+            story_id = self._merged_into[story_id]
+        return story_id
+
+    def story_of(self, article_id: str) -> Optional[str]:
+        with self._lock:
+            story_id = self.article_story.get(article_id)
+            if story_id is None:
+                return None
+            story_id = self._resolve(story_id)
+            return story_id if story_id in self.stories else None
+
+    def members(self, story_id: str) -> List[str]:
+        with self._lock:
+            story = self.stories.get(self._resolve(story_id))
+            return list(story.members) if story else []
+
+    def _bucket_range(self, first_ts: float, last_ts: float) -> range:
+        return range(int(first_ts // self._bucket_seconds), int(last_ts // self._bucket_seconds) + 1)
+
+    def _candidates(self, timestamps: Iterable[float]) -> np.ndarray:
+        # Stories within one window of a timestamp are listed in its bucket or a neighbouring one
+        slots: Set[int] = set()
+        for bucket in {int(ts // self._bucket_seconds) for ts in timestamps}:
+            for near in (bucket - 1, bucket, bucket + 1):
+                slots |= self._buckets.get(near, set())
+        return np.fromiter(sorted(slots), dtype=np.int64, count=len(slots))
+
+    def _in_window(self, slots: np.ndarray, ts: float) -> np.ndarray:
+        return (self._first_ts[slots] - self.window_seconds <= ts) & (ts <= self._last_ts[slots] + self.window_seconds)
+
+    def _scores(self, vectors: np.ndarray, slots: np.ndarray) -> np.ndarray:
+        # Cosine similarity to the story centroids (vectors are normalised)
+        return (vectors @ self._sums[slots].T) / self._norms[slots]
+
+    def _best(self, slots: np.ndarray, scores: np.ndarray):
+        if not len(slots):
+            return None, 0.0
+        best = int(np.argmax(scores))
+        return self._slot_story[int(slots[best])], float(scores[best])
+
+    def _set_span(self, story: Story, first_ts: float, last_ts: float) -> None:
+        slot = story.slot
+        old = set(self._bucket_range(self._first_ts[slot], self._last_ts[slot]))
+        for bucket in self._bucket_range(first_ts, last_ts):
+            if bucket not in old:
+                self._buckets[bucket].add(slot)
+        if last_ts != self._last_ts[slot]:
+            heapq.heappush(self._by_age, (last_ts, story.id))
+        self._first_ts[slot] = first_ts
+        self._last_ts[slot] = last_ts
+        self._touched[slot] = True
+
+    def _add_vector(self, story: Story, vector: np.ndarray) -> None:
+        self._sums[story.slot] += vector
+        norm = float(np.linalg.norm(self._sums[story.slot]))
+        self._norms[story.slot] = norm or 1.0
+        self._touched[story.slot] = True
+
+    def _new_story(self, article_id: str, vector: np.ndarray, ts: float, title: str) -> Story:
+        slot = self._free_slots.pop()
+        story = Story(f"s{next(self._ids)}", slot, article_id, title)
+        self._sums[slot] = 0.0
+        self._add_vector(story, vector)
+        self._first_ts[slot] = self._last_ts[slot] = ts
+        for bucket in self._bucket_range(ts, ts):
+            self._buckets[bucket].add(slot)
+        heapq.heappush(self._by_age, (ts, story.id))
+        self._slot_story[slot] = story
+        self.stories[story.id] = story
+        return story
+
+    def _drop(self, story: Story) -> None:
+        slot = story.slot
+        for bucket in self._bucket_range(self._first_ts[slot], self._last_ts[slot]):
+            self._buckets[bucket].discard(slot)
+            if not self._buckets[bucket]:
+                del self._buckets[bucket]
+        del self.stories[story.id]
+        self._slot_story[slot] = None
+        self._free_slots.append(slot)
+        self._touched[slot] = True
+
+    def _merge(self, keep: Story, other: Story) -> Story:
+        if len(other.members) > len(keep.members):
+            keep, other = other, keep
+        self._sums[keep.slot] += self._sums[other.slot]
+        self._norms[keep.slot] = float(np.linalg.norm(self._sums[keep.slot])) or 1.0
+        self._touched[keep.slot] = True
+        keep.members.extend(other.members)
+        first_ts = min(self._first_ts[keep.slot], self._first_ts[other.slot])
+        last_ts = max(self._last_ts[keep.slot], self._last_ts[other.slot])
+        self._drop(other)
+        self._set_span(keep, first_ts, last_ts)
+        self._merged_into[other.id] = keep.id
+        self._absorbed.setdefault(keep.id, []).extend([other.id] + self._absorbed.pop(other.id, []))
+        metrics.incr("stories.merged")
+        return keep
+
+    def add(self, article_id: str, text: str, ts: float, title: str = "") -> str:
+        """
+        Assigns one article to a story and returns the story id.
+        Articles already clustered keep their story.
+        """
+        return self._assign([(article_id, text, ts, title)])[article_id]
+
+    def add_articles(self, articles: List[Dict[str, Any]]) -> Dict[str, str]:
+        """
+        Clusters fetched Currents articles; returns article id -> story id.
+        """
+        batch = []
+        for article in articles:
+            article_id = article.get("id") or article.get("url")
+            if not article_id:
+                continue
+            text = f"{article.get('title') or ''}. {article.get('description') or ''}"
+            batch.append((article_id, text, published_ts(article), article.get("title") or ""))
+        return self._assign(batch)
+
+    def _assign(self, batch: List[Tuple[str, str, float, str]]) -> Dict[str, str]:
+        with self._lock:
+            assigned: Dict[str, str] = {}
+            new = []
+            for article_id, text, ts, title in batch:
+                existing = self.story_of(article_id)
+                if existing is not None:
+                    assigned[article_id] = existing
+                elif article_id not in assigned:
+                    assigned[article_id] = ""
+                    new.append((article_id, text, ts, title))
+            if not new:
+                return assigned
+
+            vectors = self.embedder.embed([text for _, text, _, _ in new])
+            # Scores against the stories as they were before the batch, in one product;
+            # stories created or changed by earlier articles of the batch are rescored
+            candidates = self._candidates(ts for _, _, ts, _ in new)
+            base = self._scores(vectors, candidates) if len(candidates) else np.zeros((len(new), 0), dtype=np.float32)
+            self._touched[:] = False
+            for i, (article_id, _, ts, title) in enumerate(new):
+                keep = ~self._touched[candidates] & self._in_window(candidates, ts)
+                slots, scores = candidates[keep], base[i][keep]
+                touched = np.array([s for s in np.flatnonzero(self._touched) if self._slot_story[s] is not None], dtype=np.int64)
+                if len(touched):
+                    touched = touched[self._in_window(touched, ts)]
+                    slots = np.concatenate([slots, touched])
+                    scores = np.concatenate([scores, self._scores(vectors[i], touched)])
+                story, score = self._best(slots, scores)
+                assigned[article_id] = self._place(article_id, vectors[i], ts, title, story, score).id
+                if len(self.stories) > self.max_stories:
+                    self._prune()
+            return {article_id: self.story_of(article_id) or story_id for article_id, story_id in assigned.items()}
+
+    def _place(self, article_id: str, vector: np.ndarray, ts: float, title: str, story: Optional[Story], score: float) -> Story:
+        if story is None or score < self.threshold:
+            story = self._new_story(article_id, vector, ts, title)
+            metrics.incr("stories.created")
+        else:
+            self._add_vector(story, vector)
+            story.members.append(article_id)
+            self._set_span(story, min(self._first_ts[story.slot], ts), max(self._last_ts[story.slot], ts))
+            metrics.incr("stories.joined")
+            # The grown story may now cover another one
+            slots = self._candidates([ts])
+            slots = slots[(slots != story.slot) & self._in_window(slots, ts)]
+            centroid = self._sums[story.slot] / self._norms[story.slot]
+            other, other_score = self._best(slots, self._scores(centroid, slots))
+            if other is not None and other_score >= self.merge_threshold:
+                story = self._merge(story, other)
+        self.article_story[article_id] = story.id
+        return story
+
+    def _prune(self) -> None:
+        # Drops the stories with the oldest last article until max_stories are left
+        while len(self.stories) > self.max_stories and self._by_age:
+            last_ts, story_id = heapq.heappop(self._by_age)
+            story = self.stories.get(story_id)
+            if story is None or self._last_ts[story.slot] != last_ts:
+                continue  # Merged away, or grown since this entry was pushed
+            self._drop(story)
+            for article_id in story.members:
+                self.article_story.pop(article_id, None)
+            # Forget merge links that point at the dropped story
+            for merged_id in self._absorbed.pop(story_id, []):
+                self._merged_into.pop(merged_id, None)
+        if len(self._by_age) > 4 * (len(self.stories) + 1):
+            self._by_age = [(self._last_ts[s.slot], s.id) for s in self.stories.values()]
+            heapq.heapify(self._by_age)
+
+    def collapse(self, articles: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        One entry per story, in the order stories first appear: the first
+        article of each story with the ids of the other members in 'related'.
+        Unclustered articles pass through.
+        """
+        cards: List[Dict[str, Any]] = []
+        by_story: Dict[str, Dict[str, Any]] = {}
+        with self._lock:
+            story_ids = [self.story_of(a.get("id") or a.get("url")) if (a.get("id") or a.get("url")) else None for a in articles]
+        for article, story_id in zip(articles, story_ids):
+            article_id = article.get("id") or article.get("url")
+            if story_id is None:
+                cards.append(article)
+            elif story_id in by_story:
+                card = by_story[story_id]
+                if article_id != (card.get("id") or card.get("url")) and article_id not in card["related"]:
+                    card["related"].append(article_id)
+            else:
+                card = {**article, "story_id": story_id, "related": []}
+                by_story[story_id] = card
+                cards.append(card)
+        return cards
+
+
+story_clusters = StoryClusterer(
+    threshold=settings.STORY_SIMILARITY_THRESHOLD,
+    merge_threshold=settings.STORY_MERGE_THRESHOLD,
+    window_seconds=settings.STORY_WINDOW_HOURS * 60 * 60,
+    max_stories=settings.STORY_MAX_STORIES,
+)
+
+# Fields shared by every member of a story (runner.STORY_SHARED_FIELDS: summaries, tags): "<story id>" -> fields
+story_analysis_cache = TTLCache(settings.ANALYSIS_CACHE_SIZE, settings.ANALYSIS_CACHE_TTL_SECONDS)
@@ -0,0 +1,150 @@
+import asyncio
+import json
+from typing import Any, Dict, List
+
+from langchain_core.prompts import ChatPromptTemplate
+
+from app.core.config import settings
+from app.core.metrics import metrics
+from app.services.ai_agents.budget import estimate_tokens, fit_to_budget, node_budget, split_sentences
+from app.services.ai_agents.cache import TTLCache, content_hash
+from app.services.ai_agents.local_classifier import extract_tags
+from app.services.ai_agents.nodes import JSON_PARSER, STR_PARSER, call_llm_with_rotation
+from app.services.ai_agents.usage import usage_stage
+
+metrics.register_ratio("compare.digest_hit_rate", "compare.digest_hits", "compare.digests")
+
+DIGEST_PROMPT = ChatPromptTemplate.from_template(
+    """
+    Extract a compact digest of this news article for later comparison.
+    Return JSON with:
+    - "claims": [3-5 short factual claims the article makes]
+    - "entities": [key people, organisations and places]
+    - "stance": one sentence on the article's framing or position
+
+    Article:
+    {content}
+    """
+)
+
+COMPARE_DIGESTS_PROMPT = ChatPromptTemplate.from_template(
+    """
+    Compare and contrast the following articles using their digests.
+    Highlight key differences and similarities in claims, entities and stance,
+    and refer to articles by their number.
+
+    {digests}
+    """
+)
+
+# Digests depend only on the article text, so they are shared across users
+digest_cache = TTLCache(settings.DIGEST_CACHE_SIZE, settings.DIGEST_CACHE_TTL_SECONDS)
+_inflight: Dict[str, asyncio.Task] = {}
+
+
+def local_digest(content: str) -> Dict[str, Any]:
+    """
+    Fallback digest without the LLM: lead sentences as claims, frequent
+    capitalised terms as entities. Marked degraded and never cached.
+    """
+    return {
+        "claims": split_sentences(content)[:3],
+        "entities": [t for t in extract_tags("", content, limit=8) if t[:1].isupper()][:5],
+        "stance": "Unknown",
+        "degraded": True,
+    }
+
+
+async def _build_digest(content: str) -> Dict[str, Any]:
+    try:
+        with usage_stage("compare.digest"):
+            digest = await call_llm_with_rotation(
+                DIGEST_PROMPT,
+                JSON_PARSER,
+                {"content": fit_to_budget(content, node_budget("digest"))},
+                config={"timeout": 15}
+            )
+        return {
+            "claims": list(digest.get("claims") or [])[:5],
+            "entities": list(digest.get("entities") or [])[:8],
+            "stance": digest.get("stance") or "Unknown",
+        }
+    except Exception as e:
+        # Rate limits and overload still fail the request; anything else degrades to a local digest
+        if getattr(e, "status_code", None) in (429, 503):
+            raise
+        print(f"Digest Error: {e}")
+        return local_digest(content)
+
+
+async def get_digest(content: str) -> Dict[str, Any]:
+    """
+    Cached digest for one article. Concurrent requests for the same text
+    share one LLM call. Local fallback digests are not cached, so the next
+    request retries the LLM.
+    """
+    metrics.incr("compare.digests")
+    key = content_hash(content)
+    cached = digest_cache.get(key)
+    if cached is not None:
+        metrics.incr("compare.digest_hits")
+        return cached
+
+    task = _inflight.get(key)
+    if task is None:
+        task = asyncio.create_task(_build_digest(content))
+        _inflight[key] = task
+        task.add_done_callback(lambda _: _inflight.pop(key, None))
+    digest = await asyncio.shield(task)
+    if not digest.get("degraded"):
+        digest_cache.set(key, digest)
+    return digest
+
+
+async def get_digests(contents: List[str]) -> List[Dict[str, Any]]:
+    """
+    Map step: digests for all articles, built in parallel with bounded concurrency.
+    """
+    semaphore = asyncio.Semaphore(settings.COMPARE_DIGEST_CONCURRENCY)
+
+    async def one(content: str) -> Dict[str, Any]:
+        async with semaphore:
+            return await get_digest(content)
+
+    return await asyncio.gather(*(one(c) for c in contents))
+
+
+def format_digests(digests: List[Dict[str, Any]], budget: int) -> str:
+    """
+    Renders digests for the reduce prompt, dropping trailing claims from
+    every digest until the whole block fits the token budget.
+    """
+    max_claims = max((len(d["claims"]) for d in digests), default=0)
+    while True:
+        text = "\n\n".join(
+            f"Article {i}:\n"
+            f"Claims: {json.dumps(d['claims'][:max_claims])}\n"
+            f"Entities: {', '.join(map(str, d['entities']))}\n"
+            f"Stance: {d['stance']}"
+            for i, d in enumerate(digests, start=1)
+        )
+        if estimate_tokens(text) <= budget or max_claims <= 1:
+            return text
+        max_claims -= 1
+
+
+async def compare_contents(contents: List[str]) -> Dict[str, Any]:
+    """
+    Map-reduce comparison: per-article digests, then one comparison over them.
+    'degraded' lists "digest" when any digest is a local fallback.
+    """
+    digests = await get_digests(contents)
+    with usage_stage("compare.reduce"):
+        comparison = await call_llm_with_rotation(
+            COMPARE_DIGESTS_PROMPT,
+            STR_PARSER,
+            {"digests": format_digests(digests, node_budget("compare"))},
+            config={"timeout": 25}
+        )
+    degraded = ["digest"] if any(d.get("degraded") for d in digests) else []
+    return {"comparison": comparison, "digests": digests, "degraded": degraded}
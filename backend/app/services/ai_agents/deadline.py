@@ -0,0 +1,75 @@
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Iterator, Optional
+
+from app.core.config import settings
+
+# Absolute time.monotonic() deadline of the current request, if any.
+# Context variables are copied into tasks, so graph nodes and batch runs see it.
+_deadline: ContextVar[Optional[float]] = ContextVar("ai_deadline", default=None)
+
+
+class DeadlineExceeded(Exception):
+    pass
+
+
+def resolve_budget(default_seconds: float, requested_ms: Optional[int] = None) -> float:
+    """
+    Latency budget for a request: the client's X-Deadline-Ms when given,
+    capped by AI_MAX_DEADLINE_SECONDS, otherwise the endpoint default.
+    """
+    if requested_ms is None or requested_ms <= 0:
+        return default_seconds
+    return min(requested_ms / 1000, settings.AI_MAX_DEADLINE_SECONDS)
+
+
+@contextmanager
+def deadline_scope(seconds: float) -> Iterator[None]:
+    """
+    Sets the deadline for everything awaited inside the block.
+    An already running, tighter deadline is kept.
+    """
+    deadline = time.monotonic() + seconds
+    current = _deadline.get()
+    token = _deadline.set(deadline if current is None else min(current, deadline))
+    try:
+        yield
+    finally:
+        try:
+            _deadline.reset(token)
+        except ValueError:
+            # Async generator finalised from another context; that context never saw the value
+            pass
+
+
+def remaining() -> Optional[float]:
+    """
+    Seconds left before the deadline, or None when no deadline is set.
+    """
+    deadline = _deadline.get()
+    if deadline is None:
+        return None
+    return deadline - time.monotonic()
+
+
+def has_time_for(seconds: float) -> bool:
+    left = remaining()
+    return left is None or left >= seconds
+
+
+def node_has_time(node: str) -> bool:
+    return has_time_for(settings.NODE_MIN_SECONDS.get(node, 0.0))
+
+
+def call_timeout(default: Optional[float]) -> Optional[float]:
+    """
+    Timeout for one LLM call: the call's own timeout clipped to the time left.
+    Raises DeadlineExceeded when the budget is already spent.
+    """
+    left = remaining()
+    if left is None:
+        return default
+    if left <= 0:
+        raise DeadlineExceeded("Request deadline exceeded")
+    return left if default is None else min(default, left)
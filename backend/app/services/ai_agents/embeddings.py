@@ -0,0 +1,78 @@
+"""
+Local text embeddings for retrieval (no model download, CPU only).
+
+Signed feature hashing of word unigrams, word bigrams and character
+trigrams into a fixed-size float32 vector, log-scaled and L2-normalised so
+a dot product is cosine similarity.
+"""
+import re
+import zlib
+from typing import Dict, List, Sequence
+
+import numpy as np
+
+from app.services.ai_agents.budget import chunk_text
+from app.services.ai_agents.quality import STOPWORDS
+
+TOKEN_RE = re.compile(r"[a-z0-9][a-z0-9']+")
+
+UNIGRAM_WEIGHT = 1.0
+BIGRAM_WEIGHT = 0.5
+TRIGRAM_WEIGHT = 0.25  # Character trigrams match inflections (election/elections)
+
+
+class HashedNgramEmbedder:
+    def __init__(self, dim: int):
+        self.dim = dim
+        self._memo: Dict[str, int] = {}
+
+    def _hash(self, feature: str) -> int:
+        # crc32 is stable across processes, unlike hash(); the top bit picks the sign
+        value = self._memo.get(feature)
+        if value is None:
+            value = zlib.crc32(feature.encode("utf-8"))
+            if len(self._memo) < 500_000:
+                self._memo[feature] = value
+        return value
+
+    def _features(self, text: str):
+        tokens = [t for t in TOKEN_RE.findall((text or "").lower()) if t not in STOPWORDS]
+        features = [(t, UNIGRAM_WEIGHT) for t in tokens]
+        features += [(f"{a} {b}", BIGRAM_WEIGHT) for a, b in zip(tokens, tokens[1:])]
+        for token in tokens:
+            padded = f"#{token}#"
+            features += [(padded[i:i + 3], TRIGRAM_WEIGHT) for i in range(len(padded) - 2)]
+        return features
+
+    def embed(self, texts: Sequence[str]) -> np.ndarray:
+        matrix = np.zeros((len(texts), self.dim), dtype=np.float32)
+        for row, text in enumerate(texts):
+            features = self._features(text)
+            if not features:
+                continue
+            hashes = np.fromiter((self._hash(f) for f, _ in features), dtype=np.uint32, count=len(features))
+            weights = np.fromiter((w for _, w in features), dtype=np.float32, count=len(features))
+            signs = np.where(hashes & 0x80000000, -1.0, 1.0).astype(np.float32)
+            np.add.at(matrix[row], hashes % self.dim, weights * signs)
+        # Dampen repeated terms, keep the sign
+        np.copysign(np.log1p(np.abs(matrix)), matrix, out=matrix)
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        np.divide(matrix, norms, out=matrix, where=norms > 0)
+        return matrix
+
+    def embed_one(self, text: str) -> np.ndarray:
+        return self.embed([text])[0]
+
+
+def article_passages(article: Dict, max_tokens: int) -> List[str]:
+    """
+    Retrieval units for an article: the title plus description as one
+    passage, then sentence-aligned chunks of the body.
+    """
+    title = article.get("title") or ""
+    description = article.get("description") or ""
+    passages = [f"{title}. {description}".strip(" .")]
+    content = article.get("content") or ""
+    if content and content != description:
+        passages += chunk_text(content, max_tokens)
+    return [p for p in passages if p]
@@ -0,0 +1,32 @@
+from typing import Dict, Optional
+
+from app.services.ai_agents.admission import AdmissionRejected
+
+
+def handle_ai_error(e: Exception) -> tuple[int, dict]:
+    if isinstance(e, AdmissionRejected):
+        return e.status_code, dict(e.detail)
+    msg = str(e)
+    if "quota" in msg.lower() or "429" in msg or "resourceexhausted" in msg.lower():
+        return 429, {
+            "error_code": "AI_RATE_LIMIT",
+            "message": "AI limit reached. Please try again later."
+        }
+    if "recitation" in msg.lower() or "safety" in msg.lower():
+         return 400, {
+            "error_code": "AI_SAFETY_FILTER",
+            "message": "Content flagged by safety filters."
+         }
+    return 503, {
+        "error_code": "AI_SERVICE_ERROR",
+        "message": f"AI Error: {msg}"
+    }
+
+
+def ai_error_headers(detail: dict) -> Optional[Dict[str, str]]:
+    """
+    Headers for an HTTPException built from handle_ai_error's detail.
+    """
+    if detail.get("retry_after"):
+        return {"Retry-After": str(detail["retry_after"])}
+    return None
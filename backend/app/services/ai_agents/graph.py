@@ -1,5 +1,9 @@
+import time
+from functools import wraps
 from langgraph.graph import StateGraph, END
+from app.core.metrics import metrics
 from app.services.ai_agents.state import AgentState
+from app.services.ai_agents.usage import usage_stage
 from app.services.ai_agents.nodes import (
     collector_node,
     classifier_node,
@@ -7,17 +11,35 @@ from app.services.ai_agents.nodes import (
     bias_node
 )
 
-def create_news_processing_graph():
+# Articles scored below this by the collector are not analysed further
+QUALITY_THRESHOLD = 0.3
+
+def timed_node(name, node):
+    """
+    Records each node's wall time in the node.<name>.latency_ms histogram
+    and labels its LLM usage with the node name.
+    """
+    @wraps(node)
+    async def wrapper(state: AgentState):
+        start = time.perf_counter()
+        try:
+            with usage_stage(name):
+                return await node(state)
+        finally:
+            metrics.observe(f"node.{name}.latency_ms", (time.perf_counter() - start) * 1000)
+    return wrapper
+
+def create_news_processing_graph(checkpointer=None):
     workflow = StateGraph(AgentState)
     
     # Add nodes
-    workflow.add_node("collector", collector_node)
-    workflow.add_node("classifier", classifier_node)
-    workflow.add_node("summarizer", summarizer_node)
-    workflow.add_node("bias", bias_node)
+    workflow.add_node("collector", timed_node("collector", collector_node))
+    workflow.add_node("classifier", timed_node("classifier", classifier_node))
+    workflow.add_node("summarizer", timed_node("summarizer", summarizer_node))
+    workflow.add_node("bias", timed_node("bias", bias_node))
     
     def check_quality(state: AgentState):
-        if state["quality_score"] < 0.3:
+        if state["quality_score"] < QUALITY_THRESHOLD:
             return END
         return "classifier"
 
@@ -38,6 +60,6 @@ def create_news_processing_graph():
     
     workflow.add_edge("bias", END)
     
-    return workflow.compile()
+    return workflow.compile(checkpointer=checkpointer)
 
 news_graph = create_news_processing_graph()
@@ -0,0 +1,172 @@
+import asyncio
+import hashlib
+import json
+import random
+import re
+import time
+from abc import ABC, abstractmethod
+from typing import Any, List, Optional
+
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+
+from app.core.config import settings
+
+CATEGORIES = ["Technology", "Finance", "Politics", "Sports", "Entertainment", "Health", "Science", "World"]
+SENTIMENTS = ["Positive", "Negative", "Neutral"]
+ARTICLE_ID_RE = re.compile(r"--- Article id: (\S+) ---")
+WORD_RE = re.compile(r"[A-Za-z]{5,}")
+
+
+class LLMBackend(ABC):
+    """
+    Source of chat model clients for call_llm_with_rotation, one per API key.
+    """
+
+    @abstractmethod
+    def key_count(self) -> int:
+        pass
+
+    @abstractmethod
+    def build_client(self, index: int) -> BaseChatModel:
+        pass
+
+
+class GeminiBackend(LLMBackend):
+    def __init__(self):
+        self.api_keys = settings.GOOGLE_API_KEYS or [settings.GOOGLE_API_KEY]
+
+    def key_count(self) -> int:
+        return len(self.api_keys)
+
+    def build_client(self, index: int) -> BaseChatModel:
+        # Deferred import: langchain_google_genai is slow to import
+        from langchain_google_genai import ChatGoogleGenerativeAI
+        return ChatGoogleGenerativeAI(
+            model=settings.GEMINI_MODEL,
+            google_api_key=self.api_keys[index],
+            temperature=0,
+            convert_system_message_to_human=True,
+            request_timeout=10
+        )
+
+
+class FakeChatModel(BaseChatModel):
+    """
+    Deterministic offline chat model for benchmarks and local development.
+    Responses depend only on the prompt text and are valid JSON for each
+    graph node's schema; latency and failures are drawn from a seeded RNG.
+    """
+
+    key_index: int = 0
+    latency_ms: float = 50.0
+    latency_jitter_ms: float = 20.0
+    error_rate: float = 0.0
+    rate_limit_rate: float = 0.0
+    rng: Any = None
+
+    @property
+    def _llm_type(self) -> str:
+        return "fake-news-llm"
+
+    def _draw_latency_and_failure(self) -> float:
+        rng = self.rng or random
+        roll = rng.random()
+        if roll < self.rate_limit_rate:
+            raise Exception(f"429 Resource exhausted (fake key {self.key_index})")
+        if roll < self.rate_limit_rate + self.error_rate:
+            raise Exception("Fake LLM backend error")
+        jitter = rng.uniform(-self.latency_jitter_ms, self.latency_jitter_ms)
+        return max(0.0, self.latency_ms + jitter) / 1000
+
+    @staticmethod
+    def _respond(prompt: str) -> str:
+        seed = int(hashlib.sha256(prompt.encode("utf-8")).hexdigest()[:16], 16)
+        rng = random.Random(seed)
+        words = WORD_RE.findall(prompt.split("Title:", 1)[-1])[:40] or ["news"]
+
+        def classification():
+            return {
+                "category": rng.choice(CATEGORIES),
+                "sentiment": rng.choice(SENTIMENTS),
+                "tags": rng.sample(words, min(4, len(words))),
+            }
+
+        ids = ARTICLE_ID_RE.findall(prompt)
+        if ids and '"quality_score"' in prompt:
+            return json.dumps([{"id": i, "quality_score": round(rng.uniform(0.4, 1.0), 2), "reason": "fake"} for i in ids])
+        if ids and '"category"' in prompt:
+            return json.dumps([{"id": i, **classification()} for i in ids])
+        if '"quality_score"' in prompt:
+            return json.dumps({"quality_score": round(rng.uniform(0.4, 1.0), 2), "reason": "fake"})
+        if '"category"' in prompt:
+            return json.dumps(classification())
+        if '"summary_short"' in prompt:
+            sentence = " ".join(words[:12])
+            return json.dumps({
+                "summary_short": f"{sentence}. Summary generated offline.",
+                "summary_detail": f"{' '.join(words)}.\n\nDetailed summary generated offline.",
+            })
+        if '"claims"' in prompt:
+            return json.dumps({
+                "claims": [" ".join(words[i:i + 6]) for i in range(0, min(len(words), 18), 6)],
+                "entities": [w.capitalize() for w in words[:3]],
+                "stance": rng.choice(["Neutral report.", "Supportive framing.", "Critical framing."]),
+            })
+        if '"bias_score"' in prompt:
+            return json.dumps({"bias_score": round(rng.uniform(0.0, 0.6), 2), "bias_explanation": "Fake bias analysis."})
+        return f"Offline response about {' '.join(words[:15])}."
+
+    def _build_result(self, messages: List[BaseMessage]) -> ChatResult:
+        prompt = "\n".join(str(m.content) for m in messages)
+        content = self._respond(prompt)
+        input_tokens = max(1, len(prompt) // 4)
+        output_tokens = max(1, len(content) // 4)
+        message = AIMessage(
+            content=content,
+            usage_metadata={
+                "input_tokens": input_tokens,
+                "output_tokens": output_tokens,
+                "total_tokens": input_tokens + output_tokens,
+            },
+        )
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+    def _generate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None, run_manager=None, **kwargs) -> ChatResult:
+        time.sleep(self._draw_latency_and_failure())
+        return self._build_result(messages)
+
+    async def _agenerate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None, run_manager=None, **kwargs) -> ChatResult:
+        await asyncio.sleep(self._draw_latency_and_failure())
+        return self._build_result(messages)
+
+
+class FakeLLMBackend(LLMBackend):
+    def __init__(self):
+        self.rng = random.Random(settings.LLM_FAKE_SEED)
+
+    def key_count(self) -> int:
+        return settings.LLM_FAKE_KEYS
+
+    def build_client(self, index: int) -> BaseChatModel:
+        return FakeChatModel(
+            key_index=index,
+            latency_ms=settings.LLM_FAKE_LATENCY_MS,
+            latency_jitter_ms=settings.LLM_FAKE_LATENCY_JITTER_MS,
+            error_rate=settings.LLM_FAKE_ERROR_RATE,
+            rate_limit_rate=settings.LLM_FAKE_RATE_LIMIT_RATE,
+            rng=self.rng,
+        )
+
+
+def create_llm_backend() -> LLMBackend:
+    backend = settings.LLM_BACKEND.lower()
+    if backend == "gemini":
+        return GeminiBackend()
+    if backend == "fake":
+        return FakeLLMBackend()
+    raise ValueError(f"Unsupported LLM_BACKEND: {settings.LLM_BACKEND}")
+
+
+llm_backend = create_llm_backend()
@@ -0,0 +1,300 @@
+"""
+Lightweight local classifier for category and sentiment.
+
+Hashed unigram/bigram features with multinomial naive Bayes, scored
+vectorised over a batch with NumPy. Trained offline on articles that were
+previously labelled by the LLM classifier:
+
+    python -m app.services.ai_agents.local_classifier train labelled.jsonl model.npz
+    python -m app.services.ai_agents.local_classifier bench model.npz
+"""
+import json
+import os
+import re
+import sys
+import time
+import zlib
+from collections import Counter
+from typing import Any, Dict, Iterable, List, Optional, Sequence
+
+import numpy as np
+
+from app.core.config import settings
+
+CATEGORIES = ["Technology", "Finance", "Politics", "Sports", "Entertainment", "Health", "Science", "World"]
+SENTIMENTS = ["Positive", "Negative", "Neutral"]
+
+# Currents categories that map onto our label space
+SOURCE_CATEGORY_MAP = {
+    "technology": "Technology", "tech": "Technology", "programming": "Technology", "gadgets": "Technology",
+    "finance": "Finance", "business": "Finance", "economy": "Finance",
+    "politics": "Politics",
+    "sports": "Sports",
+    "entertainment": "Entertainment", "movie": "Entertainment", "music": "Entertainment",
+    "health": "Health", "medical": "Health",
+    "science": "Science", "environment": "Science",
+    "world": "World", "regional": "World",
+}
+
+TOKEN_RE = re.compile(r"[a-z][a-z0-9']+")
+TAG_TOKEN_RE = re.compile(r"[A-Za-z][A-Za-z0-9\-]{3,}")
+TAG_STOPWORDS = frozenset(
+    """
+    this that with from have has had will would could should their there about after before
+    over into more most also which when where what said says says while been being than then
+    they them these those just only other some such very year years news today week
+    """.split()
+)
+
+MAX_TOKENS = 96  # Title + head of the article is enough signal
+BIAS_FEATURE = 0
+
+
+class LocalClassifier:
+    def __init__(
+        self,
+        category_log_prob: np.ndarray,
+        category_prior: np.ndarray,
+        sentiment_log_prob: np.ndarray,
+        sentiment_prior: np.ndarray,
+        source_boost: float = 2.0,
+    ):
+        self.n_features = category_log_prob.shape[0]
+        self.category_log_prob = category_log_prob.astype(np.float32)
+        self.category_prior = category_prior.astype(np.float32)
+        self.sentiment_log_prob = sentiment_log_prob.astype(np.float32)
+        self.sentiment_prior = sentiment_prior.astype(np.float32)
+        self.source_boost = source_boost
+        self._feature_memo: Dict[str, int] = {}
+
+    # --- Features ---
+
+    def _feature(self, token: str) -> int:
+        # crc32 is stable across processes, unlike hash()
+        index = 1 + zlib.crc32(token.encode("utf-8")) % (self.n_features - 1)
+        if len(self._feature_memo) < 500_000:
+            self._feature_memo[token] = index
+        return index
+
+    def unigrams(self, title: str, content: str) -> List[int]:
+        tokens = TOKEN_RE.findall(f"{title or ''} {(content or '')[:1000]}".lower())[:MAX_TOKENS]
+        memo = self._feature_memo
+        try:
+            feats = [memo[t] for t in tokens]
+        except KeyError:
+            feats = [memo.get(t) or self._feature(t) for t in tokens]
+        return [BIAS_FEATURE] + feats
+
+    def _design(self, docs: Sequence[Dict[str, Any]]):
+        """
+        Returns unigram and bigram feature arrays aligned position by position,
+        plus the start offset of each doc. Bigrams are hashed from adjacent
+        unigram ids in NumPy; positions without a bigram map to the
+        all-zero bias row.
+        """
+        indices: List[int] = []
+        offsets = np.empty(len(docs), dtype=np.int64)
+        for i, doc in enumerate(docs):
+            offsets[i] = len(indices)
+            indices.extend(self.unigrams(doc.get("title", ""), doc.get("content", "")))
+
+        unigrams = np.asarray(indices, dtype=np.int64)
+        following = np.zeros_like(unigrams)
+        following[:-1] = unigrams[1:]
+        bigrams = (unigrams * 1_000_003 + following) % (self.n_features - 1) + 1
+        bigrams[offsets] = BIAS_FEATURE
+        bigrams[offsets[1:] - 1] = BIAS_FEATURE
+        bigrams[-1] = BIAS_FEATURE
+        return unigrams, bigrams, offsets
+
+    # --- Scoring ---
+
+    @staticmethod
+    def _softmax(scores: np.ndarray) -> np.ndarray:
+        scores = scores - scores.max(axis=1, keepdims=True)
+        np.exp(scores, out=scores)
+        scores /= scores.sum(axis=1, keepdims=True)
+        return scores
+
+    def predict_batch(self, docs: Sequence[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Classify many articles at once. Each doc is a dict with 'title',
+        'content' and optionally 'source_categories' (from Currents).
+        """
+        if not docs:
+            return []
+        unigrams, bigrams, offsets = self._design(docs)
+
+        # Every doc has the bias feature, so no reduceat segment is empty
+        category_rows = self.category_log_prob[unigrams] + self.category_log_prob[bigrams]
+        sentiment_rows = self.sentiment_log_prob[unigrams] + self.sentiment_log_prob[bigrams]
+        category_scores = np.add.reduceat(category_rows, offsets, axis=0) + self.category_prior
+        sentiment_scores = np.add.reduceat(sentiment_rows, offsets, axis=0) + self.sentiment_prior
+
+        for i, doc in enumerate(docs):
+            for source in doc.get("source_categories") or []:
+                label = SOURCE_CATEGORY_MAP.get(str(source).lower())
+                if label:
+                    category_scores[i, CATEGORIES.index(label)] += self.source_boost
+
+        category_probs = self._softmax(category_scores)
+        sentiment_probs = self._softmax(sentiment_scores)
+        category_idx = category_probs.argmax(axis=1)
+        sentiment_idx = sentiment_probs.argmax(axis=1)
+
+        return [
+            {
+                "category": CATEGORIES[category_idx[i]],
+                "category_confidence": float(category_probs[i, category_idx[i]]),
+                "sentiment": SENTIMENTS[sentiment_idx[i]],
+                "sentiment_confidence": float(sentiment_probs[i, sentiment_idx[i]]),
+                "tags": extract_tags(doc.get("title", ""), doc.get("content", "")),
+            }
+            for i, doc in enumerate(docs)
+        ]
+
+    def predict(self, title: str, content: str, source_categories: Optional[List[str]] = None) -> Dict[str, Any]:
+        return self.predict_batch([{"title": title, "content": content, "source_categories": source_categories}])[0]
+
+    # --- Persistence / Training ---
+
+    def save(self, path: str) -> None:
+        np.savez_compressed(
+            path,
+            category_log_prob=self.category_log_prob,
+            category_prior=self.category_prior,
+            sentiment_log_prob=self.sentiment_log_prob,
+            sentiment_prior=self.sentiment_prior,
+        )
+
+    @classmethod
+    def load(cls, path: str) -> "LocalClassifier":
+        data = np.load(path)
+        return cls(
+            data["category_log_prob"],
+            data["category_prior"],
+            data["sentiment_log_prob"],
+            data["sentiment_prior"],
+            source_boost=settings.LOCAL_CLASSIFIER_SOURCE_BOOST,
+        )
+
+    @classmethod
+    def train(cls, examples: Iterable[Dict[str, Any]], n_features: int = 2 ** 18, alpha: float = 0.5) -> "LocalClassifier":
+        """
+        Fit multinomial naive Bayes from LLM-labelled examples
+        ({"title", "content", "category", "sentiment"}).
+        """
+        empty = np.zeros((n_features, 1), dtype=np.float32)
+        featurizer = cls(empty, np.zeros(1), empty, np.zeros(1))
+
+        category_counts = np.zeros((n_features, len(CATEGORIES)), dtype=np.float64)
+        sentiment_counts = np.zeros((n_features, len(SENTIMENTS)), dtype=np.float64)
+        category_docs = np.zeros(len(CATEGORIES))
+        sentiment_docs = np.zeros(len(SENTIMENTS))
+
+        for example in examples:
+            unigrams, bigrams, _ = featurizer._design([example])
+            feats = np.concatenate([unigrams, bigrams])
+            feats = feats[feats != BIAS_FEATURE]
+            if example.get("category") in CATEGORIES:
+                c = CATEGORIES.index(example["category"])
+                np.add.at(category_counts[:, c], feats, 1)
+                category_docs[c] += 1
+            if example.get("sentiment") in SENTIMENTS:
+                s = SENTIMENTS.index(example["sentiment"])
+                np.add.at(sentiment_counts[:, s], feats, 1)
+                sentiment_docs[s] += 1
+
+        def log_probs(counts, docs):
+            counts = counts + alpha
+            log_prob = np.log(counts) - np.log(counts.sum(axis=0, keepdims=True))
+            log_prob[BIAS_FEATURE] = 0.0
+            prior = np.log((docs + 1) / (docs.sum() + len(docs)))
+            return log_prob, prior
+
+        category_log_prob, category_prior = log_probs(category_counts, category_docs)
+        sentiment_log_prob, sentiment_prior = log_probs(sentiment_counts, sentiment_docs)
+        return cls(category_log_prob, category_prior, sentiment_log_prob, sentiment_prior)
+
+
+def extract_tags(title: str, content: str, limit: int = 5) -> List[str]:
+    """
+    Keyword tags by frequency; title words count double and the first
+    casing seen for each word is kept.
+    """
+    title_tokens = TAG_TOKEN_RE.findall(title or "")
+    tokens = title_tokens + title_tokens + TAG_TOKEN_RE.findall((content or "")[:1000])
+    lowered = [t.lower() for t in tokens]
+    counts = Counter(k for k in lowered if k not in TAG_STOPWORDS)
+    forms: Dict[str, str] = {}
+    for key, token in zip(lowered, tokens):
+        forms.setdefault(key, token)
+    return [forms[key] for key, _ in counts.most_common(limit)]
+
+
+_model: Optional[LocalClassifier] = None
+_model_loaded = False
+
+
+def get_local_classifier() -> Optional[LocalClassifier]:
+    """
+    Loads the model on first use. Returns None when no model is configured.
+    """
+    global _model, _model_loaded
+    if not _model_loaded:
+        _model_loaded = True
+        path = settings.LOCAL_CLASSIFIER_PATH
+        if path and os.path.exists(path):
+            _model = LocalClassifier.load(path)
+            print(f"Loaded local classifier from {path}")
+        elif path:
+            print(f"Local classifier model not found: {path}")
+    return _model
+
+
+def record_training_example(title: str, content: str, result: Dict[str, Any]) -> None:
+    """
+    Appends an LLM classification to the training log, if configured.
+    """
+    path = settings.LOCAL_CLASSIFIER_TRAINING_LOG
+    if not path:
+        return
+    try:
+        with open(path, "a") as f:
+            f.write(json.dumps({
+                "title": title,
+                "content": content[:2000],
+                "category": result.get("category"),
+                "sentiment": result.get("sentiment"),
+            }) + "\n")
+    except OSError as e:
+        print(f"Could not write classifier training example: {e}")
+
+
+def _read_jsonl(path: str):
+    with open(path) as f:
+        for line in f:
+            if line.strip():
+                yield json.loads(line)
+
+
+if __name__ == "__main__":
+    command = sys.argv[1] if len(sys.argv) > 1 else ""
+    if command == "train" and len(sys.argv) == 4:
+        model = LocalClassifier.train(_read_jsonl(sys.argv[2]))
+        model.save(sys.argv[3])
+        print(f"Saved model to {sys.argv[3]}")
+    elif command == "bench" and len(sys.argv) == 3:
+        model = LocalClassifier.load(sys.argv[2])
+        docs = [
+            {"title": f"Stocks rally as tech earnings beat forecasts {i}",
+             "content": "Shares of major technology companies rose sharply on Tuesday after quarterly results "
+                        "beat analyst expectations, lifting the broader market to a record close. " * 2}
+            for i in range(10_000)
+        ]
+        start = time.perf_counter()
+        model.predict_batch(docs)
+        elapsed = time.perf_counter() - start
+        print(f"Scored {len(docs)} articles in {elapsed:.3f}s ({len(docs) / elapsed:,.0f}/s)")
+    else:
+        print(__doc__)
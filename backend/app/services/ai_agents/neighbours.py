@@ -0,0 +1,199 @@
+import threading
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+from app.core.config import settings
+from app.core.metrics import metrics
+from app.services.ai_agents.retrieval import article_key, embedder
+
+
+def _merge_top_k(scores_a: np.ndarray, rows_a: np.ndarray, scores_b: np.ndarray, rows_b: np.ndarray, k: int):
+    """
+    Row-wise top-k (best first) of two candidate sets of equal row count.
+    """
+    scores = np.concatenate([scores_a, scores_b], axis=1)
+    rows = np.concatenate([rows_a, rows_b], axis=1)
+    if scores.shape[1] > k:
+        keep = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+        scores = np.take_along_axis(scores, keep, axis=1)
+        rows = np.take_along_axis(rows, keep, axis=1)
+    order = np.argsort(-scores, axis=1)
+    return np.take_along_axis(scores, order, axis=1), np.take_along_axis(rows, order, axis=1)
+
+
+class NeighbourIndex:
+    """
+    Precomputed k nearest neighbours per article (cosine similarity of
+    article embeddings) for "similar articles" lookups without an LLM call.
+
+    Articles live in a ring of capacity rows; neighbour lists are int32 row
+    numbers (-1 = empty) with float32 scores, so a lookup is one row read.
+    New articles are queued and folded in by refresh(): their own lists are
+    computed against the whole index, and existing lists take them in where
+    they beat the current k-th neighbour, all as block matrix products.
+    Per process and in memory; thread-safe, as ingestion runs in a worker
+    thread.
+    """
+
+    def __init__(self, dim: int, capacity: int, k: int, block_size: int = 2048):
+        self.capacity = capacity
+        self.k = k
+        self.block_size = block_size
+        self.vectors = np.zeros((capacity, dim), dtype=np.float32)
+        self.neighbours = np.full((capacity, k), -1, dtype=np.int32)
+        self.scores = np.full((capacity, k), -np.inf, dtype=np.float32)
+        self.meta: List[Optional[Dict[str, Any]]] = [None] * capacity
+        self.rows: Dict[str, int] = {}
+        self.next_seq = 0
+        self._pending: List[int] = []
+        self._replaced: List[int] = []
+        self._lock = threading.RLock()
+
+    @property
+    def size(self) -> int:
+        return min(self.next_seq, self.capacity)
+
+    @property
+    def pending(self) -> int:
+        return len(self._pending)
+
+    def __len__(self) -> int:
+        return self.size
+
+    def __contains__(self, article_id: str) -> bool:
+        return article_id in self.rows
+
+    def add(self, article_id: str, vector: np.ndarray, meta: Dict[str, Any]) -> None:
+        with self._lock:
+            if article_id in self.rows:
+                return
+            row = self.next_seq % self.capacity
+            old = self.meta[row]
+            if old is not None:
+                del self.rows[old["id"]]
+                self._replaced.append(row)
+            self.vectors[row] = vector
+            self.neighbours[row] = -1
+            self.scores[row] = -np.inf
+            self.meta[row] = meta
+            self.rows[article_id] = row
+            self._pending.append(row)
+            self.next_seq += 1
+
+    def _forget_replaced(self) -> None:
+        # Lists pointing at overwritten rows would now name a different article
+        stale = np.isin(self.neighbours[:self.size], self._replaced)
+        rows = np.flatnonzero(stale.any(axis=1))
+        if len(rows):
+            self.neighbours[:self.size][stale] = -1
+            self.scores[:self.size][stale] = -np.inf
+            # Keep each list best first with the holes at the end
+            order = np.argsort(-self.scores[rows], axis=1, kind="stable")
+            self.scores[rows] = np.take_along_axis(self.scores[rows], order, axis=1)
+            self.neighbours[rows] = np.take_along_axis(self.neighbours[rows], order, axis=1)
+        self._replaced = []
+
+    def refresh(self) -> int:
+        """
+        Folds queued articles into the neighbour lists; returns how many.
+        """
+        with self._lock:
+            return self._refresh()
+
+    def _refresh(self) -> int:
+        if not self._pending:
+            return 0
+        if self._replaced:
+            self._forget_replaced()
+        pending = np.array(sorted(set(self._pending)), dtype=np.int32)
+        self._pending = []
+        size, k = self.size, self.k
+        new_vectors = self.vectors[pending]
+        is_pending = np.zeros(size, dtype=bool)
+        is_pending[pending] = True
+
+        # Neighbour lists of the new articles, against every block of the index
+        best_scores = np.full((len(pending), k), -np.inf, dtype=np.float32)
+        best_rows = np.full((len(pending), k), -1, dtype=np.int32)
+        for start in range(0, size, self.block_size):
+            block_rows = np.arange(start, min(start + self.block_size, size), dtype=np.int32)
+            sims = new_vectors @ self.vectors[block_rows].T
+            sims[pending[:, None] == block_rows[None, :]] = -np.inf
+            best_scores, best_rows = _merge_top_k(
+                best_scores, best_rows, sims, np.broadcast_to(block_rows, sims.shape), k
+            )
+        self.scores[pending] = best_scores
+        self.neighbours[pending] = best_rows
+
+        # Existing articles may gain the new ones as neighbours
+        for start in range(0, size, self.block_size):
+            block_rows = np.arange(start, min(start + self.block_size, size), dtype=np.int32)
+            block_rows = block_rows[~is_pending[block_rows]]
+            if not len(block_rows):
+                continue
+            sims = self.vectors[block_rows] @ new_vectors.T
+            improves = (sims > self.scores[block_rows, -1:]).any(axis=1)
+            if not improves.any():
+                continue
+            rows = block_rows[improves]
+            merged_scores, merged_rows = _merge_top_k(
+                self.scores[rows], self.neighbours[rows], sims[improves], np.broadcast_to(pending, (len(rows), len(pending))), k
+            )
+            self.scores[rows] = merged_scores
+            self.neighbours[rows] = merged_rows
+
+        metrics.incr("similar.refreshed", len(pending))
+        return len(pending)
+
+    def similar(self, article_id: str, limit: int) -> Optional[List[Dict[str, Any]]]:
+        """
+        Up to limit most similar articles, or None if the article is unknown.
+        """
+        with self._lock:
+            row = self.rows.get(article_id)
+            if row is None:
+                return None
+            if self._pending:
+                self._refresh()
+            results = []
+            for neighbour, score in zip(self.neighbours[row], self.scores[row]):
+                if neighbour < 0 or score <= 0:
+                    break
+                results.append({**self.meta[neighbour], "score": round(float(score), 4)})
+                if len(results) == limit:
+                    break
+            return results
+
+
+def article_text(article: Dict[str, Any]) -> str:
+    return " ".join(filter(None, [article.get("title"), article.get("description"), (article.get("content") or "")[:2000]]))
+
+
+def index_similar_articles(articles: List[Dict[str, Any]]) -> int:
+    """
+    Embeds new articles at ingestion and queues them for the neighbour
+    index; a large enough queue is folded in right away.
+    """
+    new = [a for a in articles if article_key(a) and article_key(a) not in similar_articles]
+    if not new:
+        return 0
+    vectors = embedder.embed([article_text(a) for a in new])
+    for article, vector in zip(new, vectors):
+        similar_articles.add(article_key(article), vector, {
+            "id": article_key(article),
+            "title": article.get("title"),
+            "url": article.get("url"),
+            "image": article.get("image"),
+            "published": article.get("published"),
+        })
+    if similar_articles.pending >= settings.SIMILAR_REFRESH_BATCH:
+        similar_articles.refresh()
+    return len(new)
+
+
+similar_articles = NeighbourIndex(
+    dim=settings.RAG_EMBEDDING_DIM,
+    capacity=settings.SIMILAR_INDEX_CAPACITY,
+    k=settings.SIMILAR_NEIGHBOURS,
+)
@@ -1,73 +1,104 @@
-import os
-from typing import Dict, Any
-from langchain_google_genai import ChatGoogleGenerativeAI
+import asyncio
+import time
+from typing import Dict, Any, Tuple
+from fastapi import HTTPException
 from langchain_core.prompts import ChatPromptTemplate
 from langchain_core.output_parsers import JsonOutputParser, StrOutputParser
 
 from app.core.config import settings
 from app.services.ai_agents.state import AgentState
-from fastapi import HTTPException
+from app.services.ai_agents.batching import MicroBatcher, BatchItemMissing
+from app.services.ai_agents.quality import score_quality
+from app.services.ai_agents.local_classifier import get_local_classifier, record_training_example
+from app.services.ai_agents.budget import chunk_text, estimate_tokens, fit_to_budget, node_budget, split_sentences
+from app.services.ai_agents.llm_backends import llm_backend
+from app.services.ai_agents.deadline import DeadlineExceeded, call_timeout, has_time_for, node_has_time, remaining
+from app.services.ai_agents.admission import is_background, llm_admission
+from app.services.ai_agents.usage import record_llm_usage
+from app.services.ai_agents.trending import trending
+from app.core.metrics import metrics
 
-import os
-import asyncio
-import random
-from typing import Dict, Any, List
-from langchain_google_genai import ChatGoogleGenerativeAI
-from langchain_core.prompts import ChatPromptTemplate
-from langchain_core.output_parsers import JsonOutputParser, StrOutputParser
+metrics.register_ratio("collector.skip_rate", "collector.local_decisions", "collector.total")
+metrics.register_ratio("classifier.local_rate", "classifier.local_decisions", "classifier.total")
 
-from app.core.config import settings
-from app.services.ai_agents.state import AgentState
+# Parsers are stateless, so one instance each is shared by every chain
+JSON_PARSER = JsonOutputParser()
+STR_PARSER = StrOutputParser()
 
-api_keys = settings.GOOGLE_API_KEYS
-if not api_keys:
-    api_keys = [settings.GOOGLE_API_KEY]
+# Bump a node's version when its prompt or output handling changes: stored
+# analyses (news_articles) re-run that node on the next backfill
+NODE_PROMPT_VERSIONS = {"collector": "1", "classifier": "1", "summarizer": "1", "bias": "1"}
 
-llm_instances = [
-    ChatGoogleGenerativeAI(
-        model=settings.GEMINI_MODEL,
-        google_api_key=key,
-        temperature=0,
-        convert_system_message_to_human=True,
-        request_timeout=10
-    ) for key in api_keys
-]
+# Gemini (or fake) clients are built on first use, one per key
+llm_instances: Dict[int, Any] = {}
 
 current_llm_index = 0
 
+def get_llm(index: int):
+    llm = llm_instances.get(index)
+    if llm is None:
+        llm = llm_backend.build_client(index)
+        llm_instances[index] = llm
+    return llm
+
 def get_current_llm():
-    global current_llm_index
-    return llm_instances[current_llm_index]
+    return get_llm(current_llm_index)
 
 def rotate_llm():
     global current_llm_index
-    current_llm_index = (current_llm_index + 1) % len(llm_instances)
+    current_llm_index = (current_llm_index + 1) % llm_backend.key_count()
     print(f"Rotating Gemini API Key to index {current_llm_index}")
 
+# (id(prompt), key index) -> (prompt, chain)
+# The prompt is kept alive by the entry so its id cannot be reused.
+# Parsing happens outside the chain so the raw message's usage metadata can be read.
+_chain_cache: Dict[Tuple[int, int], Tuple[Any, Any]] = {}
+CHAIN_CACHE_MAX_SIZE = 256
+
+def get_chain(prompt, index: int):
+    key = (id(prompt), index)
+    cached = _chain_cache.get(key)
+    if cached is not None:
+        return cached[1]
+    if len(_chain_cache) >= CHAIN_CACHE_MAX_SIZE:
+        _chain_cache.clear()
+    chain = prompt | get_llm(index)
+    _chain_cache[key] = (prompt, chain)
+    return chain
+
 async def call_llm_with_rotation(prompt, parser, input_data, config=None):
     """
     Invokes chain with rotation on 429/Quota errors.
+    Prompts and parsers should be module-level constants so their chains are reused.
+    config["timeout"] is enforced per attempt and clipped to the request deadline.
+    Each attempt first takes a slot from the global admission controller
+    (priority from admission.priority_scope); AdmissionRejected propagates.
+    Token usage and latency of the response are recorded in the active
+    usage trackers (see usage.track_usage).
     """
-    global current_llm_index
-    
-    global current_llm_index
-    
-    max_attempts = len(llm_instances) * 2
+    max_attempts = llm_backend.key_count() * 2
     
     for attempt in range(max_attempts):
+        key_index = current_llm_index
         try:
-            current_llm = get_current_llm()
-            chain = prompt | current_llm | parser
+            chain = get_chain(prompt, key_index)
             
-            return await chain.ainvoke(input_data, config=config)
+            async with llm_admission.slot():
+                # Timeout is taken after queueing so time spent waiting counts against the deadline
+                timeout = call_timeout((config or {}).get("timeout"))
+                start = time.perf_counter()
+                message = await asyncio.wait_for(chain.ainvoke(input_data, config=config), timeout=timeout)
+            record_llm_usage(message, input_data, (time.perf_counter() - start) * 1000)
+            return await parser.ainvoke(message)
             
         except Exception as e:
             msg = str(e)
             if "429" in msg or "ResourceExhausted" in msg or "quota" in msg.lower():
-                print(f"Gemini 429/Quota error (Key Index {current_llm_index}): {msg}")
+                print(f"Gemini 429/Quota error (Key Index {key_index}): {msg}")
                 rotate_llm()
                 # Optional: Add small backoff even when rotating to be safe?
-                await asyncio.sleep(0.5) 
+                left = remaining()
+                await asyncio.sleep(0.5 if left is None else max(0.0, min(0.5, left)))
                 continue
             else:
                 raise e
@@ -77,93 +108,279 @@ async def call_llm_with_rotation(prompt, parser, input_data, config=None):
         detail="AI Usage Limit Reached. Please try again later."
     )
 
+collector_batcher = MicroBatcher(
+    "collector",
+    'analyze the content for quality and relevance and give "quality_score" (0.0 to 1.0) and "reason".',
+    call_llm_with_rotation,
+    window_ms=settings.LLM_MICROBATCH_WINDOW_MS,
+    max_items=settings.LLM_MICROBATCH_MAX_ITEMS,
+    timeout=10
+)
+
+classifier_batcher = MicroBatcher(
+    "classifier",
+    'classify it and give "category" (Technology, Finance, Politics, Sports, Entertainment, Health, Science, World), '
+    '"sentiment" (Positive, Negative, Neutral) and "tags" (list of 3-5 keywords).',
+    call_llm_with_rotation,
+    window_ms=settings.LLM_MICROBATCH_WINDOW_MS,
+    max_items=settings.LLM_MICROBATCH_MAX_ITEMS,
+    timeout=15
+)
+
+async def call_llm_batched(batcher: MicroBatcher, prompt, parser, input_data, config=None):
+    """
+    Routes small requests through the micro-batcher when enabled.
+    Falls back to a single call if the batch response lacks this item.
+    """
+    if settings.LLM_MICROBATCH_ENABLED and len(input_data["content"]) <= settings.LLM_MICROBATCH_MAX_CHARS:
+        try:
+            return await batcher.submit(input_data)
+        except BatchItemMissing as e:
+            print(f"Micro-batch fallback: {e}")
+    return await call_llm_with_rotation(prompt, parser, input_data, config=config)
+
+COLLECTOR_PROMPT = ChatPromptTemplate.from_template(
+    """
+    Analyze the following news article content for quality and relevance.
+    Return a JSON with "quality_score" (0.0 to 1.0) and "reason".
+    
+    Title: {title}
+    Content: {content}
+    """
+)
+
 async def collector_node(state: AgentState) -> Dict[str, Any]:
     """
     Filters low quality content.
+    Obvious cases are decided by a local heuristic; only ambiguous ones hit the LLM.
     """
-    prompt = ChatPromptTemplate.from_template(
-        """
-        Analyze the following news article content for quality and relevance.
-        Return a JSON with "quality_score" (0.0 to 1.0) and "reason".
-        
-        Title: {title}
-        Content: {content}
-        """
-    )
+    metrics.incr("collector.total")
+    local = None
+    if settings.QUALITY_PREFILTER_ENABLED:
+        local = score_quality(state["title"], state["content"])
+        if local["confident"]:
+            metrics.incr("collector.local_decisions")
+            return {"quality_score": local["quality_score"]}
+
+    if not node_has_time("collector"):
+        # Out of budget: trust the heuristic score even when it is not confident
+        local = local or score_quality(state["title"], state["content"])
+        return {"quality_score": local["quality_score"], "degraded": ["collector"]}
+
     try:
-        result = await call_llm_with_rotation(
-            prompt, 
-            JsonOutputParser(),
-            {"title": state["title"], "content": state["content"]},
+        result = await call_llm_batched(
+            collector_batcher,
+            COLLECTOR_PROMPT,
+            JSON_PARSER,
+            {"title": state["title"], "content": fit_to_budget(state["content"], node_budget("collector"))},
             config={"timeout": 10}
         )
         return {"quality_score": result.get("quality_score", 0.5)}
+    except (HTTPException, DeadlineExceeded):
+        # Rate limited, LLM queue full or out of time: fail the run rather than
+        # letting a default score through as if the LLM had answered
+        raise
     except Exception as e:
         print(f"Collector Error: {e}")
-        return {"quality_score": 0.5}
+        return {"quality_score": 0.5, "degraded": ["collector"]}
+
+CLASSIFIER_PROMPT = ChatPromptTemplate.from_template(
+    """
+    Classify this news article.
+    Return JSON with:
+    - "category": (Technology, Finance, Politics, Sports, Entertainment, Health, Science, World)
+    - "sentiment": (Positive, Negative, Neutral)
+    - "tags": [list of 3-5 keywords]
+    
+    Title: {title}
+    Content: {content}
+    """
+)
 
 async def classifier_node(state: AgentState) -> Dict[str, Any]:
     """
     Classifies category, sentiment, and tags.
+    Uses the local model when it is confident, otherwise the LLM.
+    Results of user requests feed the trending topics tracker; background
+    runs do not, as speculative analysis picks trending categories and would
+    otherwise reinforce them.
     """
-    prompt = ChatPromptTemplate.from_template(
-        """
-        Classify this news article.
-        Return JSON with:
-        - "category": (Technology, Finance, Politics, Sports, Entertainment, Health, Science, World)
-        - "sentiment": (Positive, Negative, Neutral)
-        - "tags": [list of 3-5 keywords]
-        
-        Title: {title}
-        Content: {content}
-        """
-    )
+    result = await _classify(state)
+    if is_background():
+        return result
     try:
-        result = await call_llm_with_rotation(
-            prompt,
-            JsonOutputParser(),
-            {"title": state["title"], "content": state["content"]},
+        trending.record(state.get("article_id"), result.get("tags") or [], [result.get("category") or ""], "classifier")
+    except Exception as e:
+        print(f"Trending Error: {e}")
+    return result
+
+async def _classify(state: AgentState) -> Dict[str, Any]:
+    metrics.incr("classifier.total")
+    model = get_local_classifier()
+    local = None
+    if model is not None:
+        local = model.predict(state["title"], state["content"], state.get("source_categories"))
+        min_confidence = settings.LOCAL_CLASSIFIER_MIN_CONFIDENCE
+        if local["category_confidence"] >= min_confidence and local["sentiment_confidence"] >= min_confidence:
+            metrics.incr("classifier.local_decisions")
+            return {"category": local["category"], "sentiment": local["sentiment"], "tags": local["tags"]}
+
+    if not node_has_time("classifier"):
+        # Out of budget: use the local prediction whatever its confidence
+        if local is not None:
+            return {"category": local["category"], "sentiment": local["sentiment"], "tags": local["tags"], "degraded": ["classifier"]}
+        return {"category": "General", "sentiment": "Neutral", "tags": [], "degraded": ["classifier"]}
+
+    try:
+        result = await call_llm_batched(
+            classifier_batcher,
+            CLASSIFIER_PROMPT,
+            JSON_PARSER,
+            {"title": state["title"], "content": fit_to_budget(state["content"], node_budget("classifier"))},
             config={"timeout": 15}
         )
+        record_training_example(state["title"], state["content"], result)
         return {
             "category": result.get("category", "General"),
             "sentiment": result.get("sentiment", "Neutral"),
             "tags": result.get("tags", [])
         }
+    except (HTTPException, DeadlineExceeded):
+        raise
     except Exception as e:
         print(f"Classifier Error: {e}")
-        return {"category": "General", "sentiment": "Neutral", "tags": []}
+        return {"category": "General", "sentiment": "Neutral", "tags": [], "degraded": ["classifier"]}
+
+CHUNK_SUMMARY_PROMPT = ChatPromptTemplate.from_template(
+    """
+    Summarize this part of a longer news article in 3-4 factual sentences.
+    Keep names, numbers and quotes that matter.
+
+    Title: {title}
+    Part {part} of {parts}: {content}
+    """
+)
+
+async def condense_content(title: str, content: str, budget: int) -> str:
+    """
+    Map step for long articles: summarises sentence-aligned chunks in parallel
+    and returns the joined chunk summaries. Content under budget is returned as-is.
+    When the summaries together are still over budget each one is shortened
+    by the same share, so the end of the article is not dropped.
+    """
+    if estimate_tokens(content) <= budget:
+        return content
+
+    chunks = chunk_text(content, budget)
+    semaphore = asyncio.Semaphore(settings.SUMMARY_CHUNK_CONCURRENCY)
+
+    async def summarise_chunk(index: int, chunk: str) -> str:
+        async with semaphore:
+            try:
+                return await call_llm_with_rotation(
+                    CHUNK_SUMMARY_PROMPT,
+                    STR_PARSER,
+                    {"title": title, "part": index + 1, "parts": len(chunks), "content": chunk},
+                    config={"timeout": 25}
+                )
+            except Exception as e:
+                print(f"Chunk Summary Error (part {index + 1}): {e}")
+                return fit_to_budget(chunk, 200)
+
+    partials = await asyncio.gather(*(summarise_chunk(i, c) for i, c in enumerate(chunks)))
+    condensed = "\n\n".join(partials)
+    if estimate_tokens(condensed) > budget:
+        share = max(1, budget // len(partials) - 1)
+        condensed = "\n\n".join(fit_to_budget(p, share) for p in partials)
+    return condensed
+
+SUMMARIZER_PROMPT = ChatPromptTemplate.from_template(
+    """
+    Summarize this article.
+    Return JSON with:
+    - "summary_short": 2 sentence summary
+    - "summary_detail": 2 paragraph detailed summary
+    
+    Title: {title}
+    Content: {content}
+    """
+)
+
+SHORT_SUMMARY_PROMPT = ChatPromptTemplate.from_template(
+    """
+    Summarize this article in 2 sentences. Return only the summary text.
+    
+    Title: {title}
+    Content: {content}
+    """
+)
+
+async def short_summary(state: AgentState, content: str) -> Dict[str, Any]:
+    """
+    Degraded summarizer path: one short LLM summary, no detail and no map step.
+    """
+    degraded = ["summarizer"]
+    try:
+        summary = await call_llm_with_rotation(
+            SHORT_SUMMARY_PROMPT,
+            STR_PARSER,
+            {"title": state["title"], "content": fit_to_budget(content, node_budget("summarizer"))},
+            config={"timeout": 10}
+        )
+    except Exception as e:
+        print(f"Short Summary Error: {e}")
+        summary = " ".join(split_sentences(content)[:2]) or "Summary unavailable."
+    return {"summary_short": summary, "summary_detail": None, "degraded": degraded}
 
 async def summarizer_node(state: AgentState) -> Dict[str, Any]:
     """
     Generates summaries.
+    Long articles are condensed chunk by chunk first (map), then summarised (reduce).
+    Under deadline pressure only the short summary is produced.
     """
-    prompt = ChatPromptTemplate.from_template(
-        """
-        Summarize this article.
-        Return JSON with:
-        - "summary_short": 2 sentence summary
-        - "summary_detail": 2 paragraph detailed summary
-        
-        Title: {title}
-        Content: {content}
-        """
-    )
+    content = state.get("content", "")
+    if not node_has_time("summarizer"):
+        return await short_summary(state, content)
+
+    degraded = []
     try:
+        budget = node_budget("summarizer")
+        if estimate_tokens(content) > budget and not has_time_for(2 * settings.NODE_MIN_SECONDS["summarizer"]):
+            # No time for the map step: summarise the leading part only
+            content = fit_to_budget(content, budget)
+            degraded.append("summarizer.map")
+        content = await condense_content(state["title"], content, budget)
         result = await call_llm_with_rotation(
-            prompt,
-            JsonOutputParser(),
-            {"title": state["title"], "content": state["content"]},
+            SUMMARIZER_PROMPT,
+            JSON_PARSER,
+            {"title": state["title"], "content": content},
             config={"timeout": 25}
         )
         return {
             "summary_short": result.get("summary_short", "Summary unavailable."),
-            "summary_detail": result.get("summary_detail", state.get("content", "")[:500] + "...")
+            "summary_detail": result.get("summary_detail", content[:500] + "..."),
+            "degraded": degraded
         }
+    except (HTTPException, DeadlineExceeded):
+        # Every key is rate limited or the LLM queue is full: fail the run so a retry
+        # resumes here from the checkpoint
+        raise
     except Exception as e:
         print(f"Summarizer Error: {e}")
-        fallback = state.get("content", "")[:200] + "..."
-        return {"summary_short": "Summary unavailable.", "summary_detail": fallback}
+        fallback = content[:200] + "..."
+        return {"summary_short": "Summary unavailable.", "summary_detail": fallback, "degraded": degraded + ["summarizer"]}
+
+BIAS_PROMPT = ChatPromptTemplate.from_template(
+    """
+    Analyze the political or sensational bias of this article.
+    Return JSON with:
+    - "bias_score": 0.0 (Neutral) to 1.0 (Highly Biased)
+    - "bias_explanation": Brief explanation of the bias
+    
+    Title: {title}
+    Content: {content}
+    """
+)
 
 async def bias_node(state: AgentState) -> Dict[str, Any]:
     """
@@ -171,29 +388,24 @@ async def bias_node(state: AgentState) -> Dict[str, Any]:
     """
     if not state.get("is_premium"):
         return {"bias_score": None, "bias_explanation": "Premium feature"}
+
+    if not node_has_time("bias"):
+        # Optional stage: skipped rather than running past the deadline
+        return {"bias_score": None, "bias_explanation": "Skipped to meet the response deadline.", "degraded": ["bias"]}
         
-    prompt = ChatPromptTemplate.from_template(
-        """
-        Analyze the political or sensational bias of this article.
-        Return JSON with:
-        - "bias_score": 0.0 (Neutral) to 1.0 (Highly Biased)
-        - "bias_explanation": Brief explanation of the bias
-        
-        Title: {title}
-        Content: {content}
-        """
-    )
     try:
         result = await call_llm_with_rotation(
-            prompt,
-            JsonOutputParser(),
-            {"title": state["title"], "content": state["content"]},
+            BIAS_PROMPT,
+            JSON_PARSER,
+            {"title": state["title"], "content": fit_to_budget(state["content"], node_budget("bias"))},
             config={"timeout": 15}
         )
         return {
             "bias_score": result.get("bias_score", 0.0),
             "bias_explanation": result.get("bias_explanation", "Neutral consideration.")
         }
+    except (HTTPException, DeadlineExceeded):
+        raise
     except Exception as e:
         print(f"Bias Node Error: {e}")
-        return {"bias_score": 0.0, "bias_explanation": "Analysis unavailable."}
+        return {"bias_score": 0.0, "bias_explanation": "Analysis unavailable.", "degraded": ["bias"]}
@@ -0,0 +1,73 @@
+import re
+from typing import Any, Dict
+
+from app.core.config import settings
+
+WORD_RE = re.compile(r"[^\W\d_]+", re.UNICODE)
+SENTENCE_RE = re.compile(r"(?<=[.!?])\s+|\n+")
+
+# Common English function words; real English prose is ~30-50% stopwords
+STOPWORDS = frozenset(
+    """
+    a an the and or but if of to in on at by for with from as is are was were be been being
+    it its this that these those he she they we you i his her their our your not no so than
+    then there here has have had do does did will would can could should may might about
+    into over after before more most also which who whom what when where why how all any
+    """.split()
+)
+
+BOILERPLATE_PATTERNS = re.compile(
+    r"cookie|subscribe|sign up|sign in|log in|all rights reserved|click here|read more|"
+    r"advertisement|enable javascript|privacy policy|terms of (use|service)|newsletter|"
+    r"\[\+\d+ chars\]|follow us|share this",
+    re.IGNORECASE,
+)
+
+MIN_WORDS = 8
+FULL_LENGTH_WORDS = 40
+
+
+def _clamp(value: float) -> float:
+    return max(0.0, min(1.0, value))
+
+
+def score_quality(title: str, content: str) -> Dict[str, Any]:
+    """
+    Deterministic local quality heuristic (no LLM).
+    Combines length, English-likeness, boilerplate ratio and duplicate
+    sentence ratio into a 0-1 score. 'confident' is False for the
+    ambiguous middle band, which should be escalated to the LLM.
+    """
+    text = (content or "").strip()
+    words = WORD_RE.findall(text)
+    n_words = len(words)
+
+    if n_words == 0:
+        return {"quality_score": 0.0, "confident": True, "reason": "empty content"}
+
+    length_score = _clamp((n_words - MIN_WORDS) / (FULL_LENGTH_WORDS - MIN_WORDS))
+
+    stop_ratio = sum(1 for w in words if w.lower() in STOPWORDS) / n_words
+    language_score = _clamp(stop_ratio / 0.25)
+
+    sentences = [s.strip().lower() for s in SENTENCE_RE.split(text) if s.strip()]
+    n_sentences = max(1, len(sentences))
+    boilerplate_ratio = sum(1 for s in sentences if BOILERPLATE_PATTERNS.search(s)) / n_sentences
+    duplicate_ratio = 1 - len(set(sentences)) / n_sentences
+
+    score = (
+        0.4 * length_score
+        + 0.3 * language_score
+        + 0.15 * (1 - boilerplate_ratio)
+        + 0.15 * (1 - duplicate_ratio)
+    )
+    if boilerplate_ratio > 0.5 or duplicate_ratio > 0.5:
+        score = min(score, 0.15)
+
+    score = round(score, 3)
+    confident = score <= settings.QUALITY_REJECT_THRESHOLD or score >= settings.QUALITY_ACCEPT_THRESHOLD
+    reason = (
+        f"words={n_words} stopwords={stop_ratio:.2f} "
+        f"boilerplate={boilerplate_ratio:.2f} duplicates={duplicate_ratio:.2f}"
+    )
+    return {"quality_score": score, "confident": confident, "reason": reason}
@@ -0,0 +1,150 @@
+from datetime import datetime, timedelta, timezone
+from typing import Any, Optional
+
+from sqlalchemy import delete, func, select, update
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.metrics import metrics
+from app.models.response_cache import AIResponseCache
+from app.services.ai_agents.cache import TTLCache
+
+EVICT_EVERY_WRITES = 50  # Size/TTL eviction runs on every Nth write, not on each one
+
+
+class ResponseCache:
+    """
+    Two-tier cache for LLM responses: a per-process LRU in front of the
+    shared ai_response_cache table. Entries expire after ttl_seconds; the
+    table keeps at most max_rows per namespace, evicting the least recently
+    used. Database errors are logged and the cache degrades to memory only;
+    they never roll back or commit the caller's transaction.
+    """
+
+    def __init__(self, namespace: str, memory_size: int, ttl_seconds: int, max_rows: int):
+        self.namespace = namespace
+        self.ttl_seconds = ttl_seconds
+        self.max_rows = max_rows
+        self.memory = TTLCache(memory_size, ttl_seconds)
+        self._writes = 0
+        self._labels = set()
+
+    def _count(self, label: Optional[str], event: str) -> None:
+        prefix = f"cache.{self.namespace}" + (f".{label}" if label else "")
+        if prefix not in self._labels:
+            self._labels.add(prefix)
+            metrics.register_ratio(f"{prefix}.hit_rate", f"{prefix}.hits", f"{prefix}.lookups")
+            metrics.register_ratio(f"{prefix}.memory_hit_rate", f"{prefix}.memory_hits", f"{prefix}.lookups")
+        metrics.incr(f"{prefix}.{event}")
+
+    async def get(self, db: AsyncSession, key: str, label: Optional[str] = None) -> Optional[Any]:
+        """
+        Cached value or None. label (e.g. the explain style) splits the hit-rate metrics.
+        """
+        self._count(label, "lookups")
+        value = self.memory.get(key)
+        if value is not None:
+            self._count(label, "hits")
+            self._count(label, "memory_hits")
+            return value
+
+        now = datetime.now(timezone.utc)
+        try:
+            # Own short session on the caller's engine: the hit is recorded even
+            # when the caller never commits, and its transaction is left alone
+            async with AsyncSession(db.bind, expire_on_commit=False) as own:
+                result = await own.execute(
+                    select(AIResponseCache.value)
+                    .where(AIResponseCache.namespace == self.namespace)
+                    .where(AIResponseCache.key == key)
+                    .where(AIResponseCache.expires_at > now)
+                )
+                value = result.scalar_one_or_none()
+                if value is None:
+                    return None
+                await own.execute(
+                    update(AIResponseCache)
+                    .where(AIResponseCache.namespace == self.namespace)
+                    .where(AIResponseCache.key == key)
+                    .values(hits=AIResponseCache.hits + 1, last_used_at=now)
+                )
+                await own.commit()
+        except Exception as e:
+            print(f"Response cache read failed ({self.namespace}): {e}")
+            return None
+
+        self._count(label, "hits")
+        self.memory.set(key, value)
+        return value
+
+    async def set(self, db: AsyncSession, key: str, value: Any) -> None:
+        """
+        Stores value in both tiers. Does not commit; the caller's commit
+        persists the row. Runs in a SAVEPOINT, so a failed write only
+        discards the cache row, not the caller's pending changes.
+        """
+        self.memory.set(key, value)
+        now = datetime.now(timezone.utc)
+        try:
+            insert = postgresql.insert if db.bind.dialect.name == "postgresql" else sqlite.insert
+            statement = insert(AIResponseCache).values(
+                namespace=self.namespace,
+                key=key,
+                value=value,
+                hits=0,
+                created_at=now,
+                last_used_at=now,
+                expires_at=now + timedelta(seconds=self.ttl_seconds),
+            )
+            # Two workers missing on the same key both write it: the last one wins
+            statement = statement.on_conflict_do_update(
+                index_elements=["namespace", "key"],
+                set_={
+                    "value": statement.excluded.value,
+                    "hits": 0,
+                    "created_at": statement.excluded.created_at,
+                    "last_used_at": statement.excluded.last_used_at,
+                    "expires_at": statement.excluded.expires_at,
+                },
+            )
+            async with db.begin_nested():
+                await db.execute(statement)
+                self._writes += 1
+                if self._writes % EVICT_EVERY_WRITES == 0:
+                    await self.evict(db)
+        except Exception as e:
+            print(f"Response cache write failed ({self.namespace}): {e}")
+
+    async def evict(self, db: AsyncSession) -> int:
+        """
+        Deletes expired rows, then the least recently used rows above max_rows.
+        """
+        now = datetime.now(timezone.utc)
+        result = await db.execute(
+            delete(AIResponseCache)
+            .where(AIResponseCache.namespace == self.namespace)
+            .where(AIResponseCache.expires_at <= now)
+        )
+        removed = result.rowcount or 0
+
+        count = (await db.execute(
+            select(func.count()).select_from(AIResponseCache)
+            .where(AIResponseCache.namespace == self.namespace)
+        )).scalar()
+        if count > self.max_rows:
+            cutoff = (await db.execute(
+                select(AIResponseCache.last_used_at)
+                .where(AIResponseCache.namespace == self.namespace)
+                .order_by(AIResponseCache.last_used_at.desc())
+                .offset(self.max_rows)
+                .limit(1)
+            )).scalar()
+            result = await db.execute(
+                delete(AIResponseCache)
+                .where(AIResponseCache.namespace == self.namespace)
+                .where(AIResponseCache.last_used_at <= cutoff)
+            )
+            removed += result.rowcount or 0
+        if removed:
+            metrics.incr(f"cache.{self.namespace}.evictions", removed)
+        return removed
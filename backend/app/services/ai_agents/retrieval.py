@@ -0,0 +1,95 @@
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+from app.core.config import settings
+from app.core.metrics import metrics
+from app.services.ai_agents.budget import estimate_tokens, fit_to_budget
+from app.services.ai_agents.embeddings import HashedNgramEmbedder, article_passages
+from app.services.ai_agents.vector_store import VectorStore
+
+embedder = HashedNgramEmbedder(settings.RAG_EMBEDDING_DIM)
+
+# Opened on first use so importing the app doesn't create index files
+_article_index: Optional[VectorStore] = None
+
+
+def get_article_index() -> VectorStore:
+    global _article_index
+    if _article_index is None:
+        _article_index = VectorStore(
+            settings.RAG_INDEX_DIR,
+            dim=settings.RAG_EMBEDDING_DIM,
+            capacity=settings.RAG_INDEX_CAPACITY,
+            exact_search_max=settings.RAG_EXACT_SEARCH_MAX,
+        )
+    return _article_index
+
+
+def article_key(article: Dict[str, Any]) -> Optional[str]:
+    return article.get("id") or article.get("url")
+
+
+def index_articles(articles: List[Dict[str, Any]]) -> int:
+    """
+    Embeds and stores passages of articles not indexed yet.
+    Called at ingestion (news fetches); returns the number of new passages.
+    Only the process holding the index's writer lock indexes; others read.
+    """
+    index = get_article_index()
+    if not index.writable:
+        metrics.incr("rag.index_read_only_skips")
+        return 0
+    passages = []
+    for article in articles:
+        key = article_key(article)
+        if not key or index.has_article(key):
+            continue
+        for text in article_passages(article, settings.RAG_PASSAGE_TOKENS):
+            passages.append({
+                "article_id": key,
+                "title": article.get("title"),
+                "url": article.get("url"),
+                "published": article.get("published"),
+                "text": text,
+            })
+    if passages:
+        index.add(passages, embedder.embed([p["text"] for p in passages]))
+        metrics.incr("rag.passages_indexed", len(passages))
+    return len(passages)
+
+
+def retrieve(question: str, k: int, article_id: Optional[str] = None) -> List[Dict[str, Any]]:
+    """
+    Top-k passages for the question. When the question is about a specific
+    (indexed) article, its best passages come first.
+    """
+    index = get_article_index()
+    query = embedder.embed_one(question)
+    if not np.any(query):
+        return []
+    results = index.search(query, k)
+    if article_id and index.has_article(article_id):
+        own = index.search_article(query, article_id, limit=2)
+        results = own + [r for r in results if r["article_id"] != article_id][:k - len(own)]
+    metrics.observe("rag.results", len(results))
+    return results
+
+
+def build_context(passages: List[Dict[str, Any]], client_context: str, budget: int) -> str:
+    """
+    Prompt context from retrieved passages (best first) within the token
+    budget. Client-supplied context is kept but only gets what is left.
+    """
+    parts = []
+    used = 0
+    for i, passage in enumerate(passages, start=1):
+        part = f"[{i}] {passage['title']}\n{passage['text']}"
+        tokens = estimate_tokens(part)
+        if used + tokens > budget:
+            break
+        parts.append(part)
+        used += tokens
+    if client_context and used < budget:
+        parts.append(fit_to_budget(client_context, budget - used))
+    return "\n\n".join(parts)
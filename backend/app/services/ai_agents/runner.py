@@ -0,0 +1,188 @@
+import asyncio
+from typing import Any, AsyncIterator, Dict, List, Optional
+
+from app.core.config import settings
+from app.core.metrics import metrics
+from app.services.ai_agents.cache import analysis_cache, analysis_key
+from app.services.ai_agents.checkpoints import graph_checkpoints
+from app.services.ai_agents.clustering import story_analysis_cache, story_clusters
+from app.services.ai_agents.graph import news_graph, timed_node
+from app.services.ai_agents.nodes import bias_node, classifier_node
+from app.services.ai_agents.usage import track_usage
+
+# Bounds concurrent graph runs started by batch requests across the process
+batch_semaphore = asyncio.Semaphore(settings.AI_BATCH_CONCURRENCY)
+
+AGENT_MESSAGES = {
+    "collector": "Gathering and cleaning content...",
+    "classifier": "Classifying topic and sentiment...",
+    "summarizer": "Generating concise summaries...",
+    "bias": "Analyzing political bias...",
+}
+
+def build_initial_state(
+    article_id: str,
+    title: str,
+    content: str,
+    is_premium: bool,
+    source_categories: Optional[List[str]] = None
+) -> Dict[str, Any]:
+    return {
+        "article_id": article_id,
+        "title": title,
+        "content": content,
+        "is_premium": is_premium,
+        "source_categories": source_categories or [],
+        "quality_score": 1.0,
+        "degraded": []
+    }
+
+def state_cache_key(state: Dict[str, Any]) -> str:
+    return analysis_key(state["title"], state["content"], state["is_premium"])
+
+# Parts of an analysis that describe the event rather than the outlet's coverage of it
+STORY_SHARED_FIELDS = ("summary_short", "summary_detail", "tags")
+
+# Run per article on top of a story's shared analysis
+STORY_OWN_NODES = [("classifier", timed_node("classifier", classifier_node)), ("bias", timed_node("bias", bias_node))]
+
+def story_cache_key(state: Dict[str, Any]) -> Optional[str]:
+    if not settings.STORY_SHARE_ANALYSIS:
+        return None
+    return story_clusters.story_of(state["article_id"])
+
+def get_cached_article(state: Dict[str, Any]) -> Dict[str, Any] | None:
+    """
+    Cached analysis of this article.
+    """
+    cached = analysis_cache.get(state_cache_key(state))
+    if cached is not None:
+        return {**cached, "id": state["article_id"]}
+    return None
+
+def get_story_analysis(state: Dict[str, Any]) -> Dict[str, Any] | None:
+    """
+    Shared fields (summaries, tags) from another article of the same story.
+    Sentiment and bias are outlet specific and still computed per article.
+    """
+    story_key = story_cache_key(state)
+    shared = story_analysis_cache.get(story_key) if story_key else None
+    if shared is None:
+        return None
+    metrics.incr("stories.shared_analyses")
+    return {**shared, "story_id": story_key}
+
+def build_final_article(state: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        "id": state.get("article_id"),
+        "summary_short": state.get("summary_short"),
+        "summary_detail": state.get("summary_detail"),
+        "sentiment": state.get("sentiment"),
+        "tags": state.get("tags"),
+        "bias_score": state.get("bias_score"),
+        "bias_explanation": state.get("bias_explanation")
+    }
+
+async def stream_article_analysis(initial_state: Dict[str, Any]) -> AsyncIterator[Dict[str, Any]]:
+    """
+    Runs the news graph for one article and yields progress events.
+    The last event has status 'complete' and carries the final article.
+    Results are served from and stored in the analysis cache; cached
+    completions are flagged with 'cached': True. Summaries and tags are
+    shared with the article's story (see clustering): when another member
+    was analysed, only the classifier (sentiment) and bias run.
+    Runs under the caller's deadline (see deadline.deadline_scope); stages that
+    degraded to meet it are listed in the 'complete' event and such results
+    are not cached.
+    With checkpointing enabled, every run has its own checkpoint thread, and
+    a run that failed part-way is resumed after its last completed node by
+    the next run of the same content (see GraphCheckpoints).
+    The 'complete' event's 'usage' holds the real token counts of this run.
+    Errors are raised to the caller.
+    """
+    yield {"status": "starting", "message": "Initializing AI Agents..."}
+
+    cached = get_cached_article(initial_state)
+    if cached is not None:
+        yield {"status": "complete", "article": cached, "cached": True, "degraded": []}
+        return
+
+    shared = get_story_analysis(initial_state)
+    if shared is not None:
+        async for event in _finish_from_story(initial_state, shared):
+            yield event
+        return
+
+    with track_usage() as usage:
+        accumulated_state = initial_state.copy()
+        degraded: List[str] = []
+        content_key = state_cache_key(initial_state)
+        graph, config, run_id, inputs = news_graph, None, None, initial_state
+        if graph_checkpoints.enabled:
+            graph, config, run_id, resumed = await graph_checkpoints.prepare(content_key)
+            if resumed is not None:
+                # Keep this request's article id; everything else comes from the saved run
+                accumulated_state.update({**resumed, "article_id": initial_state["article_id"]})
+                degraded.extend(resumed.get("degraded") or [])
+                inputs = None
+                yield {"status": "progress", "agent": "checkpoint", "message": "Resuming from the last completed step..."}
+
+        completed = False
+        try:
+            async for chunk in graph.astream(inputs, config=config):
+                for agent_name, val in chunk.items():
+                    if isinstance(val, dict):
+                        # 'degraded' is an append-only channel in the graph, so collect it separately
+                        degraded.extend(val.get("degraded") or [])
+                        accumulated_state.update(val)
+                    msg = AGENT_MESSAGES.get(agent_name, f"Processing {agent_name}...")
+                    yield {"status": "progress", "agent": agent_name, "message": msg}
+            completed = True
+        finally:
+            if run_id is not None:
+                # Failed or abandoned runs stay resumable by the next run of this content
+                await graph_checkpoints.finish(content_key, run_id, completed)
+
+        final_article = build_final_article(accumulated_state)
+        if degraded:
+            metrics.incr("analysis.degraded")
+        else:
+            analysis_cache.set(content_key, final_article)
+            story_key = story_cache_key(initial_state)
+            if story_key:
+                story_analysis_cache.set(story_key, {field: final_article[field] for field in STORY_SHARED_FIELDS})
+        yield {"status": "complete", "article": final_article, "cached": False, "degraded": degraded, "usage": usage.to_dict()}
+
+async def _finish_from_story(initial_state: Dict[str, Any], shared: Dict[str, Any]) -> AsyncIterator[Dict[str, Any]]:
+    """
+    Completes an analysis from its story's shared fields plus this article's
+    own classifier and bias runs. The story member already passed the
+    collector, so it is not run again.
+    """
+    with track_usage() as usage:
+        state = initial_state.copy()
+        degraded: List[str] = []
+        for name, node in STORY_OWN_NODES:
+            result = await node(state)
+            degraded.extend(result.get("degraded") or [])
+            state.update({k: v for k, v in result.items() if k != "degraded"})
+            yield {"status": "progress", "agent": name, "message": AGENT_MESSAGES[name]}
+
+        final_article = {**build_final_article(state), **{field: shared[field] for field in STORY_SHARED_FIELDS}}
+        if degraded:
+            metrics.incr("analysis.degraded")
+        else:
+            analysis_cache.set(state_cache_key(initial_state), final_article)
+        yield {
+            "status": "complete", "article": final_article, "cached": False, "degraded": degraded,
+            "story_id": shared["story_id"], "usage": usage.to_dict(),
+        }
+
+async def analyse_article(initial_state: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Runs the analysis to completion and returns the final 'complete' event.
+    """
+    async for event in stream_article_analysis(initial_state):
+        if event["status"] == "complete":
+            return event
+    raise RuntimeError("Analysis finished without a result")
@@ -0,0 +1,170 @@
+import asyncio
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional
+
+from app.core.config import settings
+from app.core.metrics import metrics
+from app.services.ai_agents.admission import llm_admission, llm_priority, priority_scope
+from app.services.ai_agents.cache import analysis_cache
+from app.services.ai_agents.clustering import published_ts
+from app.services.ai_agents.errors import handle_ai_error
+from app.services.ai_agents.runner import analyse_article, build_initial_state, get_cached_article, state_cache_key
+
+# Errors that mean the LLM has no spare capacity; the cycle stops on them
+STOP_ERRORS = ("AI_RATE_LIMIT", "AI_OVERLOADED")
+
+
+def article_state(article: Dict[str, Any], is_premium: bool) -> Dict[str, Any]:
+    # Same inputs as /ai/process gets from a feed card, so the cache keys match
+    return build_initial_state(
+        article.get("id") or article.get("url"),
+        article.get("title") or "",
+        article.get("content") or article.get("description") or "",
+        is_premium,
+        article.get("category") or [],
+    )
+
+
+def free_variant(article: Dict[str, Any]) -> Dict[str, Any]:
+    # What bias_node returns for free users; everything else is identical
+    return {**article, "bias_score": None, "bias_explanation": "Premium feature"}
+
+
+class SpeculativeAnalyser:
+    """
+    Pre-runs the analysis graph on the articles users are most likely to
+    open next, the newest fetched articles of the most popular categories,
+    so their /ai/process requests are analysis cache hits.
+
+    Candidates come from ingestion (no extra news API calls). Categories are
+    ranked by the trending tracker, and the top per_category fresh articles
+    of each are analysed one at a time at free background priority. One
+    premium run fills both the premium and the free cache entry. A run only
+    starts while the LLM admission queue is empty and less than max_load of
+    its slots are busy; a cycle stops at its LLM call budget
+    (llm_calls_per_key per configured key) or on rate limits/overload.
+    """
+
+    def __init__(self, per_category: int, max_categories: int, max_load: float, llm_calls_per_key: int, max_age_seconds: float, pool_size: int):
+        self.per_category = per_category
+        self.max_categories = max_categories
+        self.max_load = max_load
+        self.llm_calls_per_key = llm_calls_per_key
+        self.max_age_seconds = max_age_seconds
+        self.pool_size = pool_size
+        self._pool: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._task: Optional[asyncio.Task] = None
+
+    def offer(self, articles: List[Dict[str, Any]]) -> None:
+        """
+        Ingestion feed: remembers fetched articles as candidates.
+        """
+        for article in articles:
+            key = article.get("id") or article.get("url")
+            if not key or not article.get("title"):
+                continue
+            self._pool[key] = article
+            self._pool.move_to_end(key)
+        while len(self._pool) > self.pool_size:
+            self._pool.popitem(last=False)
+
+    def has_idle_capacity(self) -> bool:
+        return llm_admission.queued() == 0 and llm_admission.in_flight < llm_admission.max_concurrency * self.max_load
+
+    def candidates(self, now: Optional[float] = None) -> List[Dict[str, Any]]:
+        """
+        Fresh, not yet analysed articles: categories in trending order (then
+        by how many candidates they have), newest articles first within each.
+        """
+        from app.services.ai_agents.trending import trending
+
+        now = now if now is not None else time.time()
+        by_category: Dict[str, List[Dict[str, Any]]] = {}
+        for article in self._pool.values():
+            if now - published_ts(article) > self.max_age_seconds:
+                continue
+            categories = article.get("category") or ["general"]
+            if isinstance(categories, str):
+                categories = [categories]
+            by_category.setdefault(categories[0].lower(), []).append(article)
+
+        rank = {entry["term"]: i for i, entry in enumerate(trending.top("6h", limit=self.max_categories, kind="category"))}
+        ordered = sorted(by_category, key=lambda c: (rank.get(c, len(rank)), -len(by_category[c])))
+
+        selected = []
+        for category in ordered[:self.max_categories]:
+            articles = sorted(by_category[category], key=published_ts, reverse=True)
+            fresh = [a for a in articles if get_cached_article(article_state(a, True)) is None]
+            selected.extend(fresh[:self.per_category])
+        return selected
+
+    async def analyse(self, article: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        One premium graph run, stored for premium and free users. Not shared
+        through article_runs: a user click joining it would wait at this
+        run's background priority.
+        """
+        try:
+            event = await analyse_article(article_state(article, True))
+        except Exception as e:
+            _, detail = handle_ai_error(e)
+            return {"status": "error", **detail}
+        if event["status"] == "complete" and not event.get("degraded"):
+            free_state = article_state(article, False)
+            analysis_cache.set(state_cache_key(free_state), free_variant(event["article"]))
+        return event
+
+    async def run_once(self) -> Dict[str, int]:
+        from app.services.ai_agents.llm_backends import llm_backend
+        from app.services.ai_agents.usage import track_usage
+
+        stats = {"analysed": 0, "failed": 0, "deferred": 0, "llm_calls": 0}
+        llm_budget = llm_backend.key_count() * self.llm_calls_per_key
+        with priority_scope(llm_priority(False, interactive=False)), track_usage("speculative") as usage:
+            candidates = self.candidates()
+            for i, article in enumerate(candidates):
+                if usage.llm_calls >= llm_budget or not self.has_idle_capacity():
+                    stats["deferred"] = len(candidates) - i
+                    break
+                event = await self.analyse(article)
+                if event["status"] == "complete":
+                    stats["analysed"] += 1
+                    continue
+                stats["failed"] += 1
+                if event.get("error_code") in STOP_ERRORS:
+                    stats["deferred"] = len(candidates) - i - 1
+                    break
+            stats["llm_calls"] = usage.llm_calls
+
+        for name, value in stats.items():
+            metrics.incr(f"speculative.{name}", value)
+        return stats
+
+    def start(self, interval_seconds: float) -> None:
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._loop(interval_seconds))
+
+    async def _loop(self, interval_seconds: float) -> None:
+        while True:
+            await asyncio.sleep(interval_seconds)
+            try:
+                await self.run_once()
+            except Exception as e:
+                print(f"Speculative analysis failed: {e}")
+
+    async def shutdown(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+
+speculative_analyser = SpeculativeAnalyser(
+    per_category=settings.SPECULATIVE_PER_CATEGORY,
+    max_categories=settings.SPECULATIVE_MAX_CATEGORIES,
+    max_load=settings.SPECULATIVE_MAX_LOAD,
+    llm_calls_per_key=settings.SPECULATIVE_LLM_CALLS_PER_KEY,
+    max_age_seconds=settings.SPECULATIVE_MAX_AGE_HOURS * 60 * 60,
+    pool_size=settings.SPECULATIVE_POOL_SIZE,
+)
@@ -7,6 +7,7 @@ class AgentState(TypedDict):
     title: str
     content: str
     is_premium: bool
+    source_categories: Optional[List[str]]
     
     # Processed Data
     category: Optional[str]
@@ -21,3 +22,5 @@ class AgentState(TypedDict):
     quality_score: float
     is_duplicate: bool
     error: Optional[str]
+    # Stages that took a cheaper path to meet the request deadline (appended by nodes)
+    degraded: Annotated[List[str], operator.add]
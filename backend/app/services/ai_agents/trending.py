@@ -0,0 +1,242 @@
+import asyncio
+import heapq
+import json
+import math
+import os
+import threading
+import time
+import zlib
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from app.core.config import settings
+from app.core.metrics import metrics
+
+WINDOWS = {"1h": 60 * 60, "6h": 6 * 60 * 60, "24h": 24 * 60 * 60}
+# Forward-decay weights grow as exp(age / window); rescale before float64 gets imprecise
+MAX_EXPONENT = 50.0
+
+
+class CountMinSketch:
+    def __init__(self, width: int, depth: int):
+        self.width = width
+        self.depth = depth
+        self.table = np.zeros((depth, width), dtype=np.float64)
+        self._rows = np.arange(depth)
+
+    def _columns(self, term: str) -> np.ndarray:
+        data = term.encode("utf-8")
+        return np.array([zlib.crc32(data, seed) % self.width for seed in range(1, self.depth + 1)])
+
+    def add(self, term: str, weight: float) -> float:
+        """
+        Adds weight and returns the new (over-)estimate for term.
+        """
+        columns = self._columns(term)
+        self.table[self._rows, columns] += weight
+        return float(self.table[self._rows, columns].min())
+
+    def estimate(self, term: str) -> float:
+        return float(self.table[self._rows, self._columns(term)].min())
+
+
+class DecayedTopK:
+    """
+    Heavy hitters of one sliding window with exponential decay (time
+    constant = window length), in constant memory: a count-min sketch for
+    counts and a min-heap of the k best terms.
+
+    Uses forward decay: an event at time t adds exp((t - landmark) / window),
+    so stored scores never need updating; queries scale them down by
+    exp((now - landmark) / window). Stale heap entries are dropped lazily.
+    """
+
+    def __init__(self, window_seconds: float, k: int, width: int, depth: int, now: Optional[float] = None):
+        self.window = window_seconds
+        self.k = k
+        self.sketch = CountMinSketch(width, depth)
+        self.landmark = now if now is not None else time.time()
+        self.scores: Dict[str, float] = {}
+        self._heap: List[Tuple[float, str]] = []
+
+    def _rescale(self, now: float) -> None:
+        factor = math.exp(-(now - self.landmark) / self.window)
+        self.sketch.table *= factor
+        self.scores = {term: score * factor for term, score in self.scores.items()}
+        self._heap = [(score, term) for term, score in self.scores.items()]
+        heapq.heapify(self._heap)
+        self.landmark = now
+
+    def _min(self) -> Tuple[float, str]:
+        while self._heap and self.scores.get(self._heap[0][1]) != self._heap[0][0]:
+            heapq.heappop(self._heap)
+        return self._heap[0]
+
+    def add(self, term: str, now: float, count: float = 1.0) -> None:
+        if (now - self.landmark) / self.window > MAX_EXPONENT:
+            self._rescale(now)
+        estimate = self.sketch.add(term, count * math.exp((now - self.landmark) / self.window))
+        if term in self.scores or len(self.scores) < self.k:
+            self.scores[term] = estimate
+            heapq.heappush(self._heap, (estimate, term))
+        else:
+            min_score, min_term = self._min()
+            if estimate > min_score:
+                heapq.heappop(self._heap)
+                del self.scores[min_term]
+                self.scores[term] = estimate
+                heapq.heappush(self._heap, (estimate, term))
+        if len(self._heap) > 4 * self.k:
+            self._heap = [(score, term) for term, score in self.scores.items()]
+            heapq.heapify(self._heap)
+
+    def top(self, limit: int, now: float) -> List[Tuple[str, float]]:
+        scale = math.exp(-(now - self.landmark) / self.window)
+        best = heapq.nlargest(limit, self.scores.items(), key=lambda item: item[1])
+        return [(term, score * scale) for term, score in best]
+
+
+def term_key(kind: str, value: str) -> str:
+    return f"{kind}:{value.strip().lower()}"
+
+
+class TrendingTracker:
+    """
+    Streaming trending topics over ingested articles and classifier output.
+    Each article counts once per source ("ingest", "classifier"), tracked
+    in a bounded LRU of article ids. Snapshotted to disk periodically and
+    restored on start-up. Thread-safe: ingestion records from a worker thread.
+    """
+
+    def __init__(self, k: int, width: int, depth: int, snapshot_path: Optional[str], seen_size: int = 50000):
+        self.k = k
+        self.width = width
+        self.depth = depth
+        self.snapshot_path = snapshot_path
+        self.seen_size = seen_size
+        self.windows = {name: DecayedTopK(seconds, k, width, depth) for name, seconds in WINDOWS.items()}
+        self._seen: "OrderedDict[str, None]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._task: Optional[asyncio.Task] = None
+
+    def _first_time(self, key: str) -> bool:
+        if key in self._seen:
+            self._seen.move_to_end(key)
+            return False
+        self._seen[key] = None
+        if len(self._seen) > self.seen_size:
+            self._seen.popitem(last=False)
+        return True
+
+    def record(self, article_id: Optional[str], tags: Iterable[str], categories: Iterable[str], source: str, now: Optional[float] = None) -> None:
+        now = now if now is not None else time.time()
+        terms = {term_key("tag", t) for t in tags or () if t and t.strip()}
+        terms |= {term_key("category", c) for c in categories or () if c and c.strip() and c.lower() != "general"}
+        with self._lock:
+            if article_id and not self._first_time(f"{source}:{article_id}"):
+                return
+            for term in terms:
+                for window in self.windows.values():
+                    window.add(term, now)
+        metrics.incr("trending.events", len(terms))
+
+    def record_articles(self, articles: List[Dict[str, Any]]) -> None:
+        """
+        Ingestion feed: Currents categories plus local keyword tags.
+        """
+        from app.services.ai_agents.local_classifier import extract_tags
+
+        for article in articles:
+            categories = article.get("category") or []
+            if isinstance(categories, str):
+                categories = [categories]
+            tags = extract_tags(article.get("title") or "", article.get("description") or "", limit=5)
+            self.record(article.get("id") or article.get("url"), tags, categories, "ingest")
+
+    def top(self, window: str, limit: int = 10, kind: Optional[str] = None) -> List[Dict[str, Any]]:
+        now = time.time()
+        # Over-fetch when filtering by kind; the heap holds at most k terms anyway
+        with self._lock:
+            entries = self.windows[window].top(self.k if kind else limit, now)
+        results = []
+        for term, score in entries:
+            term_kind, _, value = term.partition(":")
+            if kind and term_kind != kind:
+                continue
+            results.append({"term": value, "kind": term_kind, "score": round(score, 3)})
+            if len(results) == limit:
+                break
+        return results
+
+    def _snapshot(self) -> Tuple[Dict[str, np.ndarray], str]:
+        with self._lock:
+            arrays = {f"{name}_table": w.sketch.table.copy() for name, w in self.windows.items()}
+            meta = {name: {"landmark": w.landmark, "scores": dict(w.scores)} for name, w in self.windows.items()}
+        return arrays, json.dumps(meta)
+
+    def _write(self, arrays: Dict[str, np.ndarray], meta: str) -> None:
+        tmp_path = f"{self.snapshot_path}.tmp"
+        with open(tmp_path, "wb") as f:
+            np.savez(f, meta=np.array(meta), **arrays)
+        os.replace(tmp_path, self.snapshot_path)
+
+    def save(self) -> None:
+        if self.snapshot_path:
+            self._write(*self._snapshot())
+
+    def load(self) -> bool:
+        if not self.snapshot_path or not os.path.exists(self.snapshot_path):
+            return False
+        with np.load(self.snapshot_path) as data, self._lock:
+            meta = json.loads(str(data["meta"]))
+            for name, window in self.windows.items():
+                if name not in meta or f"{name}_table" not in data.files:
+                    continue
+                table = data[f"{name}_table"]
+                if table.shape != window.sketch.table.shape:
+                    continue
+                window.sketch.table[:] = table
+                window.landmark = meta[name]["landmark"]
+                window.scores = dict(meta[name]["scores"])
+                window._heap = [(score, term) for term, score in window.scores.items()]
+                heapq.heapify(window._heap)
+        return True
+
+    def start(self, interval_seconds: float) -> None:
+        try:
+            self.load()
+        except Exception as e:
+            print(f"Trending snapshot load failed: {e}")
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._snapshot_loop(interval_seconds))
+
+    async def _snapshot_loop(self, interval_seconds: float) -> None:
+        while True:
+            await asyncio.sleep(interval_seconds)
+            if not self.snapshot_path:
+                continue
+            try:
+                # Copy on the event loop, write the file off it
+                await asyncio.to_thread(self._write, *self._snapshot())
+            except Exception as e:
+                print(f"Trending snapshot failed: {e}")
+
+    async def shutdown(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+            try:
+                self.save()
+            except Exception as e:
+                print(f"Trending snapshot failed: {e}")
+
+
+trending = TrendingTracker(
+    k=settings.TRENDING_TOP_K,
+    width=settings.TRENDING_SKETCH_WIDTH,
+    depth=settings.TRENDING_SKETCH_DEPTH,
+    snapshot_path=settings.TRENDING_SNAPSHOT_PATH or None,
+)
@@ -0,0 +1,174 @@
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Dict, Iterator, Optional, Tuple
+
+from app.core.metrics import metrics
+from app.services.ai_agents.budget import estimate_tokens
+
+
+class UsageTracker:
+    """
+    Accumulates real LLM usage (from the model's usage_metadata) for one
+    request or graph run, in total and per stage.
+    """
+
+    def __init__(self):
+        self.input_tokens = 0
+        self.output_tokens = 0
+        self.cached_tokens = 0
+        self.llm_calls = 0
+        self.latency_ms = 0.0
+        self.estimated_calls = 0
+        self.stages: Dict[str, Dict[str, float]] = {}
+
+    @property
+    def total_tokens(self) -> int:
+        return self.input_tokens + self.output_tokens
+
+    def add(self, stage: str, input_tokens: int, output_tokens: int, cached_tokens: int, latency_ms: float, estimated: bool):
+        self.input_tokens += input_tokens
+        self.output_tokens += output_tokens
+        self.cached_tokens += cached_tokens
+        self.llm_calls += 1
+        self.latency_ms += latency_ms
+        if estimated:
+            self.estimated_calls += 1
+        entry = self.stages.setdefault(stage, {"input_tokens": 0, "output_tokens": 0, "cached_tokens": 0, "llm_calls": 0, "latency_ms": 0.0})
+        entry["input_tokens"] += input_tokens
+        entry["output_tokens"] += output_tokens
+        entry["cached_tokens"] += cached_tokens
+        entry["llm_calls"] += 1
+        entry["latency_ms"] += latency_ms
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "input_tokens": self.input_tokens,
+            "output_tokens": self.output_tokens,
+            "cached_tokens": self.cached_tokens,
+            "total_tokens": self.total_tokens,
+            "llm_calls": self.llm_calls,
+            "latency_ms": round(self.latency_ms, 1),
+            "estimated_calls": self.estimated_calls,
+            "stages": {
+                name: {**entry, "latency_ms": round(entry["latency_ms"], 1)}
+                for name, entry in self.stages.items()
+            },
+        }
+
+
+# Active trackers (outermost first) and the stage label of the current LLM call.
+# Both are context variables so graph nodes running in their own tasks still report here.
+_trackers: ContextVar[Tuple[UsageTracker, ...]] = ContextVar("usage_trackers", default=())
+_stage: ContextVar[str] = ContextVar("usage_stage", default="request")
+
+
+def _reset(var: ContextVar, token) -> None:
+    try:
+        var.reset(token)
+    except ValueError:
+        # Async generator finalised from another context
+        pass
+
+
+@contextmanager
+def track_usage(stage: Optional[str] = None) -> Iterator[UsageTracker]:
+    """
+    Collects usage of every LLM call made inside the block. Nested trackers
+    (e.g. a graph run inside a request) each see the calls.
+    """
+    tracker = UsageTracker()
+    trackers_token = _trackers.set(_trackers.get() + (tracker,))
+    stage_token = _stage.set(stage) if stage else None
+    try:
+        yield tracker
+    finally:
+        if stage_token is not None:
+            _reset(_stage, stage_token)
+        _reset(_trackers, trackers_token)
+
+
+@contextmanager
+def usage_stage(stage: str) -> Iterator[None]:
+    token = _stage.set(stage)
+    try:
+        yield
+    finally:
+        _reset(_stage, token)
+
+
+def record_llm_usage(message: Any, input_data: Dict[str, Any], latency_ms: float) -> None:
+    """
+    Records one LLM response. Uses usage_metadata when the model reports it,
+    otherwise falls back to the local token estimate.
+    """
+    usage = getattr(message, "usage_metadata", None) or {}
+    estimated = not usage
+    if estimated:
+        input_tokens = sum(estimate_tokens(str(v)) for v in input_data.values())
+        output_tokens = estimate_tokens(str(getattr(message, "content", message)))
+        cached_tokens = 0
+    else:
+        input_tokens = usage.get("input_tokens", 0)
+        output_tokens = usage.get("output_tokens", 0)
+        cached_tokens = (usage.get("input_token_details") or {}).get("cache_read", 0)
+
+    stage = _stage.get()
+    metrics.incr(f"tokens.{stage}.input", input_tokens)
+    metrics.incr(f"tokens.{stage}.output", output_tokens)
+    metrics.incr(f"tokens.{stage}.cached", cached_tokens)
+    metrics.observe(f"llm.{stage}.latency_ms", latency_ms)
+
+    for tracker in _trackers.get():
+        tracker.add(stage, input_tokens, output_tokens, cached_tokens, latency_ms, estimated)
+
+
+def add_usage_share(usage: UsageTracker, parts: int, index: int) -> None:
+    """
+    Adds part index of parts of another tracker's usage (e.g. one shared
+    batch call) to the trackers of the current context, under its stage.
+    Token and call counts are split so the parts sum to the whole.
+    """
+    def share(total: int) -> int:
+        base, extra = divmod(int(total), parts)
+        return base + (1 if index < extra else 0)
+
+    stage = _stage.get()
+    for tracker in _trackers.get():
+        tracker.input_tokens += share(usage.input_tokens)
+        tracker.output_tokens += share(usage.output_tokens)
+        tracker.cached_tokens += share(usage.cached_tokens)
+        tracker.llm_calls += share(usage.llm_calls)
+        tracker.estimated_calls += share(usage.estimated_calls)
+        tracker.latency_ms += usage.latency_ms
+        entry = tracker.stages.setdefault(stage, {"input_tokens": 0, "output_tokens": 0, "cached_tokens": 0, "llm_calls": 0, "latency_ms": 0.0})
+        entry["input_tokens"] += share(usage.input_tokens)
+        entry["output_tokens"] += share(usage.output_tokens)
+        entry["cached_tokens"] += share(usage.cached_tokens)
+        entry["llm_calls"] += share(usage.llm_calls)
+        entry["latency_ms"] += usage.latency_ms
+
+
+def build_usage_log(user_id: Any, action: str, usage: Optional[Dict[str, Any]]):
+    """
+    AIUsageLog row from a UsageTracker.to_dict() summary (None for work that
+    made no LLM calls). tokens_used is the real input + output total.
+    """
+    from app.models.payment import AIUsageLog
+
+    return fill_usage_log(AIUsageLog(user_id=user_id, action=action), usage)
+
+
+def fill_usage_log(log, usage: Optional[Dict[str, Any]]):
+    """
+    Writes a usage summary into an existing AIUsageLog row, e.g. one
+    reserved when a job was queued.
+    """
+    usage = usage or UsageTracker().to_dict()
+    log.tokens_used = usage["total_tokens"]
+    log.input_tokens = usage["input_tokens"]
+    log.output_tokens = usage["output_tokens"]
+    log.cached_tokens = usage["cached_tokens"]
+    log.llm_calls = usage["llm_calls"]
+    log.latency_ms = int(usage["latency_ms"])
+    log.usage_breakdown = usage["stages"] or None
+    return log
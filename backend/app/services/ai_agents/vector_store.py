@@ -0,0 +1,260 @@
+import json
+import os
+import threading
+from collections import defaultdict
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+import numpy as np
+
+try:
+    import fcntl
+except ImportError:  # Windows: no advisory locks, every process writes
+    fcntl = None
+
+LSH_SEED = 13  # Fixed so hyperplanes (and bucket codes) survive restarts
+
+
+class VectorStore:
+    """
+    Passage embeddings in a memory-mapped float32 matrix with a random
+    hyperplane LSH index for approximate nearest-neighbour search.
+
+    Rows are written as a ring: when capacity is reached the oldest passages
+    are overwritten. Passage metadata is appended to a JSONL sidecar and
+    replayed on start-up (last write per row wins). Small indexes are
+    searched exactly; larger ones probe the LSH buckets and re-rank the
+    candidates exactly.
+
+    Single writer: the first process to open a directory takes an exclusive
+    file lock and is the only one that adds passages. Other processes (e.g.
+    extra uvicorn workers) open it read-only, skip add() and pick up the
+    writer's new passages from the sidecar before each search. Within a
+    process, calls are serialised by a lock so ingestion can run in a worker
+    thread.
+    """
+
+    def __init__(
+        self,
+        directory: str,
+        dim: int,
+        capacity: int,
+        lsh_tables: int = 4,
+        lsh_bits: int = 10,
+        exact_search_max: int = 5000,
+    ):
+        os.makedirs(directory, exist_ok=True)
+        self.dim = dim
+        self.capacity = capacity
+        self.exact_search_max = exact_search_max
+        self.vectors_path = os.path.join(directory, "vectors.f32")
+        self.meta_path = os.path.join(directory, "passages.jsonl")
+        self._lock = threading.RLock()
+        self._lock_file = open(os.path.join(directory, ".writer.lock"), "a")
+        self.writable = self._acquire_writer_lock()
+
+        expected_size = capacity * dim * 4
+        reuse = os.path.exists(self.vectors_path) and os.path.getsize(self.vectors_path) == expected_size
+        self.vectors: Optional[np.memmap] = None
+        if self.writable:
+            self.vectors = np.memmap(self.vectors_path, dtype=np.float32, mode="r+" if reuse else "w+", shape=(capacity, dim))
+
+        rng = np.random.default_rng(LSH_SEED)
+        self.planes = rng.standard_normal((lsh_tables, lsh_bits, dim)).astype(np.float32)
+        self._bit_values = (1 << np.arange(lsh_bits)).astype(np.int64)
+        self.buckets: List[Dict[int, Set[int]]] = [defaultdict(set) for _ in range(lsh_tables)]
+
+        self.passages: List[Optional[Dict[str, Any]]] = [None] * capacity
+        self.row_codes: List[Optional[np.ndarray]] = [None] * capacity
+        self.article_rows: Dict[str, Set[int]] = defaultdict(set)
+        self.next_seq = 0
+        self._meta_offset = 0
+        self._meta_inode: Optional[int] = None
+
+        if not self.writable:
+            self._catch_up()
+        elif reuse:
+            self._load()
+        elif os.path.exists(self.meta_path):
+            # Vectors file was missing or resized: the metadata no longer matches
+            os.remove(self.meta_path)
+
+    def _acquire_writer_lock(self) -> bool:
+        if fcntl is None:
+            return True
+        try:
+            fcntl.flock(self._lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            return True
+        except OSError:
+            return False
+
+    @property
+    def size(self) -> int:
+        return min(self.next_seq, self.capacity)
+
+    def __len__(self) -> int:
+        return self.size
+
+    def has_article(self, article_id: str) -> bool:
+        with self._lock:
+            self._catch_up()
+            return bool(self.article_rows.get(article_id))
+
+    def _codes(self, vectors: np.ndarray) -> np.ndarray:
+        # (n, tables): one integer bucket code per table
+        bits = np.einsum("nd,tbd->ntb", vectors, self.planes) > 0
+        return bits.astype(np.int64) @ self._bit_values
+
+    def _place(self, row: int, passage: Dict[str, Any], codes: np.ndarray) -> None:
+        old = self.passages[row]
+        if old is not None:
+            self.article_rows[old["article_id"]].discard(row)
+            if not self.article_rows[old["article_id"]]:
+                del self.article_rows[old["article_id"]]
+            for table, code in enumerate(self.row_codes[row]):
+                self.buckets[table][int(code)].discard(row)
+        self.passages[row] = passage
+        self.row_codes[row] = codes
+        self.article_rows[passage["article_id"]].add(row)
+        for table, code in enumerate(codes):
+            self.buckets[table][int(code)].add(row)
+
+    def _read_meta(self) -> Tuple[Dict[int, Dict[str, Any]], int]:
+        """
+        Complete sidecar lines written since the last read: row -> latest entry.
+        """
+        latest: Dict[int, Dict[str, Any]] = {}
+        lines = 0
+        if not os.path.exists(self.meta_path):
+            return latest, lines
+        with open(self.meta_path, "rb") as f:
+            f.seek(self._meta_offset)
+            for line in f:
+                if not line.endswith(b"\n"):
+                    break  # The writer is mid-line; read it next time
+                self._meta_offset += len(line)
+                lines += 1
+                entry = json.loads(line)
+                latest[entry["seq"] % self.capacity] = entry
+                self.next_seq = max(self.next_seq, entry["seq"] + 1)
+        return latest, lines
+
+    def _place_rows(self, latest: Dict[int, Dict[str, Any]]) -> List[int]:
+        rows = sorted(latest)
+        if rows:
+            codes = self._codes(np.asarray(self.vectors[rows]))
+            for row, row_codes in zip(rows, codes):
+                self._place(row, latest[row], row_codes)
+        return rows
+
+    def _catch_up(self) -> None:
+        # Read-only processes follow the writer through the sidecar; vectors are shared via the memmap
+        if self.writable:
+            return
+        if self.vectors is None:
+            if not os.path.exists(self.vectors_path) or os.path.getsize(self.vectors_path) != self.capacity * self.dim * 4:
+                return
+            self.vectors = np.memmap(self.vectors_path, dtype=np.float32, mode="r", shape=(self.capacity, self.dim))
+        if not os.path.exists(self.meta_path):
+            return
+        inode = os.stat(self.meta_path).st_ino
+        if inode != self._meta_inode:
+            # New or compacted sidecar: replay it from the start
+            self._meta_inode = inode
+            self._meta_offset = 0
+        self._place_rows(self._read_meta()[0])
+
+    def _load(self) -> None:
+        latest, lines = self._read_meta()
+        rows = self._place_rows(latest)
+        if self.writable and lines > 2 * self.capacity:
+            # Compact the sidecar down to live rows; replaced, so readers see a new file
+            tmp_path = f"{self.meta_path}.tmp"
+            with open(tmp_path, "w") as f:
+                for row in rows:
+                    f.write(json.dumps(latest[row]) + "\n")
+            os.replace(tmp_path, self.meta_path)
+            self._meta_offset = os.path.getsize(self.meta_path)
+
+    def add(self, passages: List[Dict[str, Any]], vectors: np.ndarray) -> bool:
+        """
+        Stores passages (dicts with at least 'article_id' and 'text') with
+        their normalised embeddings. Returns False without storing anything
+        in read-only processes.
+        """
+        if not passages:
+            return True
+        if not self.writable:
+            return False
+        codes = self._codes(vectors)
+        with self._lock, open(self.meta_path, "a") as f:
+            for passage, vector, row_codes in zip(passages, vectors, codes):
+                row = self.next_seq % self.capacity
+                entry = {**passage, "seq": self.next_seq}
+                # Vector before metadata, so readers never see a row without its vector
+                self.vectors[row] = vector
+                self._place(row, entry, row_codes)
+                line = json.dumps(entry) + "\n"
+                f.write(line)
+                self._meta_offset += len(line.encode("utf-8"))
+                self.next_seq += 1
+            self.vectors.flush()
+        return True
+
+    def _candidates(self, query: np.ndarray) -> Set[int]:
+        candidates: Set[int] = set()
+        for table, code in enumerate(self._codes(query[None, :])[0]):
+            code = int(code)
+            candidates |= self.buckets[table].get(code, set())
+            # Multi-probe: neighbouring buckets one bit away
+            for bit in self._bit_values:
+                candidates |= self.buckets[table].get(code ^ int(bit), set())
+        return candidates
+
+    def search_article(self, query: np.ndarray, article_id: str, limit: int) -> List[Dict[str, Any]]:
+        """
+        Best passages of one article for the query.
+        """
+        with self._lock:
+            self._catch_up()
+            rows = sorted(self.article_rows.get(article_id, ()))
+            if not rows:
+                return []
+            scores = np.asarray(self.vectors[rows]) @ query
+            order = np.argsort(-scores)[:limit]
+            return [{**self.passages[rows[i]], "score": float(scores[i])} for i in order]
+
+    def search(self, query: np.ndarray, k: int, max_per_article: int = 2) -> List[Dict[str, Any]]:
+        """
+        Top-k passages by cosine similarity, at most max_per_article per article.
+        """
+        with self._lock:
+            self._catch_up()
+            return self._search(query, k, max_per_article)
+
+    def _search(self, query: np.ndarray, k: int, max_per_article: int) -> List[Dict[str, Any]]:
+        if self.size == 0:
+            return []
+        rows: Optional[np.ndarray] = None
+        if self.size > self.exact_search_max:
+            candidates = self._candidates(query)
+            if len(candidates) >= 4 * k:
+                rows = np.fromiter(candidates, dtype=np.int64, count=len(candidates))
+        if rows is None:
+            rows = np.arange(self.size)
+
+        scores = np.asarray(self.vectors[rows]) @ query
+        order = np.argsort(-scores)
+
+        results = []
+        per_article: Dict[str, int] = defaultdict(int)
+        for i in order:
+            passage = self.passages[int(rows[i])]
+            if passage is None or scores[i] <= 0:
+                continue
+            if per_article[passage["article_id"]] >= max_per_article:
+                continue
+            per_article[passage["article_id"]] += 1
+            results.append({**passage, "score": float(scores[i])})
+            if len(results) == k:
+                break
+        return results
@@ -0,0 +1,296 @@
+import asyncio
+import json
+import uuid
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterable, List, Optional, Set
+
+from sqlalchemy import func, or_, select
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.core.metrics import metrics
+from app.models.news import NewsArticle, NewsCategory
+from app.services.ai_agents.cache import content_hash
+from app.services.ai_agents.graph import QUALITY_THRESHOLD, timed_node
+from app.services.ai_agents.nodes import NODE_PROMPT_VERSIONS, bias_node, classifier_node, collector_node, summarizer_node
+from app.services.ai_agents.runner import build_initial_state
+
+# Graph order; stored analyses always include bias
+NODES = {
+    "collector": timed_node("collector", collector_node),
+    "classifier": timed_node("classifier", classifier_node),
+    "summarizer": timed_node("summarizer", summarizer_node),
+    "bias": timed_node("bias", bias_node),
+}
+NODE_FIELDS = {
+    "classifier": ("sentiment", "tags"),
+    "summarizer": ("summary_short", "summary_detail"),
+    "bias": ("bias_score", "bias_explanation"),
+}
+
+_persist_tasks: Set[asyncio.Task] = set()
+
+
+def model_version() -> str:
+    return f"{settings.LLM_BACKEND}:{settings.GEMINI_MODEL}"
+
+
+def current_analysis_version() -> str:
+    """
+    Model plus every node's prompt version; a stored analysis made under
+    another version is stale.
+    """
+    return content_hash(model_version(), json.dumps(NODE_PROMPT_VERSIONS, sort_keys=True))[:16]
+
+
+def article_text(content: Optional[str], description: Optional[str]) -> str:
+    # Currents only returns descriptions; full content wins when present
+    return content or description or ""
+
+
+def content_fingerprint(title: str, text: str) -> str:
+    return content_hash(title, text)
+
+
+def node_fingerprints(title: str, text: str) -> Dict[str, str]:
+    """
+    Fingerprint of each node's inputs: the article text, the model and the
+    node's own prompt version. A node re-runs only when its fingerprint moves.
+    """
+    model = model_version()
+    return {node: content_hash(node, NODE_PROMPT_VERSIONS[node], model, title, text) for node in NODES}
+
+
+def stale_clause():
+    """
+    Rows whose stored analysis is missing, made for other text, or made
+    under another prompt/model version.
+    """
+    return or_(
+        NewsArticle.analysis_version.is_(None),
+        NewsArticle.analysis_version != current_analysis_version(),
+        NewsArticle.analysis_fingerprint.is_(None),
+        NewsArticle.analysis_fingerprint != NewsArticle.content_fingerprint,
+    )
+
+
+def is_stale(row: NewsArticle) -> bool:
+    return (
+        row.analysis_version != current_analysis_version()
+        or row.analysis_fingerprint is None
+        or row.analysis_fingerprint != row.content_fingerprint
+    )
+
+
+async def analyse_article(
+    article_id: str,
+    title: str,
+    text: str,
+    source_category: Optional[str],
+    previous_inputs: Optional[Dict[str, str]],
+    previous_quality: Optional[float],
+) -> Dict[str, Any]:
+    """
+    Runs the analysis nodes whose input fingerprint differs from the stored
+    one and returns the changed fields. Nodes run in graph order with the
+    same quality gate; degraded nodes are not recorded, so they are retried
+    next time. No database access, so several can run concurrently.
+    """
+    fingerprints = node_fingerprints(title, text)
+    previous_inputs = previous_inputs or {}
+    state = build_initial_state(article_id, title, text, True, [source_category] if source_category else None)
+    analysis: Dict[str, Any] = {"fields": {}, "inputs": {}, "ran": [], "degraded": [], "category": None}
+
+    async def run(node: str) -> Dict[str, Any]:
+        result = dict(await NODES[node](state))
+        degraded = result.pop("degraded", None) or []
+        state.update(result)
+        analysis["ran"].append(node)
+        analysis["degraded"].extend(degraded)
+        if not degraded:
+            analysis["inputs"][node] = fingerprints[node]
+        return result
+
+    if previous_inputs.get("collector") == fingerprints["collector"] and previous_quality is not None:
+        state["quality_score"] = previous_quality
+        analysis["inputs"]["collector"] = fingerprints["collector"]
+    else:
+        await run("collector")
+    analysis["fields"]["quality_score"] = state["quality_score"]
+
+    if state["quality_score"] < QUALITY_THRESHOLD:
+        # Rejected: clear whatever an earlier version of the article produced
+        analysis["fields"].update({field: None for fields in NODE_FIELDS.values() for field in fields})
+        analysis["complete"] = "collector" in analysis["inputs"]
+        return analysis
+
+    for node, fields in NODE_FIELDS.items():
+        if previous_inputs.get(node) == fingerprints[node]:
+            analysis["inputs"][node] = fingerprints[node]
+            continue
+        result = await run(node)
+        analysis["fields"].update({field: result.get(field) for field in fields})
+        if node == "classifier":
+            analysis["category"] = result.get("category")
+    analysis["complete"] = set(analysis["inputs"]) == set(NODES)
+    return analysis
+
+
+async def category_ids(db: AsyncSession, names: Iterable[str]) -> Dict[str, int]:
+    """
+    Ids of the named categories, creating missing ones. Safe against other
+    workers creating the same names concurrently. Does not commit.
+    """
+    names = {n for n in names if n}
+    if not names:
+        return {}
+    # Sorted, so concurrent inserts take the unique index locks in the same order
+    await db.execute(
+        insert(NewsCategory)
+        .values([{"name": name} for name in sorted(names)])
+        .on_conflict_do_nothing(index_elements=["name"])
+    )
+    result = await db.execute(select(NewsCategory.name, NewsCategory.id).where(NewsCategory.name.in_(names)))
+    return dict(result.all())
+
+
+async def apply_analysis(db: AsyncSession, row: NewsArticle, analysis: Dict[str, Any]) -> None:
+    """
+    Writes an analyse_article() result to the row. The classifier's category
+    only fills rows without a source category. Does not commit.
+    """
+    for field, value in analysis["fields"].items():
+        setattr(row, field, value)
+    if row.category_id is None and analysis["category"]:
+        row.category_id = (await category_ids(db, [analysis["category"]]))[analysis["category"]]
+    row.analysis_inputs = analysis["inputs"]
+    row.analysis_fingerprint = row.content_fingerprint
+    # Incomplete runs stay stale, so the backfill retries their degraded nodes
+    row.analysis_version = current_analysis_version() if analysis["complete"] else None
+    row.analyzed_at = datetime.now(timezone.utc)
+    metrics.incr("analysis_store.analysed")
+    metrics.incr("analysis_store.nodes_run", len(analysis["ran"]))
+    metrics.incr("analysis_store.nodes_skipped", len(NODES) - len(analysis["ran"]))
+
+
+def _published_at(article: Dict[str, Any]) -> datetime:
+    try:
+        # 2024-01-27 10:00:00 +0000
+        return datetime.strptime(article.get("published"), "%Y-%m-%d %H:%M:%S %z")
+    except Exception:
+        return datetime.now(timezone.utc)
+
+
+async def ingest_articles(db: AsyncSession, articles: List[Dict[str, Any]]) -> int:
+    """
+    Upserts fetched Currents articles into news_articles by url, in one
+    INSERT ... ON CONFLICT so overlapping batches from several workers do
+    not collide. Existing rows are only rewritten when their text changed,
+    which makes their analysis stale. Returns how many rows were added or
+    changed. Does not commit.
+    """
+    by_url = {a["url"]: a for a in articles if a.get("url") and a.get("title")}
+    if not by_url:
+        return 0
+
+    def first_category(article: Dict[str, Any]) -> Optional[str]:
+        categories = article.get("category") or []
+        if isinstance(categories, str):
+            categories = [categories]
+        return categories[0].lower() if categories else None
+
+    categories = await category_ids(db, (first_category(a) for a in by_url.values()))
+    rows = []
+    for url in sorted(by_url):
+        article = by_url[url]
+        rows.append({
+            "id": uuid.uuid4(),
+            "title": article["title"],
+            "description": article.get("description"),
+            "content": article.get("content") or None,
+            "url": url,
+            "image": article.get("image") or None,
+            "published_at": _published_at(article),
+            "author": article.get("author"),
+            "category_id": categories.get(first_category(article)),
+            "content_fingerprint": content_fingerprint(article["title"], article_text(article.get("content"), article.get("description"))),
+        })
+    statement = insert(NewsArticle).values(rows)
+    statement = statement.on_conflict_do_update(
+        index_elements=["url"],
+        set_={
+            "title": statement.excluded.title,
+            "description": statement.excluded.description,
+            "content": func.coalesce(statement.excluded.content, NewsArticle.content),
+            "image": func.coalesce(statement.excluded.image, NewsArticle.image),
+            "content_fingerprint": statement.excluded.content_fingerprint,
+        },
+        # Unchanged text: leave the row (and its analysis) alone
+        where=NewsArticle.content_fingerprint.is_distinct_from(statement.excluded.content_fingerprint),
+    ).returning(NewsArticle.id)
+    changed = len((await db.execute(statement)).all())
+    metrics.incr("analysis_store.ingested", changed)
+    return changed
+
+
+async def _persist(articles: List[Dict[str, Any]]) -> None:
+    from app.db.session import AsyncSessionLocal
+
+    try:
+        async with AsyncSessionLocal() as db:
+            await ingest_articles(db, articles)
+            await db.commit()
+    except Exception as e:
+        print(f"Error persisting articles: {e}")
+
+
+def persist_articles(articles: List[Dict[str, Any]]) -> None:
+    """
+    Stores fetched articles in the background, off the news request.
+    """
+    task = asyncio.get_running_loop().create_task(_persist(articles))
+    _persist_tasks.add(task)
+    task.add_done_callback(_persist_tasks.discard)
+
+
+async def analyse_rows(db: AsyncSession, rows: List[Any]) -> Dict[str, int]:
+    """
+    Re-analyses (article, source category name) rows: LLM work runs
+    concurrently within the batch concurrency limit, results are written
+    one by one. Failed rows stay stale; rate limits and overload are
+    re-raised after the rest of the batch is written. Does not commit.
+    """
+    from app.services.ai_agents.runner import batch_semaphore
+
+    for article, _ in rows:
+        if article.content_fingerprint is None:
+            article.content_fingerprint = content_fingerprint(article.title, article_text(article.content, article.description))
+
+    async def one(article: NewsArticle, category: Optional[str]) -> Dict[str, Any]:
+        async with batch_semaphore:
+            return await analyse_article(
+                str(article.id),
+                article.title,
+                article_text(article.content, article.description),
+                category,
+                article.analysis_inputs,
+                article.quality_score,
+            )
+
+    results = await asyncio.gather(*(one(article, category) for article, category in rows), return_exceptions=True)
+    stats = {"analysed": 0, "failed": 0, "nodes_run": 0}
+    overloaded = None
+    for (article, _), result in zip(rows, results):
+        if isinstance(result, Exception):
+            print(f"Analysis failed for {article.url}: {result}")
+            stats["failed"] += 1
+            if getattr(result, "status_code", None) in (429, 503):
+                overloaded = result
+            continue
+        await apply_analysis(db, article, result)
+        stats["analysed"] += 1
+        stats["nodes_run"] += len(result["ran"])
+    if overloaded is not None:
+        raise overloaded
+    return stats
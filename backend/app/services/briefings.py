@@ -0,0 +1,259 @@
+import asyncio
+import time
+from datetime import datetime, timezone
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional
+
+from langchain_core.prompts import ChatPromptTemplate
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.core.metrics import metrics
+from app.services.ai_agents.cache import content_hash
+from app.services.ai_agents.deadline import DeadlineExceeded
+from app.services.ai_agents.nodes import STR_PARSER, call_llm_with_rotation
+from app.services.ai_agents.response_cache import ResponseCache
+from app.services.ai_agents.usage import usage_stage
+
+BRIEFING_PROMPT = ChatPromptTemplate.from_template(
+    "Summarize the following latest news highlights into a single cohesive daily briefing paragraph.\n\nNews:\n{news}"
+)
+DELTA_BRIEFING_PROMPT = ChatPromptTemplate.from_template(
+    "Here is the current news briefing:\n{briefing}\n\n"
+    "Update it to include the newly arrived stories below. Keep it a single cohesive paragraph "
+    "of similar length and drop points the new stories supersede.\n\nNew stories:\n{news}"
+)
+MERGE_BRIEFINGS_PROMPT = ChatPromptTemplate.from_template(
+    "Merge these per-category news briefings into one short overall briefing paragraph "
+    "that leads with the most important stories.\n\n{sections}"
+)
+# Bump when the briefing prompts change so stored briefings are not reused
+BRIEFING_PROMPT_VERSION = "1"
+BRIEFING_ARTICLES = 5
+MAX_BRIEFING_CATEGORIES = 5  # Premium users follow up to 5 categories
+
+# One briefing per (category, language, time bucket), shared by every user mapping to it
+briefing_cache = ResponseCache(
+    "briefing",
+    memory_size=settings.BRIEFING_CACHE_MEMORY_SIZE,
+    ttl_seconds=settings.BRIEFING_BUCKET_SECONDS,
+    max_rows=settings.BRIEFING_CACHE_MAX_ROWS,
+)
+# Most recent briefing per (category, language) across buckets: the base for delta updates
+latest_briefings = ResponseCache(
+    "briefing_latest",
+    memory_size=settings.BRIEFING_CACHE_MEMORY_SIZE,
+    ttl_seconds=settings.BRIEFING_DELTA_TTL_SECONDS,
+    max_rows=settings.BRIEFING_CACHE_MAX_ROWS,
+)
+LATEST_BUCKET = -1
+_inflight: Dict[str, asyncio.Task] = {}
+
+
+def time_bucket(now: Optional[float] = None) -> int:
+    return int((now if now is not None else time.time()) // settings.BRIEFING_BUCKET_SECONDS)
+
+
+def briefing_key(category: Optional[str], language: str, bucket: int) -> str:
+    return content_hash(
+        "briefing",
+        category or "all",
+        language,
+        str(bucket),
+        f"{settings.LLM_BACKEND}:{settings.GEMINI_MODEL}",
+        BRIEFING_PROMPT_VERSION,
+    )
+
+
+def _article_id(article: Dict[str, Any]) -> str:
+    return str(article.get("id") or article.get("url") or article.get("title"))
+
+
+def _combine(articles: List[Dict[str, Any]]) -> str:
+    return "\n\n".join([f"Title: {a.get('title')}\nSummary: {a.get('description')}" for a in articles])
+
+
+async def generate_briefing(
+    category: Optional[str],
+    language: str = "en",
+    previous: Optional[Dict[str, Any]] = None,
+) -> Dict[str, Any]:
+    """
+    Fetches the top articles for the category and summarises them. If the
+    deadline runs out the headlines are returned and marked degraded.
+
+    Given the previous briefing for the category, only newly arrived
+    articles are folded into it (mode "delta"); it is reused as is when
+    nothing changed, and regenerated in full once more than
+    BRIEFING_DELTA_MAX_TURNOVER of the articles are new or after
+    BRIEFING_MAX_DELTAS consecutive deltas.
+    """
+    from app.services.currents import currents_service
+
+    articles = (await currents_service.fetch_latest_news(language=language, category=category))[:BRIEFING_ARTICLES]
+    if not articles:
+        return {"summary": "No news in your feed.", "category": category, "degraded": ["empty"]}
+
+    article_ids = [_article_id(a) for a in articles]
+    mode, deltas = "full", 0
+    new_articles = articles
+    if previous and previous.get("article_ids"):
+        covered = set(previous["article_ids"])
+        new_articles = [a for a, aid in zip(articles, article_ids) if aid not in covered]
+        if not new_articles:
+            metrics.incr("briefings.unchanged")
+            return {**previous, "mode": "unchanged"}
+        turnover = len(new_articles) / len(articles)
+        if turnover <= settings.BRIEFING_DELTA_MAX_TURNOVER and previous.get("deltas", 0) < settings.BRIEFING_MAX_DELTAS:
+            mode, deltas = "delta", previous.get("deltas", 0) + 1
+        else:
+            new_articles = articles
+
+    try:
+        with usage_stage(f"briefing.{mode}"):
+            if mode == "delta":
+                summary_text = await call_llm_with_rotation(
+                    DELTA_BRIEFING_PROMPT,
+                    STR_PARSER,
+                    {"briefing": previous["summary"], "news": _combine(new_articles)}
+                )
+            else:
+                summary_text = await call_llm_with_rotation(BRIEFING_PROMPT, STR_PARSER, {"news": _combine(articles)})
+    except (asyncio.TimeoutError, DeadlineExceeded):
+        headlines = "\n".join(f"- {a.get('title')}" for a in articles)
+        return {"summary": f"Today's top headlines:\n{headlines}", "category": category, "degraded": ["summary"]}
+
+    metrics.incr("briefings.generated")
+    metrics.incr(f"briefings.{mode}")
+    return {
+        "summary": summary_text,
+        "category": category,
+        "article_ids": article_ids,
+        "mode": mode,
+        "deltas": deltas,
+        "generated_at": datetime.now(timezone.utc).isoformat(),
+    }
+
+
+async def get_briefing(
+    db: AsyncSession,
+    category: Optional[str],
+    language: str = "en",
+    refresh: bool = False,
+) -> Dict[str, Any]:
+    """
+    Shared briefing for the current time bucket. With refresh the bucket
+    cache is skipped and the latest briefing is brought up to date
+    incrementally (see generate_briefing). Concurrent misses for the same
+    key share one generation; degraded briefings are not stored.
+    """
+    key = briefing_key(category, language, time_bucket())
+    if not refresh:
+        cached = await briefing_cache.get(db, key, label=category or "all")
+        if cached is not None:
+            return cached
+
+    latest_key = briefing_key(category, language, LATEST_BUCKET)
+    flight_key = f"refresh:{key}" if refresh else key
+    task = _inflight.get(flight_key)
+    owner = task is None
+    if owner:
+        previous = await latest_briefings.get(db, latest_key, label=category or "all")
+        task = asyncio.create_task(generate_briefing(category, language, previous))
+        _inflight[flight_key] = task
+        task.add_done_callback(lambda _: _inflight.pop(flight_key, None))
+    briefing = await asyncio.shield(task)
+
+    if owner and not briefing.get("degraded"):
+        await briefing_cache.set(db, key, briefing)
+        if briefing.get("mode") != "unchanged":
+            await latest_briefings.set(db, latest_key, briefing)
+        await db.commit()
+    return briefing
+
+
+async def _section(category: Optional[str], language: str, refresh: bool, session_factory: Callable) -> tuple:
+    # Each section uses its own session: AsyncSession must not be shared between tasks
+    async with session_factory() as db:
+        try:
+            return category, await get_briefing(db, category, language, refresh=refresh)
+        except Exception as e:
+            from app.services.ai_agents.errors import handle_ai_error
+
+            print(f"Briefing section error ({category}): {e}")
+            _, detail = handle_ai_error(e)
+            return category, {"summary": None, "category": category, "degraded": ["error"], "error": detail}
+
+
+async def merge_sections(db: AsyncSession, sections: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Reduce step: one short LLM call over the section summaries, cached by
+    their content. Out of time, the sections are joined instead.
+    """
+    if len(sections) == 1:
+        return {"summary": sections[0]["summary"]}
+    rendered = "\n\n".join(f"{s['category'] or 'Top stories'}:\n{s['summary']}" for s in sections)
+    key = content_hash("merge", rendered, f"{settings.LLM_BACKEND}:{settings.GEMINI_MODEL}", BRIEFING_PROMPT_VERSION)
+    cached = await briefing_cache.get(db, key, label="merge")
+    if cached is not None:
+        return cached
+    try:
+        with usage_stage("briefing.merge"):
+            summary_text = await call_llm_with_rotation(MERGE_BRIEFINGS_PROMPT, STR_PARSER, {"sections": rendered})
+    except (asyncio.TimeoutError, DeadlineExceeded):
+        return {"summary": rendered, "degraded": ["merge"]}
+    merged = {"summary": summary_text}
+    await briefing_cache.set(db, key, merged)
+    await db.commit()
+    return merged
+
+
+async def stream_multi_briefing(
+    categories: List[Optional[str]],
+    language: str = "en",
+    refresh: bool = False,
+    session_factory: Optional[Callable] = None,
+) -> AsyncIterator[Dict[str, Any]]:
+    """
+    Map-reduce briefing over several categories. Per-category briefings
+    (shared and cached, see get_briefing) are built concurrently and yielded
+    as "section" events in completion order, followed by a "complete" event
+    with the merged briefing. Sections come from the bucket cache unless
+    refresh is set.
+    """
+    if session_factory is None:
+        from app.db.session import AsyncSessionLocal as session_factory
+
+    tasks = [asyncio.create_task(_section(c, language, refresh, session_factory)) for c in categories]
+    sections: Dict[Optional[str], Dict[str, Any]] = {}
+    try:
+        for next_section in asyncio.as_completed(tasks):
+            category, briefing = await next_section
+            sections[category] = briefing
+            event = {"status": "section", "category": category, "summary": briefing["summary"]}
+            if briefing.get("degraded"):
+                event["degraded"] = briefing["degraded"]
+            if briefing.get("error"):
+                event["error"] = briefing["error"]
+            yield event
+    finally:
+        # Client went away: stop waiting (shared generations keep running)
+        for task in tasks:
+            task.cancel()
+
+    # Merge in the user's category order
+    usable = [
+        sections[c] for c in categories
+        if sections[c].get("summary") and not {"empty", "error"} & set(sections[c].get("degraded", []))
+    ]
+    if not usable:
+        yield {"status": "error", "error_code": "AI_SERVICE_ERROR", "message": "No briefing sections could be generated."}
+        return
+
+    async with session_factory() as db:
+        merged = await merge_sections(db, usable)
+    yield {
+        "status": "complete",
+        "summary": merged["summary"],
+        "sections": [{"category": s["category"], "summary": s["summary"]} for s in usable],
+        "degraded": merged.get("degraded", []),
+    }
@@ -150,9 +150,35 @@ class CurrentsService:
             self.provider = TestNewsProvider()
             
     async def fetch_latest_news(self, language: str = "en", category: Optional[str] = None) -> List[Dict[str, Any]]:
-        return await self.provider.fetch_latest_news(language, category)
+        articles = await self.provider.fetch_latest_news(language, category)
+        self._ingest(articles)
+        return articles
 
     async def fetch_search_news(self, keywords: str, language: str = "en", category: Optional[str] = None) -> List[Dict[str, Any]]:
-        return await self.provider.fetch_search_news(keywords, language, category)
+        articles = await self.provider.fetch_search_news(keywords, language, category)
+        self._ingest(articles)
+        return articles
+
+    def _ingest(self, articles: List[Dict[str, Any]]):
+        """
+        Queues fetched articles for background ingestion (retrieval index,
+        story clusters, trending topics, similar articles), offers them for
+        speculative pre-analysis, and with PERSIST_ARTICLES stores them for
+        the analysis backfill. Ingestion problems never fail the news request.
+        """
+        from app.services.ingestion import article_ingestion
+        try:
+            article_ingestion.submit(articles)
+        except Exception as e:
+            print(f"Error queueing articles for ingestion: {e}")
+        if settings.SPECULATIVE_ENABLED:
+            from app.services.ai_agents.speculative import speculative_analyser
+            speculative_analyser.offer(articles)
+        if settings.PERSIST_ARTICLES:
+            from app.services.analysis_store import persist_articles
+            try:
+                persist_articles(articles)
+            except Exception as e:
+                print(f"Error persisting articles: {e}")
     
 currents_service = CurrentsService()
@@ -0,0 +1,248 @@
+import asyncio
+import random
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional, Tuple
+
+from sqlalchemy import func, or_, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.core.metrics import metrics
+from app.models.daily_cache import UserDailyCache
+from app.models.news import UserPreference
+from app.models.user import User
+from app.schemas.news import News as NewsSchema
+
+FREE_FEED_ARTICLES = 2
+DAILY_CACHE_HOURS = 24
+
+
+def _parse_published(item: Dict[str, Any]) -> Optional[datetime]:
+    try:
+        # 2024-01-27 10:00:00 +0000
+        return datetime.strptime(item.get("published"), "%Y-%m-%d %H:%M:%S %z")
+    except Exception:
+        return None
+
+
+def build_feed_items(raw_news: List[Dict[str, Any]]) -> List[NewsSchema]:
+    """
+    Currents articles -> feed items: deduplicated by id/url, newest first.
+    """
+    unique_news = []
+    seen = set()
+    for item in raw_news:
+        uid = item.get("id") or item.get("url")
+        if uid and uid not in seen:
+            seen.add(uid)
+            unique_news.append(item)
+
+    # Mock data might not have dates, so undated items go last
+    unique_news.sort(key=lambda x: _parse_published(x) or datetime.min.replace(tzinfo=timezone.utc), reverse=True)
+
+    articles = []
+    for item in unique_news:
+        articles.append(NewsSchema(
+            id=item.get("id") or str(uuid.uuid4()),
+            title=item.get("title", "No Title"),
+            description=item.get("description", ""),
+            url=item.get("url", "#"),
+            image=item.get("image", None),
+            published_at=_parse_published(item) or datetime.now(),
+            author=item.get("author", "Unknown"),
+            category=item.get("category", []),
+            story_id=item.get("story_id"),
+            related=item.get("related", []),
+            # Defaults
+            sentiment=None,
+            tags=[],
+            summary_short=None,
+            summary_detail=None,
+            bias_score=None
+        ))
+    return articles
+
+
+async def store_daily_cache(db: AsyncSession, user_id: Any, **fields: Any) -> UserDailyCache:
+    """
+    Upserts the user's daily cache row with the given fields (news_feed
+    and/or summary) and restarts its 24h expiry. Does not commit.
+    """
+    now = datetime.now(timezone.utc)
+    result = await db.execute(select(UserDailyCache).where(UserDailyCache.user_id == user_id))
+    user_cache = result.scalars().first()
+    if user_cache:
+        for name, value in fields.items():
+            setattr(user_cache, name, value)
+        user_cache.expires_at = now + timedelta(hours=DAILY_CACHE_HOURS)
+        if "news_feed" in fields:
+            user_cache.created_at = now
+    else:
+        user_cache = UserDailyCache(
+            user_id=user_id,
+            news_feed=fields.get("news_feed"),
+            summary=fields.get("summary"),
+            expires_at=now + timedelta(hours=DAILY_CACHE_HOURS)
+        )
+        db.add(user_cache)
+    return user_cache
+
+
+async def prewarm_candidates(db: AsyncSession, limit: int) -> List[Tuple[Any, Optional[str]]]:
+    """
+    Free users active in the last PREWARM_ACTIVE_DAYS whose daily cache is
+    missing or expires within PREWARM_LEAD_HOURS, most recently active first.
+    Caches always expire DAILY_CACHE_HOURS after they are written, so caches
+    written within the last DAILY_CACHE_HOURS - PREWARM_LEAD_HOURS hours
+    still cover the coming day and are skipped.
+    Returns (user_id, first favourite category) pairs.
+    """
+    now = datetime.now(timezone.utc)
+    last_active = func.greatest(
+        func.coalesce(User.last_news_refresh_date, User.created_at),
+        func.coalesce(User.last_summary_refresh_date, User.created_at),
+    )
+    result = await db.execute(
+        select(User.id, UserPreference.favorite_categories)
+        .outerjoin(UserPreference, UserPreference.user_id == User.id)
+        .outerjoin(UserDailyCache, UserDailyCache.user_id == User.id)
+        .where(User.is_active == True)
+        .where(User.is_premium == False)
+        .where(last_active >= now - timedelta(days=settings.PREWARM_ACTIVE_DAYS))
+        .where(or_(UserDailyCache.id.is_(None), UserDailyCache.expires_at < now + timedelta(hours=settings.PREWARM_LEAD_HOURS)))
+        .order_by(last_active.desc())
+        .limit(limit)
+    )
+    return [(user_id, categories[0] if categories else None) for user_id, categories in result.all()]
+
+
+def schedule_offsets(count: int, window_seconds: float, rng: random.Random) -> List[float]:
+    """
+    Start offsets spreading count jobs over the window: each job gets its
+    own slot (in priority order) with a random position inside it.
+    """
+    if count == 0:
+        return []
+    slot = window_seconds / count
+    return [i * slot + rng.uniform(0, slot) for i in range(count)]
+
+
+def seconds_until_window(now: datetime, start_hour: int) -> float:
+    start = now.replace(hour=start_hour, minute=0, second=0, microsecond=0)
+    if start <= now:
+        start += timedelta(days=1)
+    return (start - now).total_seconds()
+
+
+class DailyPrewarmer:
+    """
+    Pre-generates free users' daily feeds and briefings during an off-peak
+    window so their first load of the day is a cache hit.
+
+    Users are processed most recently active first, spread with jitter
+    across the window. Feeds and briefings are fetched once per category
+    per run. Briefing generation runs at background LLM priority and stops
+    once the run has spent its LLM call budget (PREWARM_LLM_CALLS_PER_KEY
+    per configured key) or the LLM reports rate limits/overload; remaining
+    users still get their feed.
+    """
+
+    def __init__(self, window_start_hour: int, window_minutes: int, max_users: int, llm_calls_per_key: int):
+        self.window_start_hour = window_start_hour
+        self.window_seconds = window_minutes * 60
+        self.max_users = max_users
+        self.llm_calls_per_key = llm_calls_per_key
+        self.rng = random.Random()
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self) -> None:
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._loop())
+
+    async def shutdown(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    async def _loop(self) -> None:
+        from app.db.session import AsyncSessionLocal
+
+        while True:
+            await asyncio.sleep(seconds_until_window(datetime.now(timezone.utc), self.window_start_hour))
+            try:
+                async with AsyncSessionLocal() as db:
+                    stats = await self.run_once(db)
+                print(f"Daily prewarm finished: {stats}")
+            except Exception as e:
+                print(f"Daily prewarm failed: {e}")
+
+    async def run_once(self, db: AsyncSession, spread: bool = True) -> Dict[str, int]:
+        from app.services.ai_agents.admission import llm_priority, priority_scope
+        from app.services.ai_agents.llm_backends import llm_backend
+        from app.services.ai_agents.usage import track_usage
+        from app.services.briefings import get_briefing
+        from app.services.currents import currents_service
+
+        candidates = await prewarm_candidates(db, self.max_users)
+        offsets = schedule_offsets(len(candidates), self.window_seconds if spread else 0, self.rng)
+        llm_budget = llm_backend.key_count() * self.llm_calls_per_key
+        feeds: Dict[Optional[str], Optional[list]] = {}
+        summaries: Dict[Optional[str], Optional[dict]] = {}
+        stats = {"users": 0, "feeds": 0, "summaries": 0, "llm_calls": 0}
+        llm_stopped = False
+
+        started = time.monotonic()
+        with priority_scope(llm_priority(False, interactive=False)), track_usage("prewarm") as usage:
+            for (user_id, category), offset in zip(candidates, offsets):
+                delay = started + offset - time.monotonic()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+
+                if category not in feeds:
+                    try:
+                        raw_news = await currents_service.fetch_latest_news(category=category)
+                        items = build_feed_items(raw_news)[:FREE_FEED_ARTICLES]
+                        feeds[category] = [a.model_dump(mode='json') for a in items] or None
+                    except Exception as e:
+                        print(f"Prewarm feed error ({category}): {e}")
+                        feeds[category] = None
+
+                if category not in summaries and not llm_stopped:
+                    if usage.llm_calls >= llm_budget:
+                        llm_stopped = True
+                    else:
+                        try:
+                            briefing = await get_briefing(db, category)
+                            summaries[category] = None if briefing.get("degraded") else {"summary": briefing["summary"]}
+                        except Exception as e:
+                            print(f"Prewarm briefing error ({category}): {e}")
+                            summaries[category] = None
+                            if getattr(e, "status_code", None) in (429, 503):
+                                llm_stopped = True
+
+                feed = feeds.get(category)
+                summary = summaries.get(category)
+                if feed is None and summary is None:
+                    continue
+                # Both fields are written so an older summary is not served with a fresh expiry
+                await store_daily_cache(db, user_id, news_feed=feed, summary=summary)
+                await db.commit()
+                stats["users"] += 1
+                stats["feeds"] += feed is not None
+                stats["summaries"] += summary is not None
+            stats["llm_calls"] = usage.llm_calls
+
+        for name, value in stats.items():
+            metrics.incr(f"prewarm.{name}", value)
+        return stats
+
+
+daily_prewarmer = DailyPrewarmer(
+    window_start_hour=settings.PREWARM_WINDOW_START_HOUR,
+    window_minutes=settings.PREWARM_WINDOW_MINUTES,
+    max_users=settings.PREWARM_MAX_USERS,
+    llm_calls_per_key=settings.PREWARM_LLM_CALLS_PER_KEY,
+)
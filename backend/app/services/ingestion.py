@@ -0,0 +1,113 @@
+import asyncio
+from typing import Any, Dict, List, Optional
+
+from app.core.config import settings
+from app.core.metrics import metrics
+
+
+def process_articles(articles: List[Dict[str, Any]]) -> None:
+    """
+    CPU-bound ingestion of one fetched batch: the retrieval index used by
+    /ai/ask, story clusters, trending topics and the similar-articles index.
+    Each step fails on its own without affecting the others.
+    """
+    from app.services.ai_agents.retrieval import index_articles
+    from app.services.ai_agents.clustering import story_clusters
+    from app.services.ai_agents.trending import trending
+    from app.services.ai_agents.neighbours import index_similar_articles
+    try:
+        index_articles(articles)
+    except Exception as e:
+        print(f"Error indexing articles: {e}")
+    try:
+        story_clusters.add_articles(articles)
+    except Exception as e:
+        print(f"Error clustering articles: {e}")
+    try:
+        trending.record_articles(articles)
+    except Exception as e:
+        print(f"Error recording trending topics: {e}")
+    try:
+        index_similar_articles(articles)
+    except Exception as e:
+        print(f"Error indexing similar articles: {e}")
+
+
+class ArticleIngestion:
+    """
+    Runs ingestion of fetched articles off the news request: batches are
+    queued and processed one at a time by a single consumer task in a worker
+    thread, so the in-memory indexes have one writer. A full queue drops the
+    batch (the same articles come back with the next fetch).
+    """
+
+    def __init__(self, max_size: int):
+        self.max_size = max_size
+        self._queue: Optional[asyncio.Queue] = None
+        self._task: Optional[asyncio.Task] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    def _ensure_consumer(self) -> asyncio.Queue:
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            # Queues are bound to their event loop (tests run several)
+            self._queue = asyncio.Queue(self.max_size)
+            self._task = None
+            self._loop = loop
+        if self._task is None or self._task.done():
+            self._task = loop.create_task(self._consume())
+        return self._queue
+
+    def submit(self, articles: List[Dict[str, Any]]) -> bool:
+        """
+        Queues a fetched batch; returns False when it was dropped.
+        """
+        if not articles:
+            return True
+        queue = self._ensure_consumer()
+        try:
+            queue.put_nowait(articles)
+        except asyncio.QueueFull:
+            metrics.incr("ingestion.dropped")
+            return False
+        metrics.set_gauge("ingestion.queued", queue.qsize())
+        return True
+
+    async def _consume(self) -> None:
+        queue = self._queue
+        while True:
+            articles = await queue.get()
+            try:
+                await asyncio.to_thread(process_articles, articles)
+                metrics.incr("ingestion.batches")
+            except Exception as e:
+                print(f"Error ingesting articles: {e}")
+            finally:
+                queue.task_done()
+                metrics.set_gauge("ingestion.queued", queue.qsize())
+
+    async def drain(self, timeout: float) -> bool:
+        """
+        Waits up to timeout seconds for queued batches to be processed;
+        returns False on timeout.
+        """
+        if self._queue is None or self._loop is not asyncio.get_running_loop():
+            return True
+        try:
+            await asyncio.wait_for(self._queue.join(), timeout)
+            return True
+        except asyncio.TimeoutError:
+            metrics.incr("ingestion.drain_timeouts")
+            return False
+
+    def start(self) -> None:
+        self._ensure_consumer()
+
+    async def shutdown(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+
+article_ingestion = ArticleIngestion(settings.INGEST_QUEUE_SIZE)
@@ -0,0 +1,241 @@
+import asyncio
+import time
+import uuid
+from abc import ABC, abstractmethod
+from collections import deque
+from typing import Any, AsyncIterator, Awaitable, Callable, Deque, Dict, Optional, Tuple
+
+from app.core.config import settings
+
+
+class JobQueueFull(Exception):
+    pass
+
+
+class TooManyJobs(Exception):
+    pass
+
+
+class EventLog:
+    """
+    Bounded ring buffer of events with increasing ids.
+    Subscribers can attach at any point and resume after a given event id;
+    events that already fell out of the buffer are skipped.
+    """
+
+    def __init__(self, maxlen: int):
+        self._events: Deque[Tuple[int, Dict[str, Any]]] = deque(maxlen=maxlen)
+        self._last_id = 0
+        self._cond = asyncio.Condition()
+        self.closed = False
+
+    @property
+    def last_id(self) -> int:
+        return self._last_id
+
+    async def publish(self, event: Dict[str, Any]) -> int:
+        async with self._cond:
+            self._last_id += 1
+            self._events.append((self._last_id, event))
+            self._cond.notify_all()
+            return self._last_id
+
+    async def close(self) -> None:
+        async with self._cond:
+            self.closed = True
+            self._cond.notify_all()
+
+    async def subscribe(self, last_event_id: int = 0) -> AsyncIterator[Tuple[int, Dict[str, Any]]]:
+        cursor = last_event_id
+        while True:
+            async with self._cond:
+                await self._cond.wait_for(lambda: self._last_id > cursor or self.closed)
+                pending = [(i, e) for i, e in self._events if i > cursor]
+                done = self.closed
+            for event_id, event in pending:
+                cursor = event_id
+                yield event_id, event
+            if done and cursor >= self._last_id:
+                return
+
+
+class Job:
+    def __init__(self, user_id: Any, payload: Dict[str, Any], buffer_size: int, usage_log_id: Any = None):
+        self.id = uuid.uuid4().hex
+        self.user_id = user_id
+        self.payload = payload
+        # AIUsageLog row reserved at submit time; filled in or released by the handler
+        self.usage_log_id = usage_log_id
+        self.status = "queued"  # queued, running, complete, failed
+        self.result: Optional[Dict[str, Any]] = None
+        self.error: Optional[Dict[str, Any]] = None
+        self.events = EventLog(buffer_size)
+        self.created_at = time.time()
+        self.finished_at: Optional[float] = None
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "job_id": self.id,
+            "status": self.status,
+            "result": self.result,
+            "error": self.error,
+            "last_event_id": self.events.last_id,
+        }
+
+
+JobHandler = Callable[[Job], Awaitable[None]]
+
+
+class JobBackend(ABC):
+    """
+    Queue backend interface. The local backend keeps everything in process;
+    an external backend (e.g. Redis streams) would persist jobs and events.
+    """
+
+    @abstractmethod
+    async def submit(self, user_id: Any, payload: Dict[str, Any], usage_log_id: Any = None) -> Job:
+        pass
+
+    @abstractmethod
+    def get(self, job_id: str) -> Optional[Job]:
+        pass
+
+    @abstractmethod
+    async def shutdown(self) -> None:
+        pass
+
+
+class LocalJobBackend(JobBackend):
+    def __init__(self, handler: JobHandler, workers: int, max_queue_size: int, buffer_size: int, retention_seconds: int, max_per_user: int = 0):
+        self.handler = handler
+        self.workers = workers
+        self.max_per_user = max_per_user
+        self.buffer_size = buffer_size
+        self.retention_seconds = retention_seconds
+        self._queue: asyncio.Queue = asyncio.Queue(maxsize=max_queue_size)
+        self._jobs: Dict[str, Job] = {}
+        self._tasks: list = []
+
+    def _ensure_workers(self):
+        # Workers are started lazily so they bind to the running event loop.
+        self._tasks = [t for t in self._tasks if not t.done()]
+        for _ in range(self.workers - len(self._tasks)):
+            self._tasks.append(asyncio.create_task(self._worker()))
+
+    def _prune(self):
+        cutoff = time.time() - self.retention_seconds
+        expired = [jid for jid, j in self._jobs.items() if j.finished_at and j.finished_at < cutoff]
+        for jid in expired:
+            del self._jobs[jid]
+
+    def active_jobs(self, user_id: Any) -> int:
+        return sum(1 for j in self._jobs.values() if j.user_id == user_id and j.status in ("queued", "running"))
+
+    async def submit(self, user_id: Any, payload: Dict[str, Any], usage_log_id: Any = None) -> Job:
+        self._prune()
+        self._ensure_workers()
+        if self.max_per_user and self.active_jobs(user_id) >= self.max_per_user:
+            raise TooManyJobs(f"You already have {self.max_per_user} AI jobs in progress. Please wait for them to finish.")
+        job = Job(user_id, payload, self.buffer_size, usage_log_id)
+        try:
+            self._queue.put_nowait(job)
+        except asyncio.QueueFull:
+            raise JobQueueFull("AI job queue is full. Please try again later.")
+        self._jobs[job.id] = job
+        await job.events.publish({"status": "queued", "message": "Waiting for an available AI worker..."})
+        return job
+
+    def get(self, job_id: str) -> Optional[Job]:
+        return self._jobs.get(job_id)
+
+    async def _worker(self):
+        while True:
+            job = await self._queue.get()
+            job.status = "running"
+            try:
+                await self.handler(job)
+                if job.status == "running":
+                    job.status = "complete"
+            except asyncio.CancelledError:
+                job.status = "failed"
+                raise
+            except Exception as e:
+                print(f"Job {job.id} failed: {e}")
+                job.status = "failed"
+                job.error = {"error_code": "AI_SERVICE_ERROR", "message": str(e)}
+                await job.events.publish({"status": "error", **job.error})
+            finally:
+                job.finished_at = time.time()
+                await job.events.close()
+                self._queue.task_done()
+
+    async def shutdown(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+
+async def process_article_job(job: Job) -> None:
+    """
+    Runs the analysis graph for a queued article. The usage row reserved at
+    submit time gets the run's real usage; it is released when the job fails
+    or made no graph run of its own (cache hit, shared run).
+    """
+    from app.services.ai_agents.admission import llm_priority, priority_scope
+    from app.services.ai_agents.broadcast import article_runs
+
+    usage = None
+    try:
+        with priority_scope(llm_priority(job.payload.get("is_premium", False), interactive=False)):
+            async for event in article_runs.stream(job.payload):
+                if event["status"] == "complete":
+                    job.result = event["article"]
+                    if not event.get("cached") and not event.get("shared"):
+                        usage = event.get("usage") or {}
+                elif event["status"] == "error":
+                    job.status = "failed"
+                    job.error = {"error_code": event.get("error_code"), "message": event.get("message")}
+                await job.events.publish(event)
+    finally:
+        await settle_job_usage(job, usage)
+
+
+async def settle_job_usage(job: Job, usage: Optional[Dict[str, Any]]) -> None:
+    """
+    Fills in the job's reserved usage row, or deletes it when usage is None.
+    """
+    from app.db.session import AsyncSessionLocal
+    from app.models.payment import AIUsageLog
+    from app.services.ai_agents.usage import build_usage_log, fill_usage_log
+
+    try:
+        async with AsyncSessionLocal() as db:
+            log = await db.get(AIUsageLog, job.usage_log_id) if job.usage_log_id else None
+            if usage is not None:
+                if log is not None:
+                    fill_usage_log(log, usage)
+                else:
+                    db.add(build_usage_log(job.user_id, "process_article", usage))
+            elif log is not None:
+                await db.delete(log)
+            await db.commit()
+    except Exception as e:
+        print(f"Failed to settle usage for job {job.id}: {e}")
+
+
+def create_job_backend() -> JobBackend:
+    backend = settings.JOB_BACKEND.lower()
+    if backend == "local":
+        return LocalJobBackend(
+            handler=process_article_job,
+            workers=settings.JOB_WORKERS,
+            max_queue_size=settings.JOB_QUEUE_MAX_SIZE,
+            buffer_size=settings.JOB_EVENT_BUFFER_SIZE,
+            retention_seconds=settings.JOB_RETENTION_SECONDS,
+            max_per_user=settings.JOB_MAX_PER_USER,
+        )
+    raise ValueError(f"Unsupported JOB_BACKEND: {settings.JOB_BACKEND}")
+
+
+job_service = create_job_backend()
@@ -9,6 +9,7 @@ from typing import AsyncGenerator
 from app.main import app
 from app.api.deps import get_db
 from app.core.config import settings
+from app.services.ai_agents.checkpoints import graph_checkpoints
 
 # Redefine the event_loop fixture to have a session scope
 @pytest.fixture(scope="session")
@@ -18,6 +19,12 @@ def event_loop():
     yield loop
     loop.close()
 
+@pytest.fixture(scope="session", autouse=True)
+def close_graph_checkpoints():
+    # Tests skip the app lifespan, which would otherwise close the checkpoint saver
+    yield
+    asyncio.run(graph_checkpoints.close())
+
 @pytest.fixture(scope="session")
 async def test_engine():
     engine = create_async_engine(
@@ -0,0 +1,101 @@
+import asyncio
+import pytest
+from app.services.ai_agents.admission import AdmissionController, AdmissionRejected
+
+WEIGHTS = {"premium_interactive": 3, "free_interactive": 1}
+
+@pytest.mark.asyncio
+async def test_waiters_are_served_by_weight():
+    controller = AdmissionController(max_concurrency=1, max_queue_size=100, max_wait_seconds=60, weights=WEIGHTS)
+    order = []
+    gate = asyncio.Event()
+
+    async def blocker():
+        async with controller.slot("free_interactive"):
+            await gate.wait()
+
+    async def call(priority):
+        async with controller.slot(priority):
+            order.append(priority)
+
+    first = asyncio.create_task(blocker())
+    await asyncio.sleep(0)
+    tasks = [asyncio.create_task(call("free_interactive")) for _ in range(4)]
+    tasks += [asyncio.create_task(call("premium_interactive")) for _ in range(4)]
+    await asyncio.sleep(0)
+    gate.set()
+    await asyncio.gather(first, *tasks)
+
+    # Premium gets ~3 slots per free slot while both classes are waiting
+    assert order[:4].count("premium_interactive") == 3
+    assert controller.in_flight == 0 and controller.queued() == 0
+
+@pytest.mark.asyncio
+async def test_rejects_when_projected_wait_too_long():
+    controller = AdmissionController(max_concurrency=1, max_queue_size=100, max_wait_seconds=0.5, weights=WEIGHTS)
+    gate = asyncio.Event()
+
+    async def blocker():
+        async with controller.slot("free_interactive"):
+            await gate.wait()
+
+    first = asyncio.create_task(blocker())
+    await asyncio.sleep(0)
+    # Default service time estimate is 1s, so one more caller would wait ~1s
+    with pytest.raises(AdmissionRejected) as exc:
+        async with controller.slot("free_interactive"):
+            pass
+    assert exc.value.status_code == 503
+    assert exc.value.headers["Retry-After"] == "1"
+    gate.set()
+    await first
+
+@pytest.mark.asyncio
+async def test_cancelled_waiter_leaves_queue():
+    controller = AdmissionController(max_concurrency=1, max_queue_size=100, max_wait_seconds=60, weights=WEIGHTS)
+    gate = asyncio.Event()
+
+    async def blocker():
+        async with controller.slot("free_interactive"):
+            await gate.wait()
+
+    async def waiter():
+        async with controller.slot("premium_interactive"):
+            pass
+
+    first = asyncio.create_task(blocker())
+    await asyncio.sleep(0)
+    waiting = asyncio.create_task(waiter())
+    await asyncio.sleep(0)
+    assert controller.queued() == 1
+    waiting.cancel()
+    await asyncio.sleep(0)
+    assert controller.queued() == 0
+    gate.set()
+    await first
+    assert controller.in_flight == 0
+
+@pytest.mark.asyncio
+async def test_rejected_admission_in_collector_fails_the_run(monkeypatch):
+    from app.services.ai_agents import nodes, runner
+    from app.services.ai_agents.broadcast import RunBroadcaster
+    from app.services.ai_agents.cache import TTLCache
+    from app.services.ai_agents.checkpoints import GraphCheckpoints
+    from app.services.ai_agents.errors import handle_ai_error
+
+    async def rejected(*args, **kwargs):
+        raise AdmissionRejected(retry_after=5)
+
+    monkeypatch.setattr(nodes.settings, "QUALITY_PREFILTER_ENABLED", False)
+    monkeypatch.setattr(nodes, "call_llm_batched", rejected)
+    monkeypatch.setattr(runner, "graph_checkpoints", GraphCheckpoints("memory", "", ttl_seconds=60))
+    monkeypatch.setattr(runner, "analysis_cache", TTLCache(100, 60))
+
+    state = runner.build_initial_state("a1", "Title", "Some article content.", False, None)
+    event = await RunBroadcaster().result(state)
+    assert event["status"] == "error"
+    assert event["error_code"] == "AI_OVERLOADED" and event["retry_after"] == 5
+
+    with pytest.raises(AdmissionRejected) as e:
+        await runner.analyse_article(state)
+    assert handle_ai_error(e.value)[0] == 503
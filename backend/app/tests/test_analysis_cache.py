@@ -0,0 +1,21 @@
+from app.services.ai_agents.cache import TTLCache, analysis_key
+
+def test_ttl_cache_lru_eviction():
+    cache = TTLCache(max_size=2, ttl_seconds=60)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    assert cache.get("a") == 1 # "a" is now most recently used
+    cache.set("c", 3)
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+    assert cache.get("c") == 3
+
+def test_ttl_cache_expiry():
+    cache = TTLCache(max_size=2, ttl_seconds=-1)
+    cache.set("a", 1)
+    assert cache.get("a") is None
+
+def test_analysis_key_depends_on_content_and_plan():
+    assert analysis_key("T", "Body", False) == analysis_key("T", "Body", False)
+    assert analysis_key("T", "Body", False) != analysis_key("T", "Body", True)
+    assert analysis_key("T", "Body", False) != analysis_key("T", "Body 2", False)
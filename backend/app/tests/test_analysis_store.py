@@ -0,0 +1,110 @@
+import asyncio
+from app.models.news import NewsArticle
+from app.services import analysis_store
+from app.services.ai_agents import nodes
+
+def fake_nodes(monkeypatch, quality=0.9, degraded=()):
+    calls = []
+    outputs = {
+        "collector": {"quality_score": quality},
+        "classifier": {"category": "Technology", "sentiment": "Positive", "tags": ["ai"]},
+        "summarizer": {"summary_short": "short", "summary_detail": "detail"},
+        "bias": {"bias_score": 0.1, "bias_explanation": "Neutral."},
+    }
+    def make(name):
+        async def node(state):
+            calls.append(name)
+            result = dict(outputs[name])
+            if name in degraded:
+                result["degraded"] = [name]
+            return result
+        return node
+    monkeypatch.setattr(analysis_store, "NODES", {name: make(name) for name in outputs})
+    return calls
+
+def analyse(row):
+    return asyncio.run(analysis_store.analyse_article(
+        "1", row.title, analysis_store.article_text(row.content, row.description), None, row.analysis_inputs, row.quality_score
+    ))
+
+def apply(row, analysis):
+    asyncio.run(analysis_store.apply_analysis(None, row, analysis))
+
+def new_row(description="Chips get faster."):
+    row = NewsArticle(title="Chips", description=description, url="u", category_id=1)
+    row.content_fingerprint = analysis_store.content_fingerprint(row.title, row.description)
+    return row
+
+def test_unchanged_row_is_not_rerun(monkeypatch):
+    calls = fake_nodes(monkeypatch)
+    row = new_row()
+    assert analysis_store.is_stale(row)
+    apply(row, analyse(row))
+    assert calls == ["collector", "classifier", "summarizer", "bias"]
+    assert not analysis_store.is_stale(row)
+    assert row.summary_short == "short" and row.bias_score == 0.1
+
+    calls.clear()
+    analysis = analyse(row)
+    assert calls == [] and analysis["complete"]
+
+def test_prompt_version_bump_reruns_only_that_node(monkeypatch):
+    calls = fake_nodes(monkeypatch)
+    row = new_row()
+    apply(row, analyse(row))
+    calls.clear()
+    monkeypatch.setitem(nodes.NODE_PROMPT_VERSIONS, "summarizer", "2")
+    assert analysis_store.is_stale(row)
+    apply(row, analyse(row))
+    assert calls == ["summarizer"]
+    assert row.sentiment == "Positive" and not analysis_store.is_stale(row)
+
+def test_content_change_reruns_everything(monkeypatch):
+    calls = fake_nodes(monkeypatch)
+    row = new_row()
+    apply(row, analyse(row))
+    calls.clear()
+    row.description = "Chips get much faster."
+    row.content_fingerprint = analysis_store.content_fingerprint(row.title, row.description)
+    assert analysis_store.is_stale(row)
+    apply(row, analyse(row))
+    assert calls == ["collector", "classifier", "summarizer", "bias"]
+
+def test_degraded_node_is_retried_and_row_stays_stale(monkeypatch):
+    calls = fake_nodes(monkeypatch, degraded=("bias",))
+    row = new_row()
+    apply(row, analyse(row))
+    assert analysis_store.is_stale(row)
+    calls = fake_nodes(monkeypatch)
+    apply(row, analyse(row))
+    assert calls == ["bias"] and not analysis_store.is_stale(row)
+
+def test_low_quality_stops_after_collector(monkeypatch):
+    calls = fake_nodes(monkeypatch, quality=0.1)
+    row = new_row()
+    apply(row, analyse(row))
+    assert calls == ["collector"]
+    assert row.summary_short is None and not analysis_store.is_stale(row)
+
+def test_ingest_upserts_with_on_conflict():
+    from sqlalchemy.dialects import postgresql
+
+    class RecordingSession:
+        def __init__(self):
+            self.statements = []
+
+        async def execute(self, statement):
+            self.statements.append(str(statement.compile(dialect=postgresql.dialect())))
+            return type("Result", (), {"all": lambda self: []})()
+
+    db = RecordingSession()
+    articles = [
+        {"url": "u2", "title": "B", "description": "b", "category": ["Tech"]},
+        {"url": "u1", "title": "A", "description": "a", "category": ["World"]},
+        {"url": "u1", "title": "A", "description": "a", "category": ["World"]},
+    ]
+    asyncio.run(analysis_store.ingest_articles(db, articles))
+    categories, _, upsert = db.statements
+    assert "ON CONFLICT (name) DO NOTHING" in categories
+    assert "ON CONFLICT (url) DO UPDATE" in upsert
+    assert "news_articles.content_fingerprint IS DISTINCT FROM excluded.content_fingerprint" in upsert
@@ -0,0 +1,117 @@
+import asyncio
+import json
+import uuid
+
+import pytest
+from httpx import ASGITransport, AsyncClient
+
+from app.api import ai, deps
+from app.main import app
+from app.models.user import User
+from app.services.ai_agents import nodes, runner
+from app.services.ai_agents.cache import TTLCache
+from app.services.ai_agents.checkpoints import GraphCheckpoints
+from app.services.ai_agents.llm_backends import FakeChatModel
+
+CONTENT = (
+    "The city council approved a new cycling network on Tuesday after a long debate. "
+    "Planners said the lanes would connect the main train station with three suburbs. "
+    "Shop owners worried about losing parking spaces on the busiest streets downtown. "
+    "Construction starts next spring and should be finished within two years."
+)
+
+
+class NullSession:
+    def add(self, obj):
+        pass
+
+    async def commit(self):
+        pass
+
+
+@pytest.fixture
+async def client(monkeypatch):
+    fake = FakeChatModel(latency_ms=0, latency_jitter_ms=0)
+    monkeypatch.setattr(nodes, "llm_instances", {i: fake for i in range(4)})
+    monkeypatch.setattr(nodes, "_chain_cache", {})
+    monkeypatch.setattr(runner, "graph_checkpoints", GraphCheckpoints("memory", "", ttl_seconds=60))
+    monkeypatch.setattr(runner, "analysis_cache", TTLCache(100, 60))
+
+    user = User(id=uuid.uuid4(), email="batch@example.com", is_active=True, is_premium=True)
+
+    async def override_db():
+        yield NullSession()
+
+    app.dependency_overrides[deps.get_db] = override_db
+    app.dependency_overrides[deps.get_current_active_user] = lambda: user
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as c:
+        yield c
+    app.dependency_overrides.clear()
+
+
+@pytest.fixture
+def runs(monkeypatch):
+    """
+    Graph runs started by the endpoint, by article id. "Slow" articles finish
+    last and "Broken" ones fail like a rate-limited LLM; the rest run the
+    real graph on the fake LLM.
+    """
+    started = []
+    analyse_article = ai.analyse_article
+
+    async def tracked(state):
+        started.append(state["article_id"])
+        if state["title"] == "Broken":
+            raise Exception("429 Resource exhausted")
+        if state["title"] == "Slow":
+            await asyncio.sleep(0.2)
+        return await analyse_article(state)
+
+    monkeypatch.setattr(ai, "analyse_article", tracked)
+    return started
+
+
+def article(article_id, title, content=CONTENT):
+    return {"id": article_id, "title": title, "content": content}
+
+
+async def post_batch(client, articles):
+    res = await client.post("/api/v1/ai/process/batch", json=articles)
+    assert res.status_code == 200
+    return [json.loads(line) for line in res.text.splitlines() if line]
+
+
+@pytest.mark.asyncio
+async def test_batch_dedupes_isolates_errors_and_streams_in_completion_order(client, runs):
+    items = await post_batch(client, [
+        article("slow", "Slow", CONTENT + " Slow."),
+        article("a", "Cycling network approved"),
+        article("b", "Cycling network approved"),
+        article("broken", "Broken", CONTENT + " Broken."),
+    ])
+
+    # Identical content ran once and answered both ids
+    assert sorted(runs) == ["a", "broken", "slow"]
+    by_id = {item["id"]: item for item in items}
+    assert len(items) == 4
+    assert by_id["a"]["article"]["id"] == "a" and by_id["b"]["article"]["id"] == "b"
+    assert by_id["a"]["article"]["summary_short"] == by_id["b"]["article"]["summary_short"]
+
+    # One failure does not fail the batch
+    assert by_id["broken"]["status"] == "error" and by_id["broken"]["error_code"] == "AI_RATE_LIMIT"
+    assert all(by_id[i]["status"] == "complete" for i in ("slow", "a", "b"))
+
+    # Results stream as they finish, not in request order
+    assert [item["id"] for item in items][-1] == "slow"
+    assert [item["id"] for item in items][0] == "broken"
+
+
+@pytest.mark.asyncio
+async def test_batch_answers_cached_articles_first_without_a_run(client, runs):
+    await post_batch(client, [article("a", "Cycling network approved")])
+    runs.clear()
+
+    items = await post_batch(client, [article("new", "Slow", CONTENT + " New."), article("again", "Cycling network approved")])
+    assert runs == ["new"]
+    assert [item["id"] for item in items] == ["again", "new"]
+    assert items[0]["cached"] and items[0]["article"]["id"] == "again"
@@ -0,0 +1,75 @@
+import asyncio
+import pytest
+from app.services.ai_agents.batching import MicroBatcher, BatchItemMissing
+
+@pytest.mark.asyncio
+async def test_micro_batcher_scatters_results():
+    calls = []
+
+    async def invoke(prompt, parser, input_data, config=None):
+        calls.append(input_data["articles"])
+        # Answer every article except id 2
+        return [{"id": "0", "quality_score": 0.1}, {"id": 1, "quality_score": 0.9}]
+
+    batcher = MicroBatcher("collector", "score it.", invoke, window_ms=5, max_items=10)
+    results = await asyncio.gather(
+        batcher.submit({"title": "a", "content": "x"}),
+        batcher.submit({"title": "b", "content": "y"}),
+        batcher.submit({"title": "c", "content": "z"}),
+        return_exceptions=True
+    )
+
+    assert len(calls) == 1
+    assert results[0]["quality_score"] == 0.1
+    assert results[1]["quality_score"] == 0.9
+    assert isinstance(results[2], BatchItemMissing)
+
+@pytest.mark.asyncio
+async def test_micro_batcher_flushes_at_max_items():
+    calls = []
+
+    async def invoke(prompt, parser, input_data, config=None):
+        calls.append(input_data)
+        return [{"id": "0"}, {"id": "1"}]
+
+    batcher = MicroBatcher("classifier", "classify it.", invoke, window_ms=10_000, max_items=2)
+    await asyncio.gather(
+        batcher.submit({"title": "a", "content": "x"}),
+        batcher.submit({"title": "b", "content": "y"}),
+    )
+    assert len(calls) == 1
+
+@pytest.mark.asyncio
+async def test_micro_batch_runs_in_neutral_context_and_splits_usage():
+    from app.services.ai_agents.admission import current_priority, priority_scope
+    from app.services.ai_agents.deadline import deadline_scope, remaining
+    from app.services.ai_agents.usage import track_usage, usage_stage
+    from app.services.ai_agents import usage as usage_module
+
+    seen = {}
+
+    async def invoke(prompt, parser, input_data, config=None):
+        seen["priority"] = current_priority()
+        seen["remaining"] = remaining()
+        # One call's usage, as call_llm_with_rotation records it
+        for tracker in usage_module._trackers.get():
+            tracker.add("collector", 10, 3, 0, 5.0, False)
+        return [{"id": "0"}, {"id": "1"}]
+
+    batcher = MicroBatcher("collector", "score it.", invoke, window_ms=5, max_items=10)
+
+    async def caller(priority, seconds, title):
+        with priority_scope(priority), deadline_scope(seconds), track_usage() as usage, usage_stage("collector"):
+            await batcher.submit({"title": title, "content": "x"})
+        return usage
+
+    free, premium = await asyncio.gather(
+        caller("free_background", 1.0, "a"),
+        caller("premium_interactive", 5.0, "b"),
+    )
+    assert seen["priority"] == "premium_interactive"
+    assert seen["remaining"] > 1.0
+    # The one call's tokens are split between the two callers
+    assert free.input_tokens + premium.input_tokens == 10
+    assert free.llm_calls + premium.llm_calls == 1
+    assert free.stages["collector"]["input_tokens"] == 5
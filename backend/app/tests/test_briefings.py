@@ -0,0 +1,152 @@
+import asyncio
+import pytest
+from app.services import briefings
+from app.services.ai_agents.response_cache import ResponseCache
+
+class _NoDB:
+    """
+    Session whose queries fail, so the cache runs on its memory tier only.
+    """
+
+    async def execute(self, *args, **kwargs):
+        raise RuntimeError("no database")
+
+    async def commit(self):
+        pass
+
+    async def rollback(self):
+        pass
+
+@pytest.fixture(autouse=True)
+def fresh_cache(monkeypatch):
+    monkeypatch.setattr(briefings, "briefing_cache", ResponseCache("briefing_test", 10, 60, 10))
+    monkeypatch.setattr(briefings, "latest_briefings", ResponseCache("briefing_latest_test", 10, 60, 10))
+
+@pytest.mark.asyncio
+async def test_briefing_generated_once_per_category(monkeypatch):
+    generated = []
+
+    async def fake_generate(category, language="en", previous=None):
+        generated.append(category)
+        await asyncio.sleep(0.01)
+        return {"summary": f"{category} briefing", "category": category}
+
+    monkeypatch.setattr(briefings, "generate_briefing", fake_generate)
+    db = _NoDB()
+
+    results = await asyncio.gather(*(briefings.get_briefing(db, "sports") for _ in range(5)))
+    assert {r["summary"] for r in results} == {"sports briefing"}
+    await briefings.get_briefing(db, "sports")
+    await briefings.get_briefing(db, "technology")
+    assert generated == ["sports", "technology"]
+
+@pytest.mark.asyncio
+async def test_degraded_briefing_is_not_stored(monkeypatch):
+    calls = []
+
+    async def fake_generate(category, language="en", previous=None):
+        calls.append(category)
+        return {"summary": "headlines", "category": category, "degraded": ["summary"]}
+
+    monkeypatch.setattr(briefings, "generate_briefing", fake_generate)
+    await briefings.get_briefing(_NoDB(), None)
+    await briefings.get_briefing(_NoDB(), None)
+    assert len(calls) == 2
+
+def test_keys_change_with_bucket_and_language():
+    assert briefings.briefing_key("sports", "en", 1) == briefings.briefing_key("sports", "en", 1)
+    assert briefings.briefing_key("sports", "en", 1) != briefings.briefing_key("sports", "en", 2)
+    assert briefings.briefing_key("sports", "en", 1) != briefings.briefing_key("sports", "de", 1)
+    assert briefings.briefing_key(None, "en", 1) != briefings.briefing_key("sports", "en", 1)
+
+def _articles(ids):
+    return [{"id": i, "title": f"Story {i}", "description": f"About {i}"} for i in ids]
+
+@pytest.mark.asyncio
+async def test_refresh_folds_in_only_new_articles(monkeypatch):
+    from app.services.currents import currents_service
+    feeds = [_articles("abcde"), _articles("abcde"), _articles("abcdf"), _articles("vwxyz")]
+    prompts = []
+
+    async def fake_fetch(language="en", category=None):
+        return feeds.pop(0)
+
+    async def fake_call(prompt, parser, input_data, config=None):
+        prompts.append((prompt, input_data["news"]))
+        return f"briefing {len(prompts)}"
+
+    monkeypatch.setattr(currents_service, "fetch_latest_news", fake_fetch)
+    monkeypatch.setattr(briefings, "call_llm_with_rotation", fake_call)
+    db = _NoDB()
+
+    first = await briefings.get_briefing(db, "tech", refresh=True)
+    unchanged = await briefings.get_briefing(db, "tech", refresh=True)
+    delta = await briefings.get_briefing(db, "tech", refresh=True)
+    turned_over = await briefings.get_briefing(db, "tech", refresh=True)
+
+    assert [b["mode"] for b in (first, unchanged, delta, turned_over)] == ["full", "unchanged", "delta", "full"]
+    assert unchanged["summary"] == "briefing 1"
+    assert prompts[1][0] is briefings.DELTA_BRIEFING_PROMPT
+    assert "Story f" in prompts[1][1] and "Story a" not in prompts[1][1]
+    assert len(prompts) == 3
+
+class _SessionFactory:
+    def __call__(self):
+        return self
+
+    async def __aenter__(self):
+        return _NoDB()
+
+    async def __aexit__(self, *exc):
+        return False
+
+@pytest.mark.asyncio
+async def test_multi_category_briefing_streams_sections_then_merges(monkeypatch):
+    delays = {"sports": 0.03, "tech": 0.0, "world": 0.01}
+    merges = []
+
+    async def fake_get_briefing(db, category, language="en", refresh=False):
+        await asyncio.sleep(delays[category])
+        if category == "world":
+            raise RuntimeError("boom")
+        return {"summary": f"{category} briefing", "category": category}
+
+    async def fake_call(prompt, parser, input_data, config=None):
+        merges.append(input_data["sections"])
+        return "merged briefing"
+
+    monkeypatch.setattr(briefings, "get_briefing", fake_get_briefing)
+    monkeypatch.setattr(briefings, "call_llm_with_rotation", fake_call)
+
+    events = [e async for e in briefings.stream_multi_briefing(["sports", "tech", "world"], session_factory=_SessionFactory())]
+
+    assert [(e["status"], e.get("category")) for e in events] == [
+        ("section", "tech"), ("section", "world"), ("section", "sports"), ("complete", None)
+    ]
+    assert events[1]["degraded"] == ["error"]
+    assert events[-1]["summary"] == "merged briefing"
+    assert [s["category"] for s in events[-1]["sections"]] == ["sports", "tech"]
+    assert merges[0].index("sports:") < merges[0].index("tech:")
+
+@pytest.mark.asyncio
+async def test_second_stream_is_served_from_the_bucket_cache(monkeypatch):
+    generated = []
+
+    async def fake_generate(category, language="en", previous=None):
+        generated.append(category)
+        return {"summary": f"{category} briefing", "category": category}
+
+    async def fake_call(prompt, parser, input_data, config=None):
+        return "merged briefing"
+
+    monkeypatch.setattr(briefings, "generate_briefing", fake_generate)
+    monkeypatch.setattr(briefings, "call_llm_with_rotation", fake_call)
+
+    for _ in range(2):
+        events = [e async for e in briefings.stream_multi_briefing(["sports", "tech"], session_factory=_SessionFactory())]
+        assert events[-1]["status"] == "complete"
+    # The second stream reuses both sections instead of fetching and generating again
+    assert sorted(generated) == ["sports", "tech"]
+
+    [e async for e in briefings.stream_multi_briefing(["sports"], refresh=True, session_factory=_SessionFactory())]
+    assert generated.count("sports") == 2
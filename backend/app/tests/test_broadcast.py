@@ -0,0 +1,85 @@
+import asyncio
+import pytest
+from app.services.ai_agents import broadcast
+from app.services.ai_agents.runner import build_initial_state
+
+@pytest.mark.asyncio
+async def test_identical_requests_share_one_run(monkeypatch):
+    runs = []
+
+    async def fake_stream(state):
+        runs.append(state["article_id"])
+        yield {"status": "starting"}
+        await asyncio.sleep(0.01)
+        yield {"status": "complete", "article": {"id": state["article_id"], "summary_short": "s"}, "cached": False}
+
+    monkeypatch.setattr(broadcast, "stream_article_analysis", fake_stream)
+    broadcaster = broadcast.RunBroadcaster()
+
+    first = build_initial_state("a", "Title", "Same content", False)
+    second = build_initial_state("b", "Title", "Same content", False)
+    results = await asyncio.gather(broadcaster.result(first), broadcaster.result(second))
+
+    assert runs == ["a"]
+    assert [r["article"]["id"] for r in results] == ["a", "b"]
+    assert [r["shared"] for r in results] == [False, True]
+    assert broadcaster.in_flight() == 0
+
+@pytest.mark.asyncio
+async def test_run_finishes_after_subscriber_leaves(monkeypatch):
+    finished = asyncio.Event()
+
+    async def fake_stream(state):
+        yield {"status": "starting"}
+        await asyncio.sleep(0.01)
+        finished.set()
+        yield {"status": "complete", "article": {"id": state["article_id"]}, "cached": False}
+
+    monkeypatch.setattr(broadcast, "stream_article_analysis", fake_stream)
+    broadcaster = broadcast.RunBroadcaster()
+
+    stream = broadcaster.stream(build_initial_state("a", "Title", "Content", False))
+    assert (await stream.__anext__())["status"] == "starting"
+    await stream.aclose()
+
+    await asyncio.wait_for(finished.wait(), timeout=1)
+
+@pytest.mark.asyncio
+async def test_errors_are_broadcast_as_events(monkeypatch):
+    async def fake_stream(state):
+        yield {"status": "starting"}
+        raise Exception("429 Resource exhausted")
+
+    monkeypatch.setattr(broadcast, "stream_article_analysis", fake_stream)
+    broadcaster = broadcast.RunBroadcaster()
+
+    result = await broadcaster.result(build_initial_state("a", "Title", "Content", False))
+    assert result["status"] == "error"
+    assert result["error_code"] == "AI_RATE_LIMIT"
+
+@pytest.mark.asyncio
+async def test_interactive_request_does_not_join_a_background_run(monkeypatch):
+    from app.services.ai_agents.admission import current_priority, llm_priority, priority_scope
+
+    priorities = []
+
+    async def fake_stream(state):
+        priorities.append(current_priority())
+        await asyncio.sleep(0.01)
+        yield {"status": "complete", "article": {"id": state["article_id"]}, "cached": False}
+
+    monkeypatch.setattr(broadcast, "stream_article_analysis", fake_stream)
+    broadcaster = broadcast.RunBroadcaster()
+    state = build_initial_state("a", "Title", "Same content", True)
+
+    async def queued_job():
+        with priority_scope(llm_priority(True, interactive=False)):
+            return await broadcaster.result(state)
+
+    async def click():
+        with priority_scope(llm_priority(True)):
+            return await broadcaster.result(state)
+
+    job, clicked = await asyncio.gather(queued_job(), click())
+    assert sorted(priorities) == ["premium_background", "premium_interactive"]
+    assert not job["shared"] and not clicked["shared"]
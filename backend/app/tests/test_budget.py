@@ -0,0 +1,49 @@
+import pytest
+from app.services.ai_agents.budget import chunk_text, estimate_tokens, fit_to_budget
+
+SENTENCE = "The committee published its findings on the new rail project on Monday."
+
+def test_short_text_passes_through():
+    assert fit_to_budget(SENTENCE, 1000) == SENTENCE
+
+def test_chunks_respect_budget_and_sentence_boundaries():
+    text = " ".join([SENTENCE] * 50)
+    chunks = chunk_text(text, 100)
+    assert len(chunks) > 1
+    for chunk in chunks:
+        assert estimate_tokens(chunk) <= 100
+        assert chunk.endswith(".")
+    assert sum(c.count(SENTENCE) for c in chunks) == 50
+
+def test_oversized_sentence_is_split_on_words():
+    text = " ".join(["word"] * 500)
+    chunks = chunk_text(text, 50)
+    assert len(chunks) > 1
+    assert all(estimate_tokens(c) <= 50 for c in chunks)
+
+def test_fit_to_budget_keeps_leading_sentences():
+    text = " ".join([SENTENCE] * 50)
+    trimmed = fit_to_budget(text, 40)
+    assert trimmed.startswith(SENTENCE)
+    assert estimate_tokens(trimmed) <= 40
+
+def test_overlong_word_is_cut_apart():
+    text = "Source: " + "x" * 2000 + " end."
+    chunks = chunk_text(text, 50)
+    assert all(estimate_tokens(c) <= 50 for c in chunks)
+    assert "".join(chunks).count("x") == 2000
+
+@pytest.mark.asyncio
+async def test_condensed_summaries_shrink_evenly(monkeypatch):
+    from app.services.ai_agents import nodes
+
+    async def summarise(prompt, parser, data, config=None):
+        return " ".join(f"Part {data['part']} sentence {i}." for i in range(40))
+
+    monkeypatch.setattr(nodes, "call_llm_with_rotation", summarise)
+    condensed = await nodes.condense_content("Title", " ".join([SENTENCE] * 100), 200)
+
+    # Every part keeps its lead sentence instead of the last parts being cut off
+    assert estimate_tokens(condensed) <= 200
+    parts = len(chunk_text(" ".join([SENTENCE] * 100), 200))
+    assert all(f"Part {i} sentence 0." in condensed for i in range(1, parts + 1))
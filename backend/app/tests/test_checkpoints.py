@@ -0,0 +1,91 @@
+import pytest
+from fastapi import HTTPException
+from app.core.metrics import metrics
+from app.services.ai_agents import nodes, runner
+from app.services.ai_agents.checkpoints import GraphCheckpoints
+from app.services.ai_agents.llm_backends import FakeChatModel
+from app.services.ai_agents.runner import analyse_article, build_initial_state
+
+CONTENT = (
+    "Engineers finished testing the new tidal power station off the northern coast this week. "
+    "The plant is expected to supply electricity to forty thousand homes by the end of the year. "
+    "Local fishing groups asked for more data on how the turbines affect fish migration. "
+    "The operator said monitoring cameras would publish footage online every month."
+)
+
+@pytest.mark.asyncio
+async def test_failed_run_resumes_from_last_completed_node(monkeypatch):
+    checkpoints = GraphCheckpoints("memory", "", ttl_seconds=60)
+    monkeypatch.setattr(runner, "graph_checkpoints", checkpoints)
+    monkeypatch.setattr(runner.analysis_cache, "get", lambda key: None)
+
+    fake = FakeChatModel(latency_ms=0, latency_jitter_ms=0)
+    monkeypatch.setattr(nodes, "llm_instances", {i: fake for i in range(4)})
+    monkeypatch.setattr(nodes, "_chain_cache", {})
+
+    real_call = nodes.call_llm_with_rotation
+    calls = []
+
+    async def flaky_call(prompt, parser, input_data, config=None):
+        calls.append(prompt)
+        if prompt is nodes.SUMMARIZER_PROMPT and calls.count(prompt) == 1:
+            raise HTTPException(status_code=429, detail="AI Usage Limit Reached.")
+        return await real_call(prompt, parser, input_data, config=config)
+
+    monkeypatch.setattr(nodes, "call_llm_with_rotation", flaky_call)
+    state = build_initial_state("tidal-1", "Tidal power station passes tests", CONTENT, False)
+
+    with pytest.raises(HTTPException):
+        await analyse_article(state)
+    classifier_calls = calls.count(nodes.CLASSIFIER_PROMPT)
+    assert classifier_calls == 1
+
+    event = await analyse_article(state)
+    assert event["article"]["summary_short"]
+    # Collector and classifier outputs came from the checkpoint
+    assert calls.count(nodes.CLASSIFIER_PROMPT) == classifier_calls
+    assert calls.count(nodes.SUMMARIZER_PROMPT) == 2
+
+    # Completed runs are removed, so the next analysis starts fresh
+    graph, config, run_id, resumed = await checkpoints.prepare(runner.state_cache_key(state))
+    assert resumed is None
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("backend", ["memory", "sqlite"])
+async def test_concurrent_runs_of_one_article_use_their_own_threads(monkeypatch, tmp_path, backend):
+    import asyncio
+
+    checkpoints = GraphCheckpoints(backend, str(tmp_path / "checkpoints.sqlite"), ttl_seconds=60)
+    monkeypatch.setattr(runner, "graph_checkpoints", checkpoints)
+    monkeypatch.setattr(runner.analysis_cache, "get", lambda key: None)
+    fake = FakeChatModel(latency_ms=20, latency_jitter_ms=0)
+    monkeypatch.setattr(nodes, "llm_instances", {i: fake for i in range(4)})
+    monkeypatch.setattr(nodes, "_chain_cache", {})
+
+    real_call = nodes.call_llm_with_rotation
+    failed = []
+
+    async def flaky_call(prompt, parser, input_data, config=None):
+        # Only the first run to reach the summarizer fails
+        if prompt is nodes.SUMMARIZER_PROMPT and not failed:
+            failed.append(True)
+            raise HTTPException(status_code=429, detail="AI Usage Limit Reached.")
+        return await real_call(prompt, parser, input_data, config=config)
+
+    monkeypatch.setattr(nodes, "call_llm_with_rotation", flaky_call)
+    state = build_initial_state("tidal-2", "Tidal power station passes tests", CONTENT, False)
+    try:
+        results = await asyncio.gather(analyse_article(state), analyse_article(state), return_exceptions=True)
+        # The failure stays with its own run; the other finishes normally
+        assert sum(isinstance(r, HTTPException) for r in results) == 1
+        assert any(isinstance(r, dict) and r["article"]["summary_short"] for r in results)
+
+        # The failed run is resumed exactly once, then nothing is left to resume
+        resumed_before = metrics.counter("checkpoint.resumed")
+        event = await analyse_article(state)
+        assert event["article"]["summary_short"]
+        assert metrics.counter("checkpoint.resumed") == resumed_before + 1
+        graph, config, run_id, resumed = await checkpoints.prepare(runner.state_cache_key(state))
+        assert resumed is None and run_id.startswith(runner.state_cache_key(state))
+    finally:
+        await checkpoints.close()
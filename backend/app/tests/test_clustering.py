@@ -0,0 +1,108 @@
+import pytest
+from app.core.config import settings
+from app.services.ai_agents import runner
+from app.services.ai_agents.cache import TTLCache
+from app.services.ai_agents.clustering import StoryClusterer
+
+FED_1 = "Fed raises interest rates by quarter point. The Federal Reserve raised its benchmark interest rate by 0.25 percentage points on Wednesday to fight inflation."
+FED_2 = "Federal Reserve lifts rates a quarter point to tame inflation. US central bank officials increased interest rates on Wednesday, citing persistent inflation."
+APPLE = "Apple unveils new iPhone at September event. Apple showed off its latest iPhone with a faster chip and improved camera."
+
+def make_clusterer():
+    return StoryClusterer(threshold=0.45, merge_threshold=0.6, window_seconds=48 * 3600, max_stories=100)
+
+def test_same_event_joins_one_story():
+    stories = make_clusterer()
+    a = stories.add("a", FED_1, 1000.0)
+    b = stories.add("b", FED_2, 2000.0)
+    c = stories.add("c", APPLE, 2000.0)
+    assert a == b != c
+    assert stories.members(a) == ["a", "b"]
+    # Re-adding keeps the assignment
+    assert stories.add("a", APPLE, 1000.0) == a
+
+def test_time_window_separates_stories():
+    stories = make_clusterer()
+    a = stories.add("a", FED_1, 0.0)
+    b = stories.add("b", FED_1, 10 * 24 * 3600.0)
+    assert a != b
+
+def test_merged_story_ids_resolve_to_survivor():
+    stories = make_clusterer()
+    first = stories.add("a", FED_1, 0.0)
+    stories.threshold = 0.99  # Force a separate story for the same event
+    second = stories.add("b", FED_1 + " Markets reacted.", 0.0)
+    assert first != second
+    merged = stories._merge(stories.stories[first], stories.stories[second])
+    assert stories.story_of("a") == stories.story_of("b") == merged.id
+    assert sorted(stories.members(first)) == ["a", "b"]
+
+def test_prune_drops_oldest_stories():
+    stories = StoryClusterer(threshold=0.45, merge_threshold=0.6, window_seconds=3600, max_stories=1)
+    stories.add("a", FED_1, 0.0)
+    stories.add("b", APPLE, 100.0)
+    assert len(stories) == 1
+    assert stories.story_of("a") is None
+
+def test_batch_matches_one_by_one_assignment():
+    topics = [FED_1, FED_2, APPLE, "Storm floods coastal towns. Heavy rain flooded several coastal towns overnight."]
+    articles = [
+        {"id": f"a{i}", "title": topics[i % 4], "published": f"2024-01-{1 + (i * 5) % 20:02d} 10:00:00 +0000"}
+        for i in range(40)
+    ]
+    batched = StoryClusterer(threshold=0.45, merge_threshold=0.6, window_seconds=3 * 24 * 3600, max_stories=6)
+    single = StoryClusterer(threshold=0.45, merge_threshold=0.6, window_seconds=3 * 24 * 3600, max_stories=6)
+    batched.add_articles(articles)
+    for article in articles:
+        single.add_articles([article])
+
+    def groups(stories):
+        return sorted(sorted(stories.members(s)) for s in stories.stories)
+
+    assert groups(batched) == groups(single)
+    assert len(batched) <= 6
+
+def test_collapse_groups_feed_cards():
+    stories = make_clusterer()
+    stories.add("a", FED_1, 0.0)
+    stories.add("b", FED_2, 0.0)
+    cards = stories.collapse([{"id": "a"}, {"id": "x"}, {"id": "b"}, {"id": "a"}])
+    assert [c["id"] for c in cards] == ["a", "x"]
+    assert cards[0]["related"] == ["b"]
+
+@pytest.mark.asyncio
+async def test_story_shares_summaries_but_not_bias(monkeypatch):
+    stories = make_clusterer()
+    stories.add("a", FED_1, 0.0)
+    stories.add("b", FED_2, 0.0)
+    monkeypatch.setattr(runner, "story_clusters", stories)
+    monkeypatch.setattr(runner, "story_analysis_cache", TTLCache(10, 60))
+    monkeypatch.setattr(runner, "analysis_cache", TTLCache(10, 60))
+    monkeypatch.setattr(settings, "STORY_SHARE_ANALYSIS", True)
+    ran = []
+
+    async def own_classifier(state):
+        ran.append("classifier")
+        return {"category": "Finance", "sentiment": "Negative", "tags": ["own"]}
+
+    async def own_bias(state):
+        ran.append("bias")
+        return {"bias_score": 0.7, "bias_explanation": f"{state['article_id']} framing"}
+
+    monkeypatch.setattr(runner, "STORY_OWN_NODES", [("classifier", own_classifier), ("bias", own_bias)])
+
+    state_a = runner.build_initial_state("a", "Fed", FED_1, True)
+    state_b = runner.build_initial_state("b", "Fed", FED_2, True)
+    runner.story_analysis_cache.set(runner.story_cache_key(state_a), {"summary_short": "Rates up", "summary_detail": "Detail", "tags": ["fed"]})
+
+    # A story hit is only a partial result, not a cached article
+    assert runner.get_cached_article(state_b) is None
+    event = await runner.analyse_article(state_b)
+    article = event["article"]
+    assert ran == ["classifier", "bias"]
+    assert article["id"] == "b" and event["story_id"] == stories.story_of("a")
+    assert article["summary_short"] == "Rates up" and article["tags"] == ["fed"]
+    # Sentiment and bias are this outlet's own
+    assert article["sentiment"] == "Negative"
+    assert article["bias_explanation"] == "b framing"
+    assert runner.get_cached_article(state_b)["bias_score"] == 0.7
@@ -0,0 +1,71 @@
+import asyncio
+import pytest
+from app.services.ai_agents import compare
+from app.services.ai_agents.cache import TTLCache
+
+@pytest.fixture(autouse=True)
+def fresh_digest_cache(monkeypatch):
+    monkeypatch.setattr(compare, "digest_cache", TTLCache(100, 60))
+
+@pytest.mark.asyncio
+async def test_digests_are_cached_and_shared(monkeypatch):
+    calls = []
+
+    async def fake_call(prompt, parser, input_data, config=None):
+        calls.append(prompt)
+        await asyncio.sleep(0.01)
+        if prompt is compare.DIGEST_PROMPT:
+            return {"claims": [input_data["content"][:10]], "entities": ["Acme"], "stance": "Neutral"}
+        return "comparison"
+
+    monkeypatch.setattr(compare, "call_llm_with_rotation", fake_call)
+
+    result = await compare.compare_contents(["Article one text", "Article two text", "Article one text"])
+    assert result["comparison"] == "comparison"
+    assert len(result["digests"]) == 3
+    # Duplicate article shares the in-flight digest: 2 digests + 1 reduce
+    assert len(calls) == 3
+
+    await compare.compare_contents(["Article one text", "Article two text"])
+    # Digests come from the cache, only the reduce step runs again
+    assert len(calls) == 4
+
+@pytest.mark.asyncio
+async def test_digest_falls_back_locally(monkeypatch):
+    async def failing_call(prompt, parser, input_data, config=None):
+        raise ValueError("bad json")
+
+    monkeypatch.setattr(compare, "call_llm_with_rotation", failing_call)
+    digest = await compare.get_digest("Parliament passed the budget. Markets rallied afterwards.")
+    assert digest["claims"] == ["Parliament passed the budget.", "Markets rallied afterwards."]
+    assert digest["stance"] == "Unknown"
+    assert digest["degraded"]
+
+@pytest.mark.asyncio
+async def test_fallback_digest_is_not_cached(monkeypatch):
+    calls = []
+
+    async def flaky_call(prompt, parser, input_data, config=None):
+        calls.append(prompt)
+        if len(calls) == 1:
+            raise ValueError("transient")
+        return {"claims": ["LLM claim"], "entities": [], "stance": "Neutral"}
+
+    monkeypatch.setattr(compare, "call_llm_with_rotation", flaky_call)
+    text = "Parliament passed the budget."
+    assert (await compare.get_digest(text))["degraded"]
+    # The transient failure is retried rather than served from the cache
+    assert (await compare.get_digest(text))["claims"] == ["LLM claim"]
+    assert (await compare.get_digest(text))["claims"] == ["LLM claim"]
+    assert len(calls) == 2
+
+def test_format_digests_trims_claims_to_budget():
+    digests = [
+        {"claims": [f"claim {i} " + "word " * 20 for i in range(5)], "entities": ["A"], "stance": "Neutral"}
+        for _ in range(10)
+    ]
+    full = compare.format_digests(digests, budget=100_000)
+    trimmed = compare.format_digests(digests, budget=800)
+    assert "claim 4" in full
+    assert "claim 4" not in trimmed
+    assert trimmed.count("Article ") == 10
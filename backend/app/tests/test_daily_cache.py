@@ -0,0 +1,93 @@
+import random
+from datetime import datetime, timezone
+import pytest
+from app.services import briefings, daily_cache
+from app.services.currents import currents_service
+
+class _Session:
+    async def commit(self):
+        pass
+
+def test_schedule_offsets_spread_in_priority_order():
+    offsets = daily_cache.schedule_offsets(10, 1000, random.Random(1))
+    assert offsets == sorted(offsets)
+    assert all(0 <= o <= 1000 for o in offsets)
+    assert offsets[0] < 100 and offsets[-1] >= 900
+
+def test_seconds_until_window():
+    now = datetime(2026, 1, 1, 3, 30, tzinfo=timezone.utc)
+    assert daily_cache.seconds_until_window(now, 4) == 30 * 60
+    assert daily_cache.seconds_until_window(now.replace(hour=5), 4) == 22.5 * 3600
+
+def test_build_feed_items_dedupes_and_sorts():
+    items = daily_cache.build_feed_items([
+        {"id": "a", "title": "Old", "url": "u1", "published": "2024-01-27 10:00:00 +0000"},
+        {"id": "b", "title": "New", "url": "u2", "published": "2024-01-28 10:00:00 +0000"},
+        {"id": "a", "title": "Old again", "url": "u1"},
+        {"id": "c", "title": "Undated", "url": "u3"},
+    ])
+    assert [i.title for i in items] == ["New", "Old", "Undated"]
+
+@pytest.mark.asyncio
+async def test_prewarm_shares_work_per_category_and_respects_budget(monkeypatch):
+    users = [("u1", "sports"), ("u2", "sports"), ("u3", "tech"), ("u4", None)]
+    fetched, briefed, stored = [], [], {}
+
+    async def fake_candidates(db, limit):
+        return users
+
+    async def fake_fetch(language="en", category=None):
+        fetched.append(category)
+        return [{"id": f"{category}-1", "title": f"{category} news", "url": "#"}]
+
+    async def fake_briefing(db, category, language="en"):
+        from app.services.ai_agents.usage import _trackers
+        briefed.append(category)
+        for tracker in _trackers.get():
+            tracker.add("briefing", 10, 10, 0, 1.0, False)
+        return {"summary": f"{category} briefing"}
+
+    async def fake_store(db, user_id, **fields):
+        stored[user_id] = fields
+
+    monkeypatch.setattr(daily_cache, "prewarm_candidates", fake_candidates)
+    monkeypatch.setattr(daily_cache, "store_daily_cache", fake_store)
+    monkeypatch.setattr(currents_service, "fetch_latest_news", fake_fetch)
+    monkeypatch.setattr(briefings, "get_briefing", fake_briefing)
+
+    # Budget of 2 LLM calls in total (fake backend key count x 1)
+    from app.services.ai_agents.llm_backends import llm_backend
+    prewarmer = daily_cache.DailyPrewarmer(4, 60, 100, llm_calls_per_key=1)
+    monkeypatch.setattr(llm_backend, "key_count", lambda: 2)
+
+    stats = await prewarmer.run_once(_Session(), spread=False)
+
+    assert fetched == ["sports", "tech", None]
+    assert briefed == ["sports", "tech"]
+    assert stored["u2"]["summary"] == {"summary": "sports briefing"}
+    assert stored["u4"]["summary"] is None and stored["u4"]["news_feed"]
+    assert stats == {"users": 4, "feeds": 4, "summaries": 3, "llm_calls": 2}
+
+@pytest.mark.asyncio
+async def test_prewarm_candidates_skip_caches_that_cover_the_day():
+    from datetime import timedelta
+    from sqlalchemy.dialects import postgresql
+    from app.core.config import settings
+
+    class _Capture:
+        async def execute(self, statement):
+            self.statement = statement
+            class _Result:
+                def all(self):
+                    return []
+            return _Result()
+
+    db = _Capture()
+    before = datetime.now(timezone.utc)
+    await daily_cache.prewarm_candidates(db, 10)
+    params = db.statement.compile(dialect=postgresql.dialect()).params
+    cutoffs = [v for v in params.values() if isinstance(v, datetime) and v > before]
+    # Only caches expiring within the lead time qualify, not every cache written in the last day
+    assert len(cutoffs) == 1
+    lead = cutoffs[0] - before
+    assert timedelta(hours=settings.PREWARM_LEAD_HOURS) <= lead < timedelta(hours=settings.PREWARM_LEAD_HOURS, seconds=5)
@@ -0,0 +1,56 @@
+import pytest
+from app.core.config import settings
+from app.services.ai_agents import nodes, runner
+from app.services.ai_agents.checkpoints import GraphCheckpoints
+from app.services.ai_agents.deadline import DeadlineExceeded, call_timeout, deadline_scope, remaining
+from app.services.ai_agents.llm_backends import FakeChatModel
+from app.services.ai_agents.runner import analyse_article, build_initial_state
+
+CONTENT = (
+    "The city council approved a new budget for public transport on Tuesday evening. "
+    "Bus routes in the northern districts will run every ten minutes from next month. "
+    "Officials expect ridership to grow as fares stay frozen for another year. "
+    "Opposition members questioned how the extra drivers would be recruited in time."
+)
+
+def test_call_timeout_is_clipped_to_deadline():
+    assert call_timeout(10) == 10
+    with deadline_scope(1):
+        assert 0 < call_timeout(10) <= 1
+        assert call_timeout(0.5) == 0.5
+        # Nested scopes never extend the outer deadline
+        with deadline_scope(30):
+            assert remaining() <= 1
+    with deadline_scope(-1):
+        with pytest.raises(DeadlineExceeded):
+            call_timeout(10)
+    assert remaining() is None
+
+@pytest.mark.asyncio
+async def test_graph_skips_optional_stages_under_deadline(monkeypatch):
+    fake = FakeChatModel(latency_ms=0, latency_jitter_ms=0)
+    monkeypatch.setattr(nodes, "llm_instances", {i: fake for i in range(4)})
+    monkeypatch.setattr(nodes, "_chain_cache", {})
+    monkeypatch.setattr(runner, "graph_checkpoints", GraphCheckpoints("memory", "", ttl_seconds=60))
+    monkeypatch.setattr(settings, "NODE_MIN_SECONDS", {"collector": 0, "classifier": 0, "summarizer": 0, "bias": 60})
+
+    state = build_initial_state("budget-1", "Council approves transport budget", CONTENT, True)
+    with deadline_scope(5):
+        event = await analyse_article(state)
+
+    assert event["degraded"] == ["bias"]
+    assert event["article"]["bias_score"] is None
+    assert event["article"]["summary_short"]
+
+@pytest.mark.asyncio
+async def test_collector_out_of_time_uses_heuristic_score(monkeypatch):
+    monkeypatch.setattr(settings, "QUALITY_PREFILTER_ENABLED", False)
+    monkeypatch.setattr(settings, "NODE_MIN_SECONDS", {"collector": 60, "classifier": 0, "summarizer": 0, "bias": 0})
+    state = build_initial_state("budget-2", "Sale", "Click here to buy now!", False)
+    with deadline_scope(5):
+        result = await nodes.collector_node(state)
+
+    # A low heuristic score is kept, not raised to the neutral 0.5
+    score = nodes.score_quality(state["title"], state["content"])["quality_score"]
+    assert score < 0.5
+    assert result == {"quality_score": score, "degraded": ["collector"]}
@@ -0,0 +1,35 @@
+import pytest
+from langchain_core.output_parsers import JsonOutputParser
+
+from app.services.ai_agents.llm_backends import FakeChatModel
+from app.services.ai_agents.nodes import CLASSIFIER_PROMPT, SUMMARIZER_PROMPT, BIAS_PROMPT, COLLECTOR_PROMPT
+
+INPUT = {"title": "Rover finds water on Mars", "content": "Scientists confirmed the discovery near the pole."}
+
+@pytest.mark.asyncio
+async def test_fake_llm_returns_schema_valid_json():
+    llm = FakeChatModel(latency_ms=0, latency_jitter_ms=0)
+    parser = JsonOutputParser()
+
+    quality = await (COLLECTOR_PROMPT | llm | parser).ainvoke(INPUT)
+    assert 0.0 <= quality["quality_score"] <= 1.0
+
+    classification = await (CLASSIFIER_PROMPT | llm | parser).ainvoke(INPUT)
+    assert {"category", "sentiment", "tags"} <= classification.keys()
+
+    summary = await (SUMMARIZER_PROMPT | llm | parser).ainvoke(INPUT)
+    assert {"summary_short", "summary_detail"} <= summary.keys()
+
+    bias = await (BIAS_PROMPT | llm | parser).ainvoke(INPUT)
+    assert 0.0 <= bias["bias_score"] <= 1.0
+
+@pytest.mark.asyncio
+async def test_fake_llm_is_deterministic_and_can_rate_limit():
+    llm = FakeChatModel(latency_ms=0, latency_jitter_ms=0)
+    first = await (CLASSIFIER_PROMPT | llm).ainvoke(INPUT)
+    second = await (CLASSIFIER_PROMPT | llm).ainvoke(INPUT)
+    assert first.content == second.content
+
+    failing = FakeChatModel(latency_ms=0, latency_jitter_ms=0, rate_limit_rate=1.0)
+    with pytest.raises(Exception, match="429"):
+        await (CLASSIFIER_PROMPT | failing).ainvoke(INPUT)
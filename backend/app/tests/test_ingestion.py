@@ -0,0 +1,40 @@
+import asyncio
+import time
+
+from app.services import ingestion
+from app.services.ingestion import ArticleIngestion
+
+
+async def test_batches_are_processed_in_the_background(monkeypatch):
+    processed = []
+    release = asyncio.Event()
+    loop = asyncio.get_running_loop()
+
+    def process(articles):
+        # Runs in a worker thread, after submit() has returned
+        asyncio.run_coroutine_threadsafe(release.wait(), loop).result()
+        processed.append([a["id"] for a in articles])
+
+    monkeypatch.setattr(ingestion, "process_articles", process)
+    queue = ArticleIngestion(max_size=1)
+    assert queue.submit([{"id": "a1"}])
+    await asyncio.sleep(0.05)
+    assert processed == []
+
+    # The consumer holds the first batch; one more fits, the next is dropped
+    assert queue.submit([{"id": "a2"}])
+    assert not queue.submit([{"id": "a3"}])
+
+    release.set()
+    assert await queue.drain(timeout=2)
+    assert processed == [["a1"], ["a2"]]
+    await queue.shutdown()
+
+
+async def test_drain_times_out_on_a_slow_batch(monkeypatch):
+    monkeypatch.setattr(ingestion, "process_articles", lambda articles: time.sleep(0.3))
+    queue = ArticleIngestion(max_size=5)
+    queue.submit([{"id": "a1"}])
+    assert not await queue.drain(timeout=0.01)
+    assert await queue.drain(timeout=2)
+    await queue.shutdown()
@@ -0,0 +1,86 @@
+import pytest
+from app.services.jobs import EventLog, Job, JobQueueFull, LocalJobBackend, TooManyJobs, process_article_job
+
+@pytest.mark.asyncio
+async def test_event_log_resume_and_ring_buffer():
+    log = EventLog(maxlen=3)
+    for i in range(5):
+        await log.publish({"n": i})
+    await log.close()
+
+    # Only the last 3 events are retained
+    events = [(i, e["n"]) async for i, e in log.subscribe(0)]
+    assert events == [(3, 2), (4, 3), (5, 4)]
+
+    # Resuming after id 4 only replays the last event
+    events = [i async for i, _ in log.subscribe(4)]
+    assert events == [5]
+
+@pytest.mark.asyncio
+async def test_local_job_backend_runs_handler():
+    async def handler(job):
+        await job.events.publish({"status": "complete", "article": job.payload})
+        job.result = job.payload
+
+    backend = LocalJobBackend(handler, workers=1, max_queue_size=10, buffer_size=10, retention_seconds=60)
+    job = await backend.submit("user", {"article_id": "1"})
+    statuses = [e["status"] async for _, e in job.events.subscribe(0)]
+
+    assert statuses == ["queued", "complete"]
+    assert backend.get(job.id).status == "complete"
+    assert job.result == {"article_id": "1"}
+    await backend.shutdown()
+
+@pytest.mark.asyncio
+async def test_local_job_backend_bounded_queue():
+    async def handler(job):
+        pass
+
+    backend = LocalJobBackend(handler, workers=0, max_queue_size=1, buffer_size=10, retention_seconds=60)
+    await backend.submit("user", {})
+    with pytest.raises(JobQueueFull):
+        await backend.submit("user", {})
+
+@pytest.mark.asyncio
+async def test_local_job_backend_caps_jobs_per_user():
+    async def handler(job):
+        pass
+
+    backend = LocalJobBackend(handler, workers=0, max_queue_size=10, buffer_size=10, retention_seconds=60, max_per_user=2)
+    await backend.submit("user", {})
+    await backend.submit("user", {})
+    with pytest.raises(TooManyJobs):
+        await backend.submit("user", {})
+
+    # Other users still get queue space
+    await backend.submit("other", {})
+
+@pytest.mark.asyncio
+async def test_process_article_job_settles_reserved_usage(monkeypatch):
+    from app.services import jobs
+    from app.services.ai_agents.broadcast import article_runs
+
+    settled = []
+
+    async def settle(job, usage):
+        settled.append((job.usage_log_id, usage))
+
+    def stream(events):
+        async def _stream(payload):
+            for event in events:
+                yield event
+        return _stream
+
+    monkeypatch.setattr(jobs, "settle_job_usage", settle)
+
+    # A fresh run fills in the reservation with its usage
+    monkeypatch.setattr(article_runs, "stream", stream([{"status": "complete", "article": {}, "usage": {"llm_calls": 2}}]))
+    await process_article_job(Job("user", {}, 10, usage_log_id=1))
+
+    # A cache hit and a failed run release it
+    monkeypatch.setattr(article_runs, "stream", stream([{"status": "complete", "article": {}, "cached": True}]))
+    await process_article_job(Job("user", {}, 10, usage_log_id=2))
+    monkeypatch.setattr(article_runs, "stream", stream([{"status": "error", "error_code": "AI_SERVICE_ERROR", "message": "x"}]))
+    await process_article_job(Job("user", {}, 10, usage_log_id=3))
+
+    assert settled == [(1, {"llm_calls": 2}), (2, None), (3, None)]
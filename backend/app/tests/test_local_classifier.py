@@ -0,0 +1,36 @@
+from app.services.ai_agents.local_classifier import LocalClassifier, extract_tags
+
+EXAMPLES = [
+    {"title": "Team wins championship final", "content": "The striker scored twice as fans celebrated the title win.", "category": "Sports", "sentiment": "Positive"},
+    {"title": "Coach sacked after heavy defeat", "content": "The club lost again and the manager was dismissed.", "category": "Sports", "sentiment": "Negative"},
+    {"title": "Chipmaker unveils faster processor", "content": "The new silicon doubles performance for laptops and servers.", "category": "Technology", "sentiment": "Positive"},
+    {"title": "Software outage hits cloud users", "content": "A bug in the update crashed servers and angered customers.", "category": "Technology", "sentiment": "Negative"},
+] * 5
+
+def test_local_classifier_predicts_trained_labels(tmp_path):
+    model = LocalClassifier.train(EXAMPLES, n_features=2 ** 12)
+    path = str(tmp_path / "model.npz")
+    model.save(path)
+    model = LocalClassifier.load(path)
+
+    results = model.predict_batch([
+        {"title": "Striker scores in final", "content": "Fans celebrated the championship win."},
+        {"title": "New processor for servers", "content": "The silicon doubles performance."},
+        {"title": "", "content": ""},
+    ])
+    assert results[0]["category"] == "Sports"
+    assert results[0]["sentiment"] == "Positive"
+    assert results[1]["category"] == "Technology"
+    assert results[2]["category_confidence"] < 0.85
+
+def test_source_category_boosts_prediction():
+    model = LocalClassifier.train(EXAMPLES, n_features=2 ** 12)
+    plain = model.predict("Quarterly update", "Nothing specific here.")
+    boosted = model.predict("Quarterly update", "Nothing specific here.", source_categories=["technology"])
+    assert boosted["category"] == "Technology"
+    assert boosted["category_confidence"] > plain["category_confidence"] or plain["category"] == "Technology"
+
+def test_extract_tags_prefers_title_words():
+    tags = extract_tags("Mars Rover Finds Water", "Scientists say the rover found water ice near the pole.")
+    assert tags[0] in ("Rover", "Water")
+    assert "the" not in [t.lower() for t in tags]
@@ -0,0 +1,44 @@
+import numpy as np
+from app.services.ai_agents.neighbours import NeighbourIndex
+
+def unit(v):
+    v = np.asarray(v, dtype=np.float32)
+    return v / np.linalg.norm(v)
+
+def brute_force(index, row, k):
+    sims = index.vectors[:index.size] @ index.vectors[row]
+    sims[row] = -np.inf
+    return list(np.argsort(-sims)[:k])
+
+def test_incremental_refresh_matches_brute_force():
+    rng = np.random.default_rng(0)
+    index = NeighbourIndex(dim=16, capacity=200, k=5, block_size=32)
+    for batch in range(4):
+        for i in range(30):
+            index.add(f"a{batch}-{i}", unit(rng.standard_normal(16)), {"id": f"a{batch}-{i}"})
+        index.refresh()
+    assert index.neighbours.dtype == np.int32
+    for row in range(index.size):
+        assert list(index.neighbours[row]) == brute_force(index, row, 5)
+
+def test_similar_returns_closest_first_and_unknown_is_none():
+    index = NeighbourIndex(dim=3, capacity=10, k=3)
+    index.add("x", unit([1, 0, 0]), {"id": "x"})
+    index.add("near", unit([1, 0.1, 0]), {"id": "near"})
+    index.add("far", unit([1, 1, 0]), {"id": "far"})
+    index.add("orthogonal", unit([0, 0, 1]), {"id": "orthogonal"})
+    # Pending articles are folded in on lookup
+    assert [r["id"] for r in index.similar("x", 5)] == ["near", "far"]
+    assert index.similar("missing", 5) is None
+
+def test_overwritten_rows_leave_neighbour_lists():
+    index = NeighbourIndex(dim=3, capacity=3, k=2)
+    index.add("a", unit([1, 0, 0]), {"id": "a"})
+    index.add("b", unit([1, 0.1, 0]), {"id": "b"})
+    index.add("c", unit([0, 1, 0]), {"id": "c"})
+    index.refresh()
+    assert index.similar("b", 1)[0]["id"] == "a"
+    # "d" takes over a's row; b must not report d as a
+    index.add("d", unit([0, 0, 1]), {"id": "d"})
+    assert "a" not in index
+    assert [r["id"] for r in index.similar("b", 2)] == ["c"]
@@ -0,0 +1,47 @@
+import asyncio
+import uuid
+
+import pytest
+from sqlalchemy import delete, func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import sessionmaker
+
+from app.models.news import NewsArticle, NewsCategory
+from app.services import analysis_store
+
+
+@pytest.mark.asyncio
+async def test_overlapping_batches_persist_without_conflicts(test_engine):
+    Session = sessionmaker(test_engine, class_=AsyncSession, expire_on_commit=False)
+    run = uuid.uuid4().hex[:8]
+    category = f"persist-{run}"
+
+    def article(i, description="Body"):
+        return {"url": f"https://example.com/{run}/{i}", "title": f"Title {i}", "description": description, "category": [category]}
+
+    async def persist(batch):
+        async with Session() as db:
+            changed = await analysis_store.ingest_articles(db, batch)
+            await db.commit()
+            return changed
+
+    try:
+        # Two workers fetch overlapping pages at the same time
+        first, second = await asyncio.gather(
+            persist([article(i) for i in range(0, 6)]),
+            persist([article(i) for i in range(3, 9)]),
+        )
+        assert first + second == 9
+
+        # Unchanged articles are left alone, changed text is rewritten
+        assert await persist([article(0), article(1, description="Updated")]) == 1
+
+        async with Session() as db:
+            urls = NewsArticle.url.like(f"https://example.com/{run}/%")
+            assert (await db.execute(select(func.count()).where(urls))).scalar() == 9
+            assert (await db.execute(select(func.count()).where(NewsCategory.name == category))).scalar() == 1
+    finally:
+        async with Session() as db:
+            await db.execute(delete(NewsArticle).where(NewsArticle.url.like(f"https://example.com/{run}/%")))
+            await db.execute(delete(NewsCategory).where(NewsCategory.name == category))
+            await db.commit()
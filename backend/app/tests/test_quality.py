@@ -0,0 +1,27 @@
+from app.services.ai_agents.quality import score_quality
+
+GOOD_ARTICLE = (
+    "The central bank raised interest rates by a quarter point on Wednesday, citing inflation that has "
+    "remained above its target for most of the year. Officials said they would watch the labour market "
+    "closely before deciding on further moves. Markets had largely expected the decision, and stocks "
+    "rose modestly after the announcement as investors welcomed the cautious tone of the statement."
+)
+
+def test_empty_content_is_confident_reject():
+    result = score_quality("Title", "")
+    assert result["quality_score"] == 0.0
+    assert result["confident"]
+
+def test_boilerplate_is_confident_reject():
+    result = score_quality("Title", "Subscribe to our newsletter. Subscribe to our newsletter. Click here.")
+    assert result["quality_score"] < 0.3
+    assert result["confident"]
+
+def test_real_article_is_confident_accept():
+    result = score_quality("Rates rise", GOOD_ARTICLE)
+    assert result["quality_score"] >= 0.7
+    assert result["confident"]
+
+def test_short_description_is_escalated():
+    result = score_quality("Title", "Apple unveils a new product today.")
+    assert not result["confident"]
@@ -0,0 +1,77 @@
+import pytest
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.core.metrics import metrics
+from app.models.response_cache import AIResponseCache
+from app.services.ai_agents import response_cache
+from app.services.ai_agents.response_cache import ResponseCache
+
+@pytest.fixture
+async def sqlite_session(tmp_path):
+    # The cache table only, on a throwaway sqlite database
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path}/cache.db")
+    async with engine.begin() as conn:
+        await conn.run_sync(AIResponseCache.__table__.create)
+    async_session = sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+    async with async_session() as session:
+        yield session
+    await engine.dispose()
+
+@pytest.mark.asyncio
+async def test_database_tier_survives_process_memory(sqlite_session):
+    first = ResponseCache("test", memory_size=10, ttl_seconds=60, max_rows=100)
+    await first.set(sqlite_session, "k1", {"explanation": "cached"})
+    await sqlite_session.commit()
+
+    # A fresh instance (another worker) misses memory but hits the table
+    second = ResponseCache("test", memory_size=10, ttl_seconds=60, max_rows=100)
+    assert await second.get(sqlite_session, "k1", label="eli5") == {"explanation": "cached"}
+    assert await second.get(sqlite_session, "missing", label="eli5") is None
+    assert await second.get(sqlite_session, "k1", label="eli5") == {"explanation": "cached"}
+
+    ratios = metrics.snapshot()["ratios"]
+    assert ratios["cache.test.eli5.hit_rate"] > 0
+    assert "cache.test.eli5.memory_hit_rate" in ratios
+
+@pytest.mark.asyncio
+async def test_expired_rows_are_not_returned(sqlite_session):
+    cache = ResponseCache("test", memory_size=10, ttl_seconds=-1, max_rows=100)
+    await cache.set(sqlite_session, "old", {"explanation": "stale"})
+    await sqlite_session.commit()
+    assert await cache.get(sqlite_session, "old") is None
+    assert await cache.evict(sqlite_session) == 1
+
+@pytest.mark.asyncio
+async def test_eviction_keeps_most_recent_rows(sqlite_session, monkeypatch):
+    monkeypatch.setattr(response_cache, "EVICT_EVERY_WRITES", 1000)
+    cache = ResponseCache("test", memory_size=10, ttl_seconds=60, max_rows=3)
+    for i in range(5):
+        await cache.set(sqlite_session, f"k{i}", {"i": i})
+        await sqlite_session.commit()
+
+    await cache.evict(sqlite_session)
+    await sqlite_session.commit()
+    keys = (await sqlite_session.execute(select(AIResponseCache.key))).scalars().all()
+    assert sorted(keys) == ["k2", "k3", "k4"]
+    count = (await sqlite_session.execute(select(func.count()).select_from(AIResponseCache))).scalar()
+    assert count == 3
+
+@pytest.mark.asyncio
+async def test_identical_writes_upsert_without_touching_caller_transaction(sqlite_session):
+    first = ResponseCache("test", memory_size=10, ttl_seconds=60, max_rows=100)
+    second = ResponseCache("test", memory_size=10, ttl_seconds=60, max_rows=100)
+    await first.set(sqlite_session, "k1", {"explanation": "first"})
+    await sqlite_session.commit()
+    # A second worker that missed on the same key writes it again
+    await second.set(sqlite_session, "k1", {"explanation": "second"})
+    await sqlite_session.commit()
+
+    rows = (await sqlite_session.execute(select(AIResponseCache.value))).scalars().all()
+    assert rows == [{"explanation": "second"}]
+
+    # A read neither commits nor rolls back what the caller has pending
+    sqlite_session.add(AIResponseCache(namespace="other", key="pending", value={}, last_used_at=func.now(), expires_at=func.now()))
+    assert await ResponseCache("test", 10, 60, 100).get(sqlite_session, "k1") == {"explanation": "second"}
+    assert "pending" in {o.key for o in sqlite_session.new}
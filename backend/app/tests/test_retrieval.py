@@ -0,0 +1,72 @@
+import numpy as np
+import pytest
+from app.services.ai_agents.embeddings import HashedNgramEmbedder
+from app.services.ai_agents.vector_store import VectorStore
+from app.services.ai_agents import retrieval
+
+ARTICLES = [
+    {"id": "a1", "title": "Central bank raises interest rates", "description": "Inflation pushed the bank to lift rates by half a point.", "url": "u1"},
+    {"id": "a2", "title": "Striker scores twice in cup final", "description": "The home team won the football cup after extra time.", "url": "u2"},
+    {"id": "a3", "title": "New vaccine approved for children", "description": "Health regulators approved the vaccine after large trials.", "url": "u3"},
+]
+
+@pytest.fixture
+def index(tmp_path, monkeypatch):
+    store = VectorStore(str(tmp_path), dim=256, capacity=100)
+    monkeypatch.setattr(retrieval, "_article_index", store)
+    monkeypatch.setattr(retrieval, "embedder", HashedNgramEmbedder(256))
+    return store
+
+def test_embeddings_are_normalised_and_similar_for_related_text():
+    embedder = HashedNgramEmbedder(256)
+    vectors = embedder.embed(["interest rates rise", "rates raised by the central bank", "football cup final"])
+    assert np.allclose(np.linalg.norm(vectors, axis=1), 1.0, atol=1e-5)
+    assert vectors[0] @ vectors[1] > vectors[0] @ vectors[2]
+
+def test_retrieve_ranks_relevant_article_first(index):
+    assert retrieval.index_articles(ARTICLES) == 3
+    # Already indexed articles are skipped
+    assert retrieval.index_articles(ARTICLES) == 0
+
+    results = retrieval.retrieve("Why did the bank raise rates?", k=2)
+    assert results[0]["article_id"] == "a1"
+
+    scoped = retrieval.retrieve("Who approved it?", k=2, article_id="a3")
+    assert scoped[0]["article_id"] == "a3"
+
+    context = retrieval.build_context(results, "extra client notes", budget=1000)
+    assert context.startswith("[1] Central bank raises interest rates")
+    assert context.endswith("extra client notes")
+
+def test_index_persists_and_uses_lsh_when_large(tmp_path):
+    embedder = HashedNgramEmbedder(128)
+    store = VectorStore(str(tmp_path), dim=128, capacity=500, exact_search_max=10)
+    texts = [f"story {i} about topic {i % 17} and region {i % 5}" for i in range(300)]
+    store.add([{"article_id": str(i), "title": t, "text": t} for i, t in enumerate(texts)], embedder.embed(texts))
+
+    reopened = VectorStore(str(tmp_path), dim=128, capacity=500, exact_search_max=10)
+    assert len(reopened) == 300
+    results = reopened.search(embedder.embed_one(texts[42]), k=3)
+    assert results[0]["article_id"] == "42"
+
+def test_ring_overwrites_oldest_passages(tmp_path):
+    embedder = HashedNgramEmbedder(64)
+    store = VectorStore(str(tmp_path), dim=64, capacity=2)
+    texts = ["first passage text", "second passage text", "third passage text"]
+    store.add([{"article_id": str(i), "text": t} for i, t in enumerate(texts)], embedder.embed(texts))
+    assert len(store) == 2
+    assert not store.has_article("0") and store.has_article("2")
+
+def test_second_process_opens_index_read_only_and_follows_writer(tmp_path):
+    embedder = HashedNgramEmbedder(64)
+    writer = VectorStore(str(tmp_path), dim=64, capacity=10)
+    reader = VectorStore(str(tmp_path), dim=64, capacity=10)
+    assert writer.writable and not reader.writable
+
+    texts = ["bank raises rates", "striker scores twice"]
+    assert not reader.add([{"article_id": "r", "text": "ignored"}], embedder.embed(["ignored"]))
+    assert writer.add([{"article_id": str(i), "text": t} for i, t in enumerate(texts)], embedder.embed(texts))
+
+    # The reader picks up the writer's passages on its next lookup
+    assert reader.has_article("1") and not reader.has_article("r")
+    assert reader.search(embedder.embed_one(texts[1]), k=1)[0]["article_id"] == "1"
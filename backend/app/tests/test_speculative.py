@@ -0,0 +1,129 @@
+import time
+from datetime import datetime, timezone
+import pytest
+from app.services.ai_agents import speculative
+from app.services.ai_agents.admission import llm_admission
+from app.services.ai_agents.cache import TTLCache
+from app.services.ai_agents.speculative import SpeculativeAnalyser, article_state
+from app.services.ai_agents.runner import state_cache_key
+
+def article(i, category, minutes_ago):
+    published = datetime.fromtimestamp(time.time() - minutes_ago * 60, timezone.utc)
+    return {
+        "id": f"a{i}",
+        "title": f"Title {i}",
+        "description": f"Description {i}",
+        "category": [category],
+        "published": published.strftime("%Y-%m-%d %H:%M:%S %z"),
+    }
+
+@pytest.fixture(autouse=True)
+def fresh_cache(monkeypatch):
+    cache = TTLCache(100, 60)
+    monkeypatch.setattr(speculative, "analysis_cache", cache)
+    monkeypatch.setattr("app.services.ai_agents.runner.analysis_cache", cache)
+    return cache
+
+def test_candidates_are_newest_per_category_and_skip_cached(fresh_cache):
+    analyser = SpeculativeAnalyser(per_category=2, max_categories=5, max_load=0.5, llm_calls_per_key=10, max_age_seconds=3600, pool_size=100)
+    analyser.offer([
+        article(1, "sports", 30), article(2, "sports", 5), article(3, "sports", 10),
+        article(4, "tech", 1), article(5, "tech", 24 * 60),
+    ])
+    ids = [a["id"] for a in analyser.candidates()]
+    # Sports has more fresh articles; the day-old tech article is too old
+    assert ids == ["a2", "a3", "a4"]
+
+    fresh_cache.set(state_cache_key(article_state(article(2, "sports", 5), True)), {"summary_short": "x"})
+    assert [a["id"] for a in analyser.candidates()] == ["a3", "a1", "a4"]
+
+def test_pool_is_bounded():
+    analyser = SpeculativeAnalyser(2, 5, 0.5, 10, 3600, pool_size=3)
+    analyser.offer([article(i, "sports", i) for i in range(5)])
+    assert len(analyser._pool) == 3
+
+@pytest.mark.asyncio
+async def test_run_once_stops_when_llm_is_busy(monkeypatch):
+    analyser = SpeculativeAnalyser(3, 5, 0.5, 10, 3600, 100)
+    analyser.offer([article(i, "sports", i) for i in range(3)])
+    analysed = []
+
+    async def fake_analyse(a):
+        analysed.append(a["id"])
+        # A user request arrives and takes most of the LLM slots
+        llm_admission._in_flight = llm_admission.max_concurrency
+        return {"status": "complete", "article": {}}
+
+    monkeypatch.setattr(analyser, "analyse", fake_analyse)
+    try:
+        stats = await analyser.run_once()
+    finally:
+        llm_admission._in_flight = 0
+    assert analysed == ["a0"]
+    assert stats["analysed"] == 1 and stats["deferred"] == 2
+
+@pytest.mark.asyncio
+async def test_run_once_stops_on_rate_limit(monkeypatch):
+    analyser = SpeculativeAnalyser(3, 5, 0.5, 10, 3600, 100)
+    analyser.offer([article(i, "sports", i) for i in range(3)])
+
+    async def fake_analyse(a):
+        return {"status": "error", "error_code": "AI_RATE_LIMIT"}
+
+    monkeypatch.setattr(analyser, "analyse", fake_analyse)
+    stats = await analyser.run_once()
+    assert stats["failed"] == 1 and stats["deferred"] == 2
+
+@pytest.mark.asyncio
+async def test_premium_run_also_fills_free_entry(monkeypatch, fresh_cache):
+    async def fake_analyse_article(state):
+        return {"status": "complete", "article": {"id": state["article_id"], "summary_short": "s", "bias_score": 0.2, "bias_explanation": "x"}, "degraded": []}
+
+    monkeypatch.setattr(speculative, "analyse_article", fake_analyse_article)
+    a = article(1, "sports", 1)
+    await SpeculativeAnalyser(3, 5, 0.5, 10, 3600, 100).analyse(a)
+    free = fresh_cache.get(state_cache_key(article_state(a, False)))
+    assert free["summary_short"] == "s" and free["bias_score"] is None
+
+@pytest.mark.asyncio
+async def test_speculative_runs_are_not_shared_with_user_clicks(monkeypatch):
+    from app.services.ai_agents.broadcast import article_runs
+    async def failing_analyse_article(state):
+        # A click for the same article must not find (and join) this background run
+        assert article_runs.in_flight() == 0
+        raise RuntimeError("429 quota exceeded")
+
+    monkeypatch.setattr(speculative, "analyse_article", failing_analyse_article)
+    event = await SpeculativeAnalyser(3, 5, 0.5, 10, 3600, 100).analyse(article(1, "sports", 1))
+    assert event["status"] == "error" and event["error_code"] == "AI_RATE_LIMIT"
+
+@pytest.mark.asyncio
+async def test_click_and_speculative_run_on_one_article_in_flight_together(monkeypatch, fresh_cache):
+    import asyncio
+    from app.services.ai_agents import nodes, runner
+    from app.services.ai_agents.broadcast import article_runs
+    from app.services.ai_agents.checkpoints import GraphCheckpoints
+    from app.services.ai_agents.llm_backends import FakeChatModel
+
+    checkpoints = GraphCheckpoints("memory", "", ttl_seconds=60)
+    monkeypatch.setattr(runner, "graph_checkpoints", checkpoints)
+    fake = FakeChatModel(latency_ms=20, latency_jitter_ms=0)
+    monkeypatch.setattr(nodes, "llm_instances", {i: fake for i in range(4)})
+    monkeypatch.setattr(nodes, "_chain_cache", {})
+
+    a = {**article(1, "sports", 1), "title": "Home team wins the cup final", "description": (
+        "The home team won the cup final after extra time in front of a sold-out stadium on Saturday. "
+        "Their captain scored the winning goal with a header from a corner in the last minute. "
+        "Fans celebrated in the city centre until late at night, and the parade is planned for Monday. "
+        "The coach said the squad would stay together for next season's European campaign."
+    )}
+    click, background = await asyncio.gather(
+        article_runs.result(article_state(a, True)),
+        SpeculativeAnalyser(3, 5, 0.5, 10, 3600, 100).analyse(a),
+    )
+    assert click["status"] == background["status"] == "complete"
+    assert not click["shared"] and click["article"]["summary_short"]
+    # Both runs finished cleanly: nothing left to resume
+    graph, config, run_id, resumed = await checkpoints.prepare(state_cache_key(article_state(a, True)))
+    assert resumed is None
+    assert not checkpoints._pointers
@@ -0,0 +1,73 @@
+import time
+import pytest
+from app.services.ai_agents.trending import CountMinSketch, DecayedTopK, TrendingTracker
+
+def make_tracker(path=None):
+    return TrendingTracker(k=5, width=256, depth=4, snapshot_path=path)
+
+def test_count_min_sketch_never_underestimates():
+    sketch = CountMinSketch(width=64, depth=4)
+    for i in range(500):
+        sketch.add(f"term{i % 50}", 1.0)
+    assert all(sketch.estimate(f"term{i}") >= 10 for i in range(50))
+
+def test_top_k_keeps_heaviest_terms_in_constant_memory():
+    top = DecayedTopK(3600, k=3, width=512, depth=4, now=0.0)
+    for i in range(200):
+        top.add(f"rare{i}", 1.0)
+    for term, count in [("ai", 30), ("elections", 20), ("markets", 10)]:
+        for _ in range(count):
+            top.add(term, 1.0)
+    assert [term for term, _ in top.top(3, 1.0)] == ["ai", "elections", "markets"]
+    assert len(top.scores) == 3 and len(top._heap) <= 12
+
+def test_old_events_decay():
+    top = DecayedTopK(3600, k=5, width=512, depth=4, now=0.0)
+    for _ in range(10):
+        top.add("yesterday", 0.0)
+    for _ in range(3):
+        top.add("today", 6 * 3600.0)
+    assert top.top(1, 6 * 3600.0)[0][0] == "today"
+    # Far in the future the landmark is rescaled without losing the ranking
+    top.add("today", 3600.0 * 60)
+    assert top.top(1, 3600.0 * 60)[0][0] == "today"
+
+def test_articles_count_once_per_source_and_kind_filter():
+    tracker = make_tracker()
+    now = time.time()
+    for _ in range(3):
+        tracker.record("a1", ["AI"], ["technology"], "ingest", now=now)
+    tracker.record("a1", ["AI"], ["Technology"], "classifier", now=now)
+    tracker.record("a2", ["Elections"], ["General"], "classifier", now=now)
+
+    tags = tracker.top("1h", 10, kind="tag")
+    assert [t["term"] for t in tags] == ["ai", "elections"]
+    assert tags[0]["score"] > tags[1]["score"]
+    assert [t["term"] for t in tracker.top("24h", 10, kind="category")] == ["technology"]
+
+def test_snapshot_round_trip(tmp_path):
+    path = str(tmp_path / "trending.npz")
+    tracker = make_tracker(path)
+    tracker.record("a1", ["climate"], [], "ingest")
+    tracker.save()
+
+    restored = make_tracker(path)
+    assert restored.load()
+    assert restored.top("6h", 1)[0]["term"] == "climate"
+
+@pytest.mark.asyncio
+async def test_background_classifications_do_not_feed_trending(monkeypatch):
+    from app.services.ai_agents import nodes
+    from app.services.ai_agents.admission import llm_priority, priority_scope
+
+    tracker = make_tracker()
+    monkeypatch.setattr(nodes, "trending", tracker)
+
+    async def classify(state):
+        return {"category": "Sports", "sentiment": "Neutral", "tags": [state["article_id"]]}
+
+    monkeypatch.setattr(nodes, "_classify", classify)
+    with priority_scope(llm_priority(True, interactive=False)):
+        await nodes.classifier_node({"article_id": "speculative"})
+    await nodes.classifier_node({"article_id": "clicked"})
+    assert [t["term"] for t in tracker.top("1h", 10, kind="tag")] == ["clicked"]
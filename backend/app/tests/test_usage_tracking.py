@@ -0,0 +1,46 @@
+import pytest
+from app.services.ai_agents import nodes, runner
+from app.services.ai_agents.checkpoints import GraphCheckpoints
+from app.services.ai_agents.llm_backends import FakeChatModel
+from app.services.ai_agents.runner import analyse_article, build_initial_state
+from app.services.ai_agents.usage import build_usage_log, track_usage
+
+CONTENT = (
+    "The national library opened a new digital archive of historic newspapers on Friday. "
+    "Researchers can now search more than two million pages from the last century online. "
+    "Volunteers spent three years scanning fragile copies stored in the basement vaults. "
+    "The director said school groups would get free guided access to the collection."
+)
+
+@pytest.fixture
+def fake_llm(monkeypatch):
+    fake = FakeChatModel(latency_ms=0, latency_jitter_ms=0)
+    monkeypatch.setattr(nodes, "llm_instances", {i: fake for i in range(4)})
+    monkeypatch.setattr(nodes, "_chain_cache", {})
+    monkeypatch.setattr(runner, "graph_checkpoints", GraphCheckpoints("memory", "", ttl_seconds=60))
+    monkeypatch.setattr(runner.analysis_cache, "get", lambda key: None)
+
+@pytest.mark.asyncio
+async def test_call_records_usage_metadata(fake_llm):
+    with track_usage("ask_ai") as outer, track_usage() as inner:
+        answer = await nodes.call_llm_with_rotation(nodes.SHORT_SUMMARY_PROMPT, nodes.STR_PARSER, {"title": "T", "content": CONTENT})
+
+    assert answer
+    for tracker in (outer, inner):
+        assert tracker.llm_calls == 1
+        assert tracker.input_tokens > 0 and tracker.output_tokens > 0
+        assert tracker.estimated_calls == 0
+    assert list(outer.stages) == ["ask_ai"]
+
+@pytest.mark.asyncio
+async def test_graph_run_usage_is_broken_down_by_node(fake_llm):
+    event = await analyse_article(build_initial_state("lib-1", "Library opens digital archive", CONTENT, True))
+    usage = event["usage"]
+
+    assert usage["llm_calls"] >= 3
+    assert {"summarizer", "bias"} <= usage["stages"].keys()
+    assert usage["total_tokens"] == sum(s["input_tokens"] + s["output_tokens"] for s in usage["stages"].values())
+
+    log = build_usage_log("user", "process_article", usage)
+    assert log.tokens_used == usage["total_tokens"]
+    assert log.usage_breakdown["bias"]["llm_calls"] == 1
@@ -0,0 +1,174 @@
+"""
+Throughput benchmark for the AI endpoints using the offline fake LLM backend.
+No Gemini quota or database is used. Run from backend/:
+
+    python -m benchmarks.bench_graph --concurrency 16 --requests 200
+    python -m benchmarks.bench_graph --latency-ms 300 --error-rate 0.02 --rate-limit-rate 0.05
+
+Reports per-endpoint throughput and p50/p95/p99 latency, plus per-node
+latency percentiles from the in-process metrics registry.
+"""
+import argparse
+import asyncio
+import os
+import time
+import uuid
+
+ENDPOINTS = ["process", "explain", "compare", "feed_summary"]
+
+
+def configure_env(args):
+    # Must happen before app.core.config is imported
+    os.environ["LLM_BACKEND"] = "fake"
+    os.environ["LLM_FAKE_LATENCY_MS"] = str(args.latency_ms)
+    os.environ["LLM_FAKE_LATENCY_JITTER_MS"] = str(args.jitter_ms)
+    os.environ["LLM_FAKE_ERROR_RATE"] = str(args.error_rate)
+    os.environ["LLM_FAKE_RATE_LIMIT_RATE"] = str(args.rate_limit_rate)
+    os.environ.setdefault("NEWS_MODE", "TEST")
+
+
+class _EmptyResult:
+    rowcount = 0
+
+    def scalars(self):
+        return self
+
+    def first(self):
+        return None
+
+    def scalar(self):
+        return 0
+
+    def scalar_one_or_none(self):
+        return None
+
+
+class NullSession:
+    """
+    Stands in for the DB session so only the AI path is measured.
+    """
+
+    def add(self, obj):
+        pass
+
+    async def merge(self, obj):
+        return obj
+
+    async def commit(self):
+        pass
+
+    async def rollback(self):
+        pass
+
+    async def refresh(self, obj):
+        pass
+
+    async def execute(self, *args, **kwargs):
+        return _EmptyResult()
+
+
+def percentile(values, q):
+    values = sorted(values)
+    if not values:
+        return 0.0
+    return values[min(len(values) - 1, round(q / 100 * (len(values) - 1)))]
+
+
+def article_payload(i: int) -> dict:
+    # Unique content per request so the analysis cache does not hide the work
+    body = (
+        f"Regulators announced new rules for the energy market on Monday, story number {i}. "
+        "Officials said the measures would lower prices for households over the next year. "
+        "Industry groups warned about investment delays and higher compliance costs. "
+        "Consumer advocates welcomed the plan but asked for faster enforcement against suppliers. "
+        "The rules take effect in the spring after a short consultation with grid operators."
+    )
+    return {"id": str(i), "title": f"Energy market rules update {i}", "content": body, "category": ["business"]}
+
+
+async def run_endpoint(client, name: str, total: int, concurrency: int):
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies = []
+    errors = 0
+
+    async def one(i: int):
+        nonlocal errors
+        async with semaphore:
+            start = time.perf_counter()
+            if name == "process":
+                res = await client.post("/api/v1/ai/process", json=article_payload(i))
+                ok = res.status_code == 200 and '"status": "complete"' in res.text
+            elif name == "explain":
+                res = await client.post("/api/v1/ai/explain?style=eli5", json=article_payload(i))
+                ok = res.status_code == 200
+            elif name == "compare":
+                texts = [article_payload(i)["content"], article_payload(i + total)["content"]]
+                res = await client.post("/api/v1/ai/compare", json=texts)
+                ok = res.status_code == 200
+            else:
+                res = await client.post("/api/v1/ai/feed/summary")
+                ok = res.status_code == 200
+            latencies.append(time.perf_counter() - start)
+            if not ok:
+                errors += 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one(i) for i in range(total)))
+    elapsed = time.perf_counter() - start
+    return {
+        "throughput": total / elapsed,
+        "p50": percentile(latencies, 50) * 1000,
+        "p95": percentile(latencies, 95) * 1000,
+        "p99": percentile(latencies, 99) * 1000,
+        "errors": errors,
+    }
+
+
+async def main(args):
+    from httpx import AsyncClient, ASGITransport
+    from app.main import app
+    from app.api import deps
+    from app.core.metrics import metrics
+    from app.models.user import User
+
+    user = User(id=uuid.uuid4(), email="bench@example.com", is_active=True, is_premium=True)
+
+    async def override_db():
+        yield NullSession()
+
+    app.dependency_overrides[deps.get_db] = override_db
+    app.dependency_overrides[deps.get_current_active_user] = lambda: user
+    app.dependency_overrides[deps.get_current_premium_user] = lambda: user
+
+    transport = ASGITransport(app=app)
+    async with AsyncClient(transport=transport, base_url="http://bench", timeout=120) as client:
+        print(f"{'endpoint':<14}{'req/s':>10}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'errors':>8}")
+        for name in args.endpoints:
+            result = await run_endpoint(client, name, args.requests, args.concurrency)
+            print(
+                f"{name:<14}{result['throughput']:>10.1f}{result['p50']:>10.1f}"
+                f"{result['p95']:>10.1f}{result['p99']:>10.1f}{result['errors']:>8}"
+            )
+
+    from app.services.ai_agents.checkpoints import graph_checkpoints
+    await graph_checkpoints.close()
+
+    print(f"\n{'node':<14}{'count':>8}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}")
+    for name, hist in sorted(metrics.snapshot()["histograms"].items()):
+        if name.startswith("node."):
+            node = name.split(".")[1]
+            print(f"{node:<14}{hist['count']:>8}{hist['p50']:>10.1f}{hist['p95']:>10.1f}{hist['p99']:>10.1f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--requests", type=int, default=100, help="Requests per endpoint")
+    parser.add_argument("--latency-ms", type=float, default=50.0)
+    parser.add_argument("--jitter-ms", type=float, default=20.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--rate-limit-rate", type=float, default=0.0)
+    parser.add_argument("--endpoints", nargs="+", default=ENDPOINTS, choices=ENDPOINTS)
+    args = parser.parse_args()
+    configure_env(args)
+    asyncio.run(main(args))
@@ -0,0 +1,55 @@
+"""
+Import-time and per-call overhead benchmark for the AI layer.
+No LLM requests are made. Run from backend/:
+
+    python -m benchmarks.bench_llm_overhead
+"""
+import statistics
+import subprocess
+import sys
+import time
+
+IMPORT_RUNS = 5
+CALL_RUNS = 2000
+
+IMPORT_SNIPPET = (
+    "import time; t = time.perf_counter(); import app.main; "
+    "print(time.perf_counter() - t)"
+)
+
+
+def bench_import() -> float:
+    samples = []
+    for _ in range(IMPORT_RUNS):
+        out = subprocess.run([sys.executable, "-c", IMPORT_SNIPPET], capture_output=True, text=True, check=True)
+        samples.append(float(out.stdout.strip().splitlines()[-1]))
+    return statistics.median(samples)
+
+
+def bench_per_call():
+    from langchain_core.prompts import ChatPromptTemplate
+    from langchain_core.output_parsers import JsonOutputParser
+    from app.services.ai_agents import nodes
+
+    template = nodes.SUMMARIZER_PROMPT.messages[0].prompt.template
+    llm = nodes.get_llm(0)
+
+    # Previous behaviour: template, parser and chain rebuilt on every call
+    start = time.perf_counter()
+    for _ in range(CALL_RUNS):
+        prompt = ChatPromptTemplate.from_template(template)
+        prompt | llm | JsonOutputParser()
+    legacy = (time.perf_counter() - start) / CALL_RUNS
+
+    nodes.get_chain(nodes.SUMMARIZER_PROMPT, 0)
+    start = time.perf_counter()
+    for _ in range(CALL_RUNS):
+        nodes.get_chain(nodes.SUMMARIZER_PROMPT, 0)
+    cached = (time.perf_counter() - start) / CALL_RUNS
+    return legacy, cached
+
+
+if __name__ == "__main__":
+    print(f"import app.main (median of {IMPORT_RUNS}): {bench_import() * 1000:.0f} ms")
+    legacy, cached = bench_per_call()
+    print(f"chain setup per call: rebuilt {legacy * 1e6:.1f} us, cached {cached * 1e6:.2f} us")
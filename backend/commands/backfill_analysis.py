@@ -0,0 +1,117 @@
+"""
+Re-analyses stored articles (news_articles) whose analysis is missing or
+stale: their text changed since it was analysed, or the model or a node's
+prompt version (NODE_PROMPT_VERSIONS) changed. Only the nodes whose inputs
+changed are re-run. Run from backend/:
+
+    python -m commands.backfill_analysis --batch-size 50 --max-batches 20
+
+Rows are walked in id order in batches, each committed on its own, and the
+position is saved to --cursor-file after every batch, so an interrupted run
+(or one stopped by --max-batches or LLM rate limits) resumes where it left
+off. The cursor is dropped when a pass completes or the analysis version
+changes. LLM calls run at background priority.
+"""
+import argparse
+import asyncio
+import json
+import os
+import time
+import uuid
+from typing import Any, Dict, Optional
+
+
+def load_cursor(path: str, version: str) -> Optional[str]:
+    if not os.path.exists(path):
+        return None
+    try:
+        with open(path) as f:
+            cursor = json.load(f)
+    except Exception as e:
+        print(f"Ignoring unreadable cursor {path}: {e}")
+        return None
+    # A new version makes every row stale again, so start over
+    return cursor.get("after") if cursor.get("version") == version else None
+
+
+def save_cursor(path: str, version: str, after: Optional[str]) -> None:
+    if after is None:
+        if os.path.exists(path):
+            os.remove(path)
+        return
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump({"version": version, "after": after}, f)
+    os.replace(tmp_path, path)
+
+
+async def backfill(batch_size: int, max_batches: int, cursor_path: str, restart: bool = False) -> Dict[str, Any]:
+    from sqlalchemy import select
+
+    from app.db.session import AsyncSessionLocal
+    from app.models.news import NewsArticle, NewsCategory
+    from app.services.ai_agents.admission import llm_priority, priority_scope
+    from app.services.ai_agents.usage import track_usage
+    from app.services.analysis_store import analyse_rows, current_analysis_version, stale_clause
+
+    version = current_analysis_version()
+    after = None if restart else load_cursor(cursor_path, version)
+    stats: Dict[str, Any] = {"batches": 0, "analysed": 0, "failed": 0, "nodes_run": 0, "complete": False}
+
+    with priority_scope(llm_priority(False, interactive=False)), track_usage("backfill") as usage:
+        while not max_batches or stats["batches"] < max_batches:
+            async with AsyncSessionLocal() as db:
+                query = (
+                    select(NewsArticle, NewsCategory.name)
+                    .outerjoin(NewsCategory, NewsCategory.id == NewsArticle.category_id)
+                    .where(stale_clause())
+                    .order_by(NewsArticle.id)
+                    .limit(batch_size)
+                )
+                if after is not None:
+                    query = query.where(NewsArticle.id > uuid.UUID(after))
+                rows = (await db.execute(query)).all()
+                if not rows:
+                    stats["complete"] = True
+                    after = None
+                    break
+
+                started = time.perf_counter()
+                try:
+                    batch = await analyse_rows(db, rows)
+                finally:
+                    # Written rows are kept even when the batch stops on rate limits
+                    await db.commit()
+                after = str(rows[-1][0].id)
+
+            save_cursor(cursor_path, version, after)
+            stats["batches"] += 1
+            for name in ("analysed", "failed", "nodes_run"):
+                stats[name] += batch[name]
+            print(f"Batch {stats['batches']}: {batch} in {time.perf_counter() - started:.1f}s")
+        stats["llm_calls"] = usage.llm_calls
+
+    save_cursor(cursor_path, version, after)
+    return stats
+
+
+async def main(args):
+    try:
+        stats = await backfill(args.batch_size, args.max_batches, args.cursor_file, args.restart)
+    except Exception as e:
+        # Rate limited or overloaded: the cursor points after the last committed batch
+        print(f"Backfill stopped: {e}")
+        return
+    print(f"Backfill finished: {stats}")
+
+
+if __name__ == "__main__":
+    from app.core.config import settings
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--batch-size", type=int, default=settings.BACKFILL_BATCH_SIZE)
+    parser.add_argument("--max-batches", type=int, default=0, help="0 = until no stale rows are left")
+    parser.add_argument("--cursor-file", default="backfill_analysis.cursor")
+    parser.add_argument("--restart", action="store_true", help="Ignore the saved cursor")
+    args = parser.parse_args()
+    asyncio.run(main(args))